@@ -0,0 +1,80 @@
+from database.tournament_database import (
+    get_finished_tournament_ids,
+    get_tournament_export,
+    delete_tournament)
+from database.archive_database import (
+    archive_tournament_export,
+    get_archived_tournaments,
+    get_archived_tournament_by_id)
+from backend.tournaments import (
+    LONG_LINE_DELIMITER,
+    SHORT_LINE_DELIMITER,
+    print_schedule)
+from datetime import datetime
+
+# Archiving moves a finished tournament out of the tournaments database into
+# the archive database (database/archive_database.py): the tournament, its
+# registrations and its games with their final scores are copied in bulk,
+# then the tournament is deleted from the live tables with delete_tournament.
+# The copy is committed before the delete, and copying again replaces the
+# earlier copy, so a run interrupted in between is finished by running it
+# again. Score corrections (the score history) are not archived.
+
+# Archives one tournament
+# Returns the counts of live rows removed, see delete_tournament
+def archive_tournament(tournament_id: int, archived_at: datetime = None):
+    if archived_at is None:
+        archived_at = datetime.now()
+
+    archive_tournament_export(get_tournament_export(tournament_id),
+        archived_at)
+    return delete_tournament(tournament_id)
+
+# Archives every tournament that ended before the given time (now by
+# default), optionally only those managed by manager_id. A tournament that
+# fails to archive is left in the live tables and the rest are still
+# archived.
+# Returns (archived, failed): the IDs of the archived tournaments, and a
+# dictionary from the ID of each tournament that failed to its error
+def archive_finished_tournaments(before: datetime = None,
+        manager_id: int = None):
+    archived_at = datetime.now()
+    if before is None:
+        before = archived_at
+
+    archived = []
+    failed = {}
+    for tournament_id in get_finished_tournament_ids(before, manager_id):
+        try:
+            archive_tournament(tournament_id, archived_at)
+            archived.append(tournament_id)
+        except Exception as err:
+            failed[tournament_id] = err
+
+    return archived, failed
+
+def print_archived_tournament(tournament_id: int):
+    tournament = get_archived_tournament_by_id(tournament_id)
+    print(LONG_LINE_DELIMITER)
+    print(f"Tournament ID: {tournament['tournament_id']}")
+    print(f"Tournament Name: {tournament['name']}")
+    print(f"Date Range: ({tournament['start_date']})-" +
+        f"({tournament['end_date']})")
+    print(f"Location: {tournament['location']}")
+    print(f"Archived: {tournament['archived_at']}")
+    print("Registered Teams:")
+    print(SHORT_LINE_DELIMITER)
+    for team in tournament["registered_teams"]:
+        print(f"Team Name: {team['name']}")
+    print(LONG_LINE_DELIMITER)
+    print_schedule(tournament["games"])
+
+def print_archived_tournaments():
+    print("*** VIEWING ARCHIVED TOURNAMENTS ***")
+    tournaments = get_archived_tournaments()
+    if not tournaments:
+        print("No archived tournaments.")
+
+    for tournament in tournaments:
+        print(f"ID: {tournament['tournament_id']}, Name: " +
+            f"{tournament['name']}, Ended: {tournament['end_date']}")
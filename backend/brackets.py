@@ -0,0 +1,104 @@
+from database.tournament_database import GAME_DURATION, create_bracket
+from datetime import datetime, timedelta
+
+# Single-elimination brackets.
+#
+# Teams are seeded in the order given (first team is seed 1). The bracket has
+# the next power of two slots above the number of teams; seeds without an
+# opponent get a bye straight into round 2. Each game stores the game its
+# winner advances to, and create_game_score fills that slot when a result is
+# recorded.
+
+# Order of seeds down the bracket for a bracket with size slots, so that the
+# top seeds can only meet in the latest rounds. For example, for size 8:
+# [1, 8, 4, 5, 2, 7, 3, 6]
+def seed_positions(size: int):
+    positions = [1]
+    while len(positions) < size:
+        bracket_size = len(positions) * 2
+        expanded = []
+        for seed in positions:
+            expanded.append(seed)
+            expanded.append(bracket_size + 1 - seed)
+        positions = expanded
+    return positions
+
+# Builds the games of a bracket without writing them
+# Round r is played from start + (r - 1) * round_interval, with the games of a
+# round following each other every GAME_DURATION at location.
+# Return format is the list of games expected by create_bracket.
+def build_bracket_games(seeded_team_ids: list, start: datetime,
+        location: str, round_interval: timedelta = timedelta(days=1)):
+    assert(len(seeded_team_ids) >= 2), "a bracket needs at least two teams"
+
+    size = 1
+    while size < len(seeded_team_ids):
+        size *= 2
+    round_count = size.bit_length() - 1
+
+    # Games are created from the final backwards, so that every game's next
+    # game already has an index. game_indexes maps (round, position) to it.
+    games = []
+    game_indexes = {}
+    for round_number in range(round_count, 0, -1):
+        game_count = size // (2 ** round_number)
+        for position in range(game_count):
+            next_index = None
+            next_slot = None
+            if round_number < round_count:
+                next_index = game_indexes[(round_number + 1, position // 2)]
+                next_slot = "home" if position % 2 == 0 else "away"
+            game_indexes[(round_number, position)] = len(games)
+            games.append({
+                "time": (start + (round_number - 1) * round_interval +
+                    position * GAME_DURATION),
+                "location": location,
+                "home_team": None,
+                "away_team": None,
+                "round": round_number,
+                "position": position,
+                "next_index": next_index,
+                "next_slot": next_slot
+            })
+
+    # Fill round 1 from the seeding. Byes leave out the round 1 game and put
+    # the team directly into its round 2 slot.
+    seeds = seed_positions(size)
+    byes = []
+    for position in range(size // 2):
+        home_seed = seeds[2 * position]
+        away_seed = seeds[2 * position + 1]
+        game = games[game_indexes[(1, position)]]
+        if away_seed > len(seeded_team_ids):
+            next_game = games[game["next_index"]]
+            next_game[f"{game['next_slot']}_team"] = (
+                seeded_team_ids[home_seed - 1])
+            byes.append(game_indexes[(1, position)])
+        else:
+            game["home_team"] = seeded_team_ids[home_seed - 1]
+            game["away_team"] = seeded_team_ids[away_seed - 1]
+
+    # Removing the bye games shifts the indexes of the games after them
+    bye_indexes = set(byes)
+    new_indexes = {}
+    for index in range(len(games)):
+        if index not in bye_indexes:
+            new_indexes[index] = len(new_indexes)
+    bracket_games = []
+    for index, game in enumerate(games):
+        if index in bye_indexes:
+            continue
+        if game["next_index"] is not None:
+            game["next_index"] = new_indexes[game["next_index"]]
+        bracket_games.append(game)
+
+    return bracket_games
+
+# Generates a seeded single-elimination bracket for the tournament and
+# creates its games. Returns the IDs of the created games.
+def generate_bracket(tournament_id: int, seeded_team_ids: list,
+        start: datetime, location: str,
+        round_interval: timedelta = timedelta(days=1)):
+    games = build_bracket_games(seeded_team_ids, start, location,
+        round_interval)
+    return create_bracket(tournament_id, games)
@@ -0,0 +1,137 @@
+from database.storage import configure_storage_from_env
+from database.tournament_database import (
+    check_if_database_set_up,
+    stream_tournaments_json,
+    stream_teams_json,
+    stream_rosters_json,
+    stream_games_json,
+    stream_scores_json)
+from backend.users import select_league
+import argparse
+import sys
+
+# Machine-readable output of the league, for scripts, as JSON or NDJSON
+# (one JSON object per line). The records are encoded by the database as
+# they are read (see the streaming reads in tournament_database.py) and
+# written out one at a time, so exporting a whole league uses about the same
+# memory as exporting one team.
+#
+# For example, every game of tournament 1 as NDJSON:
+#
+# python3 -m backend.export games --tournament 1
+#
+# or the whole league as one JSON object:
+#
+# python3 -m backend.export league --format json
+#
+# The export only reads: it does not set up the databases, so it never
+# changes them, and it fails if the league has not been set up by the app.
+
+# Record kinds, in the order they are exported for the whole league
+VIEWS = {
+    "tournaments": stream_tournaments_json,
+    "teams": stream_teams_json,
+    "rosters": stream_rosters_json,
+    "games": stream_games_json,
+    "scores": stream_scores_json
+}
+
+# The filter each kind of record takes, tournament or team
+VIEW_FILTERS = {
+    "tournaments": "tournament",
+    "teams": "team",
+    "rosters": "team",
+    "games": "tournament",
+    "scores": "tournament"
+}
+
+FORMATS = ["ndjson", "json"]
+
+# Writes records (JSON object strings) to out, one per line
+def write_ndjson(records, out):
+    for record in records:
+        out.write(record)
+        out.write("\n")
+
+# Writes records (JSON object strings) to out as one JSON array
+def write_json_array(records, out):
+    out.write("[")
+    separator = ""
+    for record in records:
+        out.write(separator)
+        out.write(record)
+        separator = ","
+    out.write("]")
+
+# Yields the records of one kind, limited to one tournament or team if given.
+# The filter that does not apply to the kind (see VIEW_FILTERS) is ignored.
+def get_records(view: str, tournament_id: int = None, team_id: int = None):
+    assert(view in VIEWS), "view must be one of " + ", ".join(VIEWS)
+    if VIEW_FILTERS[view] == "tournament":
+        return VIEWS[view](tournament_id)
+    return VIEWS[view](team_id)
+
+# Writes the records of one kind to out, in the given format
+def export_view(view: str, out, output_format: str = "ndjson",
+        tournament_id: int = None, team_id: int = None):
+    assert(output_format in FORMATS), ("output_format must be one of " +
+        ", ".join(FORMATS))
+    records = get_records(view, tournament_id, team_id)
+    if output_format == "json":
+        write_json_array(records, out)
+        out.write("\n")
+    else:
+        write_ndjson(records, out)
+
+# Writes every kind of record to out. As NDJSON, each line is an object with
+# the kind of record (type, such as "team") and the record (data). As JSON,
+# it is one object with a list of records for each kind.
+def export_league(out, output_format: str = "ndjson"):
+    assert(output_format in FORMATS), ("output_format must be one of " +
+        ", ".join(FORMATS))
+    if output_format == "json":
+        out.write("{")
+        separator = ""
+        for view, stream in VIEWS.items():
+            out.write(separator + '"' + view + '":')
+            write_json_array(stream(), out)
+            separator = ","
+        out.write("}\n")
+        return
+
+    for view, stream in VIEWS.items():
+        prefix = '{"type":"' + view[:-1] + '","data":'
+        write_ndjson((prefix + record + "}" for record in stream()), out)
+
+def main(args: list = None):
+    parser = argparse.ArgumentParser(prog="python3 -m backend.export",
+        description="Writes league data as JSON or NDJSON to stdout.")
+    parser.add_argument("view", choices=list(VIEWS) + ["league"])
+    parser.add_argument("--format", choices=FORMATS, default="ndjson",
+        dest="output_format")
+    parser.add_argument("--tournament", type=int, dest="tournament_id",
+        help="only records of this tournament")
+    parser.add_argument("--team", type=int, dest="team_id",
+        help="only records of this team")
+    parser.add_argument("--league", default="",
+        help="league ID, the default league if not given")
+    options = parser.parse_args(args)
+
+    configure_storage_from_env()
+    try:
+        select_league(options.league)
+    except AssertionError as err:
+        parser.error(str(err))
+    if not check_if_database_set_up():
+        parser.error("the league's databases have not been set up, " +
+            "start the app once first")
+
+    if options.view == "league":
+        export_league(sys.stdout, options.output_format)
+    else:
+        export_view(options.view, sys.stdout, options.output_format,
+            options.tournament_id, options.team_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+from database.tournament_database import (
+    get_latest_change_seq,
+    get_score_changes)
+from backend.tournaments import SHORT_LINE_DELIMITER
+from database.storage import get_tenant, set_tenant
+import asyncio
+import json
+import os
+import threading
+import traceback
+
+# Live score feed for fans. A LiveScoreServer runs in one session of a league
+# and follows the tournaments database's change log (see
+# database/change_log.py) for new scores, so the scores entered by every
+# process of the league are served, not only its own. Local clients connect
+# to its Unix socket and are sent each changed game as one line of JSON
+# (NDJSON), in the format of the SCORE_TOPIC events (see events.py). Any
+# number of watchers share the server's one indexed read of the log every
+# interval seconds, and none of them reads the database. Each event is
+# encoded once and written to every client; a client that stops reading is
+# disconnected once max_buffer bytes are waiting for it.
+#
+# For example, in the serving process:
+#
+# server = LiveScoreServer("scores.sock")
+# await server.start()
+#
+# and in a fan's terminal, watch_live_scores("scores.sock"). new_menu.py does
+# this when the LIVE_SCORES_SOCKET environment variable is set: the first
+# tournament manager session of a league serves the league's feed, at the
+# path from get_live_scores_path, and fans of that league can watch it.
+
+# Constants
+# Bytes that may wait in a client's socket buffer before it is dropped
+MAX_CLIENT_BUFFER = 64 * 1024
+# Seconds between reads of the change log
+POLL_INTERVAL = 0.5
+
+class LiveScoreServer:
+    def __init__(self, path: str, max_buffer: int = MAX_CLIENT_BUFFER,
+            interval: float = POLL_INTERVAL):
+        self.path = path
+        self.max_buffer = max_buffer
+        self.interval = interval
+        self.writers = set()
+        self.handlers = set()
+        self.server = None
+        self.broadcast_task = None
+        # Sequence number of the last change log entry read
+        self.seq = 0
+
+    # Starts listening on the socket and forwarding the scores entered from
+    # now on. Must be called on the event loop that will serve the clients,
+    # in the tenant (league) whose scores are served.
+    async def start(self):
+        await remove_stale_socket(self.path)
+        self.seq = await asyncio.to_thread(get_latest_change_seq)
+        self.server = await asyncio.start_unix_server(self.handle_client,
+            self.path)
+        self.broadcast_task = asyncio.create_task(self.broadcast())
+
+    async def handle_client(self, reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter):
+        self.writers.add(writer)
+        self.handlers.add(asyncio.current_task())
+        try:
+            # Clients only listen, so this returns when they disconnect
+            await reader.read()
+        finally:
+            self.writers.discard(writer)
+            self.handlers.discard(asyncio.current_task())
+            writer.close()
+
+    # Reads the scores entered since the last read, every interval seconds.
+    # The reads run in a worker thread, so a busy database does not hold up
+    # the clients. A failed read is retried on the next tick.
+    async def broadcast(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                events = await asyncio.to_thread(self.read_scores)
+            except Exception:
+                traceback.print_exc()
+                continue
+            for event in events:
+                self.send(event)
+
+    def read_scores(self):
+        latest_seq = get_latest_change_seq()
+        # A log behind the server was cleared, follow it from its new end
+        if latest_seq <= self.seq:
+            self.seq = latest_seq
+            return []
+        events = get_score_changes(self.seq, latest_seq)
+        self.seq = latest_seq
+        return events
+
+    def send(self, event: dict):
+        line = (json.dumps(event) + "\n").encode()
+        for writer in list(self.writers):
+            if writer.transport.get_write_buffer_size() > self.max_buffer:
+                self.writers.discard(writer)
+                writer.close()
+            else:
+                writer.write(line)
+
+    async def close(self):
+        self.broadcast_task.cancel()
+        self.server.close()
+        for writer in list(self.writers):
+            writer.close()
+        # Closing a client ends its handler's read, wait for them to finish
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        await self.server.wait_closed()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+# Removes the socket file left behind by a server that did not shut down
+# cleanly. A socket that still accepts connections is left alone, so that
+# starting a second server on it fails instead of taking over its clients.
+async def remove_stale_socket(path: str):
+    if not os.path.exists(path):
+        return
+    try:
+        reader, writer = await asyncio.open_unix_connection(path)
+    except ConnectionRefusedError:
+        os.remove(path)
+        return
+    writer.close()
+
+# Connects to a LiveScoreServer and yields each score event it sends, as a
+# dictionary like those published on SCORE_TOPIC, until the server closes
+async def read_live_scores(path: str):
+    reader, writer = await asyncio.open_unix_connection(path)
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            yield json.loads(line)
+    finally:
+        writer.close()
+
+def print_live_score(event: dict):
+    print(SHORT_LINE_DELIMITER)
+    print(f"Game ID: {event['game_id']}")
+    print(f"{event['home_team_name']} {event['homescore']} - " +
+        f"{event['awayscore']} {event['away_team_name']}")
+
+# Prints scores from a LiveScoreServer as they come in, until the server
+# closes or the user presses Ctrl-C
+def watch_live_scores(path: str):
+    async def watch():
+        async for event in read_live_scores(path):
+            print_live_score(event)
+
+    print("*** WATCHING LIVE SCORES (Ctrl-C to stop) ***")
+    try:
+        asyncio.run(watch())
+    except KeyboardInterrupt:
+        pass
+
+# Returns the socket path of the current league's live score feed, None if
+# the feed is not enabled. The LIVE_SCORES_SOCKET environment variable names
+# the default league's socket, and each other league's socket has the same
+# name in tenants/<league ID>/ next to it, so every league has its own feed.
+def get_live_scores_path():
+    path = os.environ.get("LIVE_SCORES_SOCKET")
+    tenant_id = get_tenant()
+    if not path or tenant_id is None:
+        return path or None
+    return os.path.join(os.path.dirname(path), "tenants", tenant_id,
+        os.path.basename(path))
+
+# Serves the live score feed from a background thread with its own event
+# loop, for the synchronous menu apps. Scores of the current tenant are
+# served. Returns once the server is listening, raising if it could not start
+# (an OSError if another session already serves that path).
+def start_live_score_server_thread(path: str):
+    tenant_id = get_tenant()
+    started = threading.Event()
+    errors = []
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def serve():
+        set_tenant(tenant_id)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(LiveScoreServer(path).start())
+        except Exception as err:
+            errors.append(err)
+            started.set()
+            loop.close()
+            return
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve, daemon=True).start()
+    started.wait()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,148 @@
+from database.tournament_database import get_scored_game_columns
+import numpy as np
+
+# Elo ratings for teams, computed over the full history of scored games.
+#
+# Games are loaded in one read into NumPy arrays. Elo is sequential per team,
+# but games in which no team has played yet in the current pass can be
+# updated together, so the history is split into batches where every team
+# plays at most once and each batch is updated with vectorized operations.
+# Every team still sees its games in chronological order, so the result is
+# the same as rating one game at a time.
+
+K_FACTOR = 32
+INITIAL_RATING = 1500.0
+# Rating points added to the home team when computing expected results
+HOME_ADVANTAGE = 0.0
+
+# Assigns each game a batch number so that no team plays twice in a batch
+# and each team's games are in increasing batches, in game order
+def assign_batches(home: np.ndarray, away: np.ndarray, team_count: int):
+    next_batch = [0] * team_count
+    batches = [0] * len(home)
+    for game, (home_index, away_index) in enumerate(
+            zip(home.tolist(), away.tolist())):
+        batch = max(next_batch[home_index], next_batch[away_index])
+        batches[game] = batch
+        next_batch[home_index] = batch + 1
+        next_batch[away_index] = batch + 1
+    return np.array(batches, dtype=np.int64)
+
+# Updates ratings in place with the games, given as arrays of home and away
+# team indexes into ratings and outcomes (1 home win, 0.5 draw, 0 away win)
+def rate_games(ratings: np.ndarray, home: np.ndarray, away: np.ndarray,
+        outcomes: np.ndarray, k_factor: float = K_FACTOR,
+        home_advantage: float = HOME_ADVANTAGE):
+    if len(home) == 0:
+        return
+
+    batches = assign_batches(home, away, len(ratings))
+    order = np.argsort(batches, kind="stable")
+    home = home[order]
+    away = away[order]
+    outcomes = outcomes[order]
+    bounds = np.flatnonzero(np.diff(batches[order])) + 1
+    starts = [0] + bounds.tolist()
+    ends = bounds.tolist() + [len(order)]
+
+    for start, end in zip(starts, ends):
+        batch_home = home[start:end]
+        batch_away = away[start:end]
+        difference = (ratings[batch_away] - ratings[batch_home] -
+            home_advantage)
+        expected = 1.0 / (1.0 + np.power(10.0, difference / 400.0))
+        change = k_factor * (outcomes[start:end] - expected)
+        ratings[batch_home] += change
+        ratings[batch_away] -= change
+
+# Outcome of each game for the home team: 1 win, 0.5 draw, 0 loss
+def get_outcomes(home_team_scores: np.ndarray, away_team_scores: np.ndarray):
+    return (np.sign(home_team_scores - away_team_scores) + 1) / 2.0
+
+# Keeps ratings for every team that has played a scored game. Call update()
+# after create_game_score to apply new results incrementally; a corrected
+# score of an already rated game, or a score for a game played before the
+# latest rated one, triggers a full recompute, so the ratings are always
+# the same as rating the history in game time order.
+class RatingEngine:
+    def __init__(self, k_factor: float = K_FACTOR,
+            initial_rating: float = INITIAL_RATING,
+            home_advantage: float = HOME_ADVANTAGE):
+        self.k_factor = k_factor
+        self.initial_rating = initial_rating
+        self.home_advantage = home_advantage
+        self.recompute()
+
+    # Rates the whole game history from scratch
+    def recompute(self):
+        self.team_ids = np.array([], dtype=np.int64)
+        self.ratings = np.array([], dtype=np.float64)
+        self.rated_game_ids = set()
+        self.last_score_id = 0
+        # Time and ID of the latest rated game, in the order games are rated
+        self.last_game = None
+        self.apply(get_scored_game_columns())
+
+    # Rates the games scored since the last update
+    def update(self):
+        columns = get_scored_game_columns(self.last_score_id)
+        if not columns["game_id"]:
+            return
+        first_game = (columns["time"][0], columns["game_id"][0])
+        if (not self.rated_game_ids.isdisjoint(columns["game_id"]) or
+                (self.last_game is not None and first_game < self.last_game)):
+            self.recompute()
+        else:
+            self.apply(columns)
+
+    def apply(self, columns: dict):
+        if not columns["game_id"]:
+            return
+
+        home_teams = np.array(columns["home_team"], dtype=np.int64)
+        away_teams = np.array(columns["away_team"], dtype=np.int64)
+        home, away = self.index_teams(home_teams, away_teams)
+        outcomes = get_outcomes(
+            np.array(columns["home_team_score"], dtype=np.int64),
+            np.array(columns["away_team_score"], dtype=np.int64))
+
+        rate_games(self.ratings, home, away, outcomes, self.k_factor,
+            self.home_advantage)
+
+        self.rated_game_ids.update(columns["game_id"])
+        self.last_score_id = max(self.last_score_id,
+            max(columns["score_id"]))
+        self.last_game = (columns["time"][-1], columns["game_id"][-1])
+
+    # Maps team IDs to indexes into ratings, adding unseen teams at the
+    # initial rating. team_ids is kept sorted for binary search.
+    def index_teams(self, home_teams: np.ndarray, away_teams: np.ndarray):
+        new_team_ids = np.setdiff1d(
+            np.concatenate([home_teams, away_teams]), self.team_ids)
+        if len(new_team_ids):
+            team_ids = np.concatenate([self.team_ids, new_team_ids])
+            ratings = np.concatenate([self.ratings,
+                np.full(len(new_team_ids), self.initial_rating)])
+            order = np.argsort(team_ids)
+            self.team_ids = team_ids[order]
+            self.ratings = ratings[order]
+
+        return (np.searchsorted(self.team_ids, home_teams),
+            np.searchsorted(self.team_ids, away_teams))
+
+    # Returns a dictionary where key is the team ID and value is its rating
+    def get_ratings(self):
+        return dict(zip(self.team_ids.tolist(), self.ratings.tolist()))
+
+    # Returns the rating of the team, or the initial rating if it has not
+    # played a scored game
+    def get_rating(self, team_id: int):
+        index = np.searchsorted(self.team_ids, team_id)
+        if index < len(self.team_ids) and self.team_ids[index] == team_id:
+            return float(self.ratings[index])
+        return self.initial_rating
+
+    # Orders the teams from highest to lowest rating, for example to seed a
+    # bracket
+    def rank_teams(self, team_ids: list):
+        return sorted(team_ids, key=lambda team_id: -self.get_rating(team_id))
@@ -0,0 +1,251 @@
+from database import change_log
+from database import tournament_database, user_database
+from database.storage import get_engine, get_tenant, in_transaction
+import threading
+
+# In-memory read model for the read-only views (all teams, all tournaments
+# and tournament status). Opening one of those views used to run a query per
+# tournament, team, registration and player. The read model instead keeps a
+# copy of the rows those views need, loaded once with one bulk query per
+# table, and keeps it current by applying the change log (see
+# database/change_log.py): every write, whichever path or process made it,
+# appends its rows there in the same transaction. Before answering, the model
+# reads the latest sequence number of each database and applies only the
+# changes it has not seen, so a view costs one indexed lookup per database
+# when nothing changed, and the rest is served from memory.
+#
+# The views return the same dictionaries as get_all_teams,
+# get_all_tournaments and get_tournament_schedule in tournament_database.py.
+# Inside a transaction they are read from the database instead, since the
+# model must only ever apply committed changes.
+
+# Constants
+# Tables copied into the model, by database
+MODEL_TABLES = {
+    tournament_database.DB_NAME: ["Tournaments", "Teams", "Players", "Games",
+        "Scores", "TournamentRegistrations", "PlayersOnTeams",
+        "GamesInTournaments"],
+    user_database.DB_NAME: ["Users"]
+}
+# Relational tables, and the column their rows are grouped by for lookups
+GROUP_COLUMNS = {
+    "TournamentRegistrations": "tournament_id",
+    "PlayersOnTeams": "team_id",
+    "GamesInTournaments": "tournament_id"
+}
+# Tables with columns left out of the change log. Their changed rows are
+# read from the database, since the logged data is not the whole row.
+PARTIAL_TABLES = set(user_database.CHANGE_LOG_EXCLUDED_COLUMNS)
+# Changes read from the log per query while catching up
+CHANGE_BATCH = 1000
+
+class ReadModel:
+    def __init__(self):
+        # Engine the rows were read from
+        self.engine = get_engine()
+        # Rows of each table, keyed by rowid
+        self.tables = {}
+        # Rowids of each relational table's rows, by the value of their
+        # GROUP_COLUMNS column, in insertion order
+        self.groups = {}
+        # Sequence number of the last change applied, by database
+        self.seqs = {}
+        self.lock = threading.Lock()
+        for db_name, tables in MODEL_TABLES.items():
+            self.load(db_name, tables)
+
+    # Copies the tables of a database with one query each, then applies
+    # anything written while they were being read. Inside a transaction the
+    # reads would see writes that may still roll back, so that is refused.
+    def load(self, db_name: str, tables: list):
+        assert(not in_unit_of_work()), ("the read model cannot be read " +
+            "from the database inside a transaction")
+        self.seqs[db_name] = change_log.get_latest_change_seq(db_name)
+        for table in tables:
+            self.tables[table] = {}
+            self.groups[table] = {}
+            for rowid, row in change_log.get_table_rows(db_name,
+                    table).items():
+                self.put(table, rowid, row)
+        self.apply_changes(db_name)
+
+    def put(self, table: str, rowid: int, row: dict):
+        self.remove(table, rowid)
+        self.tables[table][rowid] = row
+        if table in GROUP_COLUMNS:
+            group = self.groups[table].setdefault(row[GROUP_COLUMNS[table]],
+                {})
+            group[rowid] = True
+
+    def remove(self, table: str, rowid: int):
+        row = self.tables[table].pop(rowid, None)
+        if row is not None and table in GROUP_COLUMNS:
+            group = self.groups[table].get(row[GROUP_COLUMNS[table]], {})
+            group.pop(rowid, None)
+
+    def apply_changes(self, db_name: str):
+        while True:
+            changes = change_log.get_changes_since(db_name,
+                self.seqs[db_name], CHANGE_BATCH)
+            for change in changes:
+                table = change["table"]
+                if table not in self.tables:
+                    continue
+                row = change["data"]
+                if change["operation"] != "delete" and table in PARTIAL_TABLES:
+                    # May already be newer than the change, or gone, and
+                    # the later changes in the log bring the model up to it
+                    row = change_log.get_table_row(db_name, table,
+                        change["row_id"])
+                if change["operation"] == "delete" or row is None:
+                    self.remove(table, change["row_id"])
+                else:
+                    self.put(table, change["row_id"], row)
+            if changes:
+                self.seqs[db_name] = changes[-1]["seq"]
+            if len(changes) < CHANGE_BATCH:
+                return
+
+    # Brings the model up to date with the databases. A change log that is
+    # behind the model was cleared (clear_tournament_database), so the
+    # database is copied again.
+    def refresh(self):
+        assert(not in_unit_of_work()), ("the read model cannot be read " +
+            "from the database inside a transaction")
+        for db_name, tables in MODEL_TABLES.items():
+            latest_seq = change_log.get_latest_change_seq(db_name)
+            if latest_seq < self.seqs[db_name]:
+                self.load(db_name, tables)
+            elif latest_seq > self.seqs[db_name]:
+                self.apply_changes(db_name)
+
+    def get_group(self, table: str, value):
+        rows = self.tables[table]
+        return [rows[rowid] for rowid in self.groups[table].get(value, {})]
+
+    def get_user(self, user_id: int):
+        user = self.tables["Users"][user_id]
+        return {
+            "user_id": user["id"],
+            "name": user["name"],
+            "username": user["username"],
+            "password": user["password"],
+            "user_type": user["user_type"]
+        }
+
+    def get_team(self, team_id: int):
+        team = self.tables["Teams"][team_id]
+        players = self.tables["Players"]
+        roster = []
+        for player_on_team in self.get_group("PlayersOnTeams", team_id):
+            player = players[player_on_team["player_id"]]
+            roster.append({
+                "player_id": player["id"],
+                "name": player["name"],
+                "gender": player["gender"],
+                "age": player["age"]
+            })
+
+        return {
+            "team_id": team["id"],
+            "name": team["name"],
+            "team_gender": team["team_gender"],
+            "team_age_min": team["team_age_min"],
+            "team_age_max": team["team_age_max"],
+            "team_manager": self.get_user(team["team_manager"]),
+            "roster": roster
+        }
+
+    def get_tournament(self, tournament_id: int):
+        tournament = self.tables["Tournaments"][tournament_id]
+        teams = [self.get_team(registration["team_id"]) for registration
+            in self.get_group("TournamentRegistrations", tournament_id)]
+
+        return {
+            "tournament_id": tournament["id"],
+            "name": tournament["name"],
+            "eligible_gender": tournament["eligible_gender"],
+            "eligible_age_min": tournament["eligible_age_min"],
+            "eligible_age_max": tournament["eligible_age_max"],
+            "start_date": tournament["start_date"],
+            "end_date": tournament["end_date"],
+            "is_reg_open": tournament["is_reg_open"],
+            "registered_teams": teams,
+            "location": tournament["location"]
+        }
+
+    def get_schedule(self, tournament_id: int):
+        teams = self.tables["Teams"]
+        games = self.tables["Games"]
+        scores = self.tables["Scores"]
+        schedule = []
+        for game_in_tournament in self.get_group("GamesInTournaments",
+                tournament_id):
+            game = games[game_in_tournament["game_id"]]
+            home_team = teams.get(game["home_team"])
+            away_team = teams.get(game["away_team"])
+            score = scores.get(game["current_score"])
+            schedule.append({
+                "game_id": game["id"],
+                "time": game["time"],
+                "location": game["location"],
+                "home_team": game["home_team"],
+                "home_team_name": home_team and home_team["name"],
+                "away_team": game["away_team"],
+                "away_team_name": away_team and away_team["name"],
+                "homescore": score and score["home_team_score"],
+                "awayscore": score and score["away_team_score"]
+            })
+
+        schedule.sort(key=lambda game: (game["time"], game["game_id"]))
+        return schedule
+
+# Read models built so far, keyed by tenant ID
+_read_models = {}
+_read_models_lock = threading.Lock()
+
+# Returns the read model of the current tenant, building it with bulk
+# queries the first time. The app entry points call this at startup. A model
+# read from another storage engine (after configure_storage) is rebuilt.
+def get_read_model():
+    with _read_models_lock:
+        model = _read_models.get(get_tenant())
+        if model is None or model.engine is not get_engine():
+            model = ReadModel()
+            _read_models[get_tenant()] = model
+    return model
+
+# Returns True while the current thread has uncommitted writes in view
+def in_unit_of_work():
+    return any(in_transaction(db_name) for db_name in MODEL_TABLES)
+
+# Gets all teams, in the format of get_all_teams in tournament_database.py
+def get_all_teams():
+    if in_unit_of_work():
+        return tournament_database.get_all_teams()
+    model = get_read_model()
+    with model.lock:
+        model.refresh()
+        return {team_id: model.get_team(team_id)
+            for team_id in model.tables["Teams"]}
+
+# Gets all tournaments, in the format of get_all_tournaments in
+# tournament_database.py
+def get_all_tournaments():
+    if in_unit_of_work():
+        return tournament_database.get_all_tournaments()
+    model = get_read_model()
+    with model.lock:
+        model.refresh()
+        return {tournament_id: model.get_tournament(tournament_id)
+            for tournament_id in model.tables["Tournaments"]}
+
+# Gets the schedule and results of a tournament, in the format of
+# get_tournament_schedule in tournament_database.py
+def get_tournament_schedule(tournament_id: int):
+    if in_unit_of_work():
+        return tournament_database.get_tournament_schedule(tournament_id)
+    model = get_read_model()
+    with model.lock:
+        model.refresh()
+        return model.get_schedule(tournament_id)
@@ -0,0 +1,55 @@
+from database import change_log, tournament_database, user_database
+from database.storage import get_engine, get_tenant, in_transaction
+import contextlib
+import io
+import threading
+
+# Cache of rendered view output. Rendering a listing such as all teams
+# means reading every team and formatting it, even when nothing changed
+# since the last time it was shown. Each cached output is stored
+# with the data version it was rendered at, and is reused for as long as the
+# version is unchanged, so a repeated view costs one version check.
+#
+# The data version is the latest change log sequence number of the
+# tournaments and users databases (see database/change_log.py). Every write
+# appends to the change log in its own transaction, so the version moves on
+# with every committed write, from any process, and never moves back.
+
+# Rendered outputs, keyed by tenant ID and output name, with the engine and
+# data version they were rendered at
+_outputs = {}
+_outputs_lock = threading.Lock()
+
+def get_data_version():
+    return (change_log.get_latest_change_seq(tournament_database.DB_NAME),
+        change_log.get_latest_change_seq(user_database.DB_NAME))
+
+# Returns the output called name, calling render() to make it only if the
+# data changed since it was last rendered. Output rendered inside a
+# transaction may show writes that are later rolled back, so it is not kept.
+def get_cached_output(name: str, render):
+    if (in_transaction(tournament_database.DB_NAME) or
+            in_transaction(user_database.DB_NAME)):
+        return render()
+
+    key = (get_tenant(), name)
+    # Read before rendering: a write made while rendering leaves the output
+    # under the older version, so it is rendered again on the next call
+    version = (get_engine(), get_data_version())
+
+    with _outputs_lock:
+        cached = _outputs.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    output = render()
+    with _outputs_lock:
+        _outputs[key] = (version, output)
+    return output
+
+# Returns what print_function(*args) prints, as a string
+def capture_output(print_function, *args):
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        print_function(*args)
+    return output.getvalue()
@@ -0,0 +1,155 @@
+from database.tournament_database import (
+    GAME_DURATION,
+    create_games,
+    get_games_between,
+    get_tournament_by_id)
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+
+# Places a tournament's pairings into time slots and locations.
+#
+# Slots start every GAME_DURATION from the tournament's start_date, and a game
+# must end by the tournament's end_date. A game is placed if:
+# - both teams have at least rest_time between it and their other games
+# - neither team has a blackout window overlapping it
+# - its location has fewer than capacity games overlapping it
+# Games already in the database (in any tournament) count as bookings.
+#
+# The search is greedy: pairings are placed in the order given, each in the
+# earliest slot and first location that satisfies every constraint. Bookings
+# are kept in sorted lists per team and per location, so each constraint
+# check is a binary search, and slots where every location is full are
+# skipped, which keeps thousands of games to a few seconds.
+
+# Generates round-robin pairings for the teams with the circle method
+# Returns a list of rounds, each a list of (home_team, away_team) tuples
+def round_robin_pairings(team_ids: list):
+    teams = list(team_ids)
+    if len(teams) % 2 == 1:
+        teams.append(None)
+
+    rounds = []
+    for round_number in range(len(teams) - 1):
+        pairings = []
+        for index in range(len(teams) // 2):
+            home_team = teams[index]
+            away_team = teams[len(teams) - 1 - index]
+            if home_team is None or away_team is None:
+                continue
+            # Alternate home and away between rounds
+            if round_number % 2 == 1:
+                home_team, away_team = away_team, home_team
+            pairings.append((home_team, away_team))
+        rounds.append(pairings)
+        # Keep the first team fixed and rotate the rest
+        teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+
+    return rounds
+
+# Number of bookings in a sorted list of times within (time - gap, time + gap)
+def count_overlapping(booked_times: list, time: datetime, gap: timedelta):
+    return (bisect_left(booked_times, time + gap) -
+        bisect_right(booked_times, time - gap))
+
+# Whether a game at time overlaps any (start, end) blackout window
+def in_blackout(windows: list, time: datetime):
+    for start, end in windows:
+        if time < end and time + GAME_DURATION > start:
+            return True
+    return False
+
+# Assigns a time and location to every pairing it can, without writing.
+# pairings: list of (home_team, away_team) tuples
+# locations: list of location names
+# rest_time: minimum time between the end of a team's game and its next one
+# blackouts: dictionary of team ID to a list of (start, end) datetimes
+# capacity: dictionary of location to games it can host at once, default 1
+# Returns (games, unplaced), where games is a list of dictionaries with time,
+# location, home_team and away_team, and unplaced is a list of the pairings
+# that could not be placed.
+def assign_slots(pairings: list, start: datetime, end: datetime,
+        locations: list, rest_time: timedelta = timedelta(0),
+        blackouts: dict = None, capacity: dict = None):
+    blackouts = blackouts or {}
+    capacity = capacity or {}
+    team_gap = GAME_DURATION + rest_time
+
+    slots = []
+    slot = start
+    while slot + GAME_DURATION <= end:
+        slots.append(slot)
+        slot += GAME_DURATION
+
+    # Sorted booking start times per team and per location
+    team_bookings = {}
+    location_bookings = {location: [] for location in locations}
+    for game in get_games_between(start - team_gap, end + team_gap):
+        for team_id in [game["home_team"], game["away_team"]]:
+            if team_id is not None:
+                insort(team_bookings.setdefault(team_id, []), game["time"])
+        if game["location"] in location_bookings:
+            insort(location_bookings[game["location"]], game["time"])
+
+    def location_has_room(location, time):
+        booked = count_overlapping(location_bookings[location], time,
+            GAME_DURATION)
+        return booked < capacity.get(location, 1)
+
+    # Slots before this index have no room at any location
+    first_open_slot = 0
+
+    games = []
+    unplaced = []
+    for home_team, away_team in pairings:
+        home_bookings = team_bookings.setdefault(home_team, [])
+        away_bookings = team_bookings.setdefault(away_team, [])
+
+        while (first_open_slot < len(slots) and not any(
+                location_has_room(location, slots[first_open_slot])
+                for location in locations)):
+            first_open_slot += 1
+
+        placed = False
+        for time in slots[first_open_slot:]:
+            if (count_overlapping(home_bookings, time, team_gap) or
+                    count_overlapping(away_bookings, time, team_gap)):
+                continue
+            if (in_blackout(blackouts.get(home_team, []), time) or
+                    in_blackout(blackouts.get(away_team, []), time)):
+                continue
+            for location in locations:
+                if location_has_room(location, time):
+                    insort(home_bookings, time)
+                    insort(away_bookings, time)
+                    insort(location_bookings[location], time)
+                    games.append({
+                        "time": time,
+                        "location": location,
+                        "home_team": home_team,
+                        "away_team": away_team
+                    })
+                    placed = True
+                    break
+            if placed:
+                break
+
+        if not placed:
+            unplaced.append((home_team, away_team))
+
+    return games, unplaced
+
+# Schedules the pairings within the tournament's start_date-end_date window
+# and creates the games in one bulk write. Takes the same options as
+# assign_slots. Returns (game_ids, unplaced).
+def schedule_tournament_games(tournament_id: int, pairings: list,
+        locations: list, rest_time: timedelta = timedelta(0),
+        blackouts: dict = None, capacity: dict = None):
+    tournament = get_tournament_by_id(tournament_id)
+    start = datetime.fromisoformat(str(tournament["start_date"]))
+    end = datetime.fromisoformat(str(tournament["end_date"]))
+
+    games, unplaced = assign_slots(pairings, start, end, locations,
+        rest_time, blackouts, capacity)
+    game_ids = create_games(tournament_id, games)
+
+    return game_ids, unplaced
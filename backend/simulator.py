@@ -0,0 +1,133 @@
+from database.tournament_database import get_unplayed_game_columns
+from backend.standings import POINTS_FOR_WIN, POINTS_FOR_DRAW, get_standings
+from backend.ratings import RatingEngine
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import os
+
+# Monte Carlo odds of each team's final position in a tournament.
+#
+# Starting from the current standings, every unplayed game of the tournament
+# (a game with both teams and no score) is simulated many times. Each game is
+# drawn with probability DRAW_PROBABILITY; otherwise the home team wins with
+# its Elo expected score against the away team (see backend/ratings.py).
+# Teams are ranked by simulated points, then by current goal difference, and
+# remaining ties are broken at random.
+#
+# Simulations run in batches of BATCH_SIZE as NumPy arrays with one row per
+# simulation, and the batches are spread over a process pool.
+
+DRAW_PROBABILITY = 0.25
+BATCH_SIZE = 10000
+# Goal differences are clipped to less than half this, so that a point is
+# always worth more than any goal difference when ranking teams
+TIEBREAK_RANGE = 2000
+
+# Runs simulations and counts finishing positions
+# base_points and tiebreak are indexed by team; home and away are team
+# indexes of the unplayed games, home_win and draw their probabilities.
+# Returns a (team, position) array of counts.
+def simulate_positions(simulations: int, base_points: np.ndarray,
+        tiebreak: np.ndarray, home: np.ndarray, away: np.ndarray,
+        home_win: np.ndarray, draw: np.ndarray, seed):
+    generator = np.random.default_rng(seed)
+    team_count = len(base_points)
+    game_count = len(home)
+
+    # Incidence matrices mapping each game's points onto its teams
+    home_incidence = np.zeros((game_count, team_count), dtype=np.float32)
+    home_incidence[np.arange(game_count), home] = 1
+    away_incidence = np.zeros((game_count, team_count), dtype=np.float32)
+    away_incidence[np.arange(game_count), away] = 1
+
+    counts = np.zeros((team_count, team_count), dtype=np.int64)
+    remaining = simulations
+    while remaining > 0:
+        batch = min(remaining, BATCH_SIZE)
+        remaining -= batch
+
+        draws = generator.random((batch, game_count), dtype=np.float32)
+        home_points = np.where(draws < home_win, POINTS_FOR_WIN,
+            np.where(draws < home_win + draw, POINTS_FOR_DRAW, 0))
+        away_points = np.where(draws < home_win, 0,
+            np.where(draws < home_win + draw, POINTS_FOR_DRAW,
+            POINTS_FOR_WIN))
+        points = (base_points + home_points.astype(np.float32) @
+            home_incidence + away_points.astype(np.float32) @ away_incidence)
+
+        # Points decide first, then goal difference, then a random fraction
+        keys = (points.astype(np.float64) * TIEBREAK_RANGE + tiebreak +
+            generator.random((batch, team_count)))
+        order = np.argsort(-keys, axis=1)
+        for position in range(team_count):
+            counts[:, position] += np.bincount(order[:, position],
+                minlength=team_count)
+
+    return counts
+
+# Unpacks the arguments for simulate_positions in a worker process
+def run_worker(arguments: tuple):
+    return simulate_positions(*arguments)
+
+# Simulates the rest of the tournament and returns finishing probabilities
+# Return format is a dictionary where key is the team ID and value is a list
+# of probabilities, the first for finishing first, and so on. Uses workers
+# processes (all cores by default); with 1 worker everything runs in this
+# process. seed makes the results reproducible.
+def simulate_tournament(tournament_id: int, simulations: int = 10000,
+        workers: int = None, seed: int = None,
+        rating_engine: RatingEngine = None):
+    assert(isinstance(simulations, int)), "simulations must be an int"
+    assert(simulations > 0), "simulations must be greater than 0"
+
+    standings = get_standings(tournament_id)
+    unplayed = get_unplayed_game_columns(tournament_id)
+
+    team_ids = np.unique(np.array([row["team_id"] for row in standings] +
+        unplayed["home_team"] + unplayed["away_team"], dtype=np.int64))
+    team_count = len(team_ids)
+    if team_count == 0:
+        return {}
+
+    base_points = np.zeros(team_count, dtype=np.float32)
+    tiebreak = np.zeros(team_count, dtype=np.float64)
+    for row in standings:
+        index = np.searchsorted(team_ids, row["team_id"])
+        base_points[index] = row["points"]
+        # Limited so that it can never outweigh a point
+        tiebreak[index] = np.clip(row["goal_difference"],
+            -TIEBREAK_RANGE // 2 + 1, TIEBREAK_RANGE // 2 - 1)
+
+    home = np.searchsorted(team_ids,
+        np.array(unplayed["home_team"], dtype=np.int64))
+    away = np.searchsorted(team_ids,
+        np.array(unplayed["away_team"], dtype=np.int64))
+
+    if rating_engine is None:
+        rating_engine = RatingEngine()
+    ratings = np.array([rating_engine.get_rating(team_id)
+        for team_id in team_ids.tolist()])
+    expected = 1.0 / (1.0 + np.power(10.0,
+        (ratings[away] - ratings[home] - rating_engine.home_advantage) /
+        400.0))
+    home_win = (expected * (1 - DRAW_PROBABILITY)).astype(np.float32)
+    draw = np.full(len(home), DRAW_PROBABILITY, dtype=np.float32)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, simulations))
+    seeds = np.random.SeedSequence(seed).spawn(workers)
+    shares = [simulations // workers + (1 if worker <
+        simulations % workers else 0) for worker in range(workers)]
+    arguments = [(share, base_points, tiebreak, home, away, home_win, draw,
+        worker_seed) for share, worker_seed in zip(shares, seeds)]
+
+    if workers == 1:
+        counts = run_worker(arguments[0])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            counts = sum(executor.map(run_worker, arguments))
+
+    probabilities = counts / simulations
+    return {team_id: probabilities[index].tolist()
+        for index, team_id in enumerate(team_ids.tolist())}
@@ -0,0 +1,152 @@
+from database.tournament_database import (
+    get_scored_game_columns,
+    get_registered_team_ids)
+import numpy as np
+
+# Tournament standings with tiebreakers.
+#
+# Teams are ordered by the criteria in TIEBREAKERS, in order:
+# "points": total points
+# "head_to_head": points, then goal difference, then goals scored, in the
+#   games between the tied teams only (a mini-league)
+# "goal_difference": total goals scored minus goals conceded
+# "goals_for": total goals scored
+# Teams still tied after every criterion are ordered by team ID, so the order
+# is always deterministic.
+#
+# When head-to-head splits a tied group but leaves smaller groups still tied,
+# head-to-head is applied again to each smaller group using only the games
+# between its teams. Results are first aggregated per pair of teams into
+# matrices, so the mini-league of any group is a sum over a sub-matrix rather
+# than a new pass over the games.
+
+POINTS_FOR_WIN = 3
+POINTS_FOR_DRAW = 1
+TIEBREAKERS = ["points", "head_to_head", "goal_difference", "goals_for"]
+
+# Aggregates results per ordered pair of teams. Entry [i, j] of each matrix
+# is for team i in its games against team j.
+def get_pairwise_results(home: np.ndarray, away: np.ndarray,
+        home_team_scores: np.ndarray, away_team_scores: np.ndarray,
+        team_count: int):
+    shape = (team_count, team_count)
+    goals = np.zeros(shape, dtype=np.int64)
+    np.add.at(goals, (home, away), home_team_scores)
+    np.add.at(goals, (away, home), away_team_scores)
+
+    home_points = np.where(home_team_scores > away_team_scores,
+        POINTS_FOR_WIN, np.where(home_team_scores == away_team_scores,
+        POINTS_FOR_DRAW, 0))
+    away_points = np.where(away_team_scores > home_team_scores,
+        POINTS_FOR_WIN, np.where(home_team_scores == away_team_scores,
+        POINTS_FOR_DRAW, 0))
+    points = np.zeros(shape, dtype=np.int64)
+    np.add.at(points, (home, away), home_points)
+    np.add.at(points, (away, home), away_points)
+
+    return points, goals
+
+# Sort keys of the teams in group for one criterion, larger is better.
+# Returns a 2D array with one row per team in group.
+def get_criterion_keys(criterion: str, group: np.ndarray, points: np.ndarray,
+        goals: np.ndarray):
+    if criterion == "points":
+        return points[group].sum(axis=1)[:, None]
+    if criterion == "goal_difference":
+        goals_for = goals[group].sum(axis=1)
+        goals_against = goals[:, group].sum(axis=0)
+        return (goals_for - goals_against)[:, None]
+    if criterion == "goals_for":
+        return goals[group].sum(axis=1)[:, None]
+    if criterion == "head_to_head":
+        league_points = points[np.ix_(group, group)].sum(axis=1)
+        goals_for = goals[np.ix_(group, group)].sum(axis=1)
+        goals_against = goals[np.ix_(group, group)].sum(axis=0)
+        return np.column_stack([league_points, goals_for - goals_against,
+            goals_for])
+    raise Exception(f"Unknown tiebreaker: {criterion}")
+
+# Orders the team indexes in group, best first, using the criteria
+def order_group(group: np.ndarray, criteria: list, points: np.ndarray,
+        goals: np.ndarray, team_ids: np.ndarray):
+    if len(group) <= 1:
+        return list(group)
+    if not criteria:
+        return list(group[np.argsort(team_ids[group], kind="stable")])
+
+    criterion = criteria[0]
+    keys = get_criterion_keys(criterion, group, points, goals)
+    # Sort by keys descending, lexicographically by column
+    order = np.lexsort(-keys.T[::-1])
+    group = group[order]
+    keys = keys[order]
+
+    # Split into runs of teams with equal keys
+    changes = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+    subgroups = np.split(group, changes)
+
+    ordered = []
+    for subgroup in subgroups:
+        if criterion == "head_to_head" and 1 < len(subgroup) < len(group):
+            # A smaller tied group plays its own mini-league
+            ordered += order_group(subgroup, criteria, points, goals,
+                team_ids)
+        else:
+            ordered += order_group(subgroup, criteria[1:], points, goals,
+                team_ids)
+    return ordered
+
+# Computes the standings of a tournament from its scored games. Includes
+# every registered team and every team that played in the tournament.
+# Return format is a list of dictionaries ordered from first place, each with
+# position, team_id, played, won, drawn, lost, goals_for, goals_against,
+# goal_difference and points
+def get_standings(tournament_id: int, tiebreakers: list = TIEBREAKERS):
+    columns = get_scored_game_columns(tournament_id=tournament_id)
+    home_teams = np.array(columns["home_team"], dtype=np.int64)
+    away_teams = np.array(columns["away_team"], dtype=np.int64)
+    home_team_scores = np.array(columns["home_team_score"], dtype=np.int64)
+    away_team_scores = np.array(columns["away_team_score"], dtype=np.int64)
+
+    team_ids = np.unique(np.concatenate([home_teams, away_teams,
+        np.array(get_registered_team_ids(tournament_id), dtype=np.int64)]))
+    home = np.searchsorted(team_ids, home_teams)
+    away = np.searchsorted(team_ids, away_teams)
+
+    points, goals = get_pairwise_results(home, away, home_team_scores,
+        away_team_scores, len(team_ids))
+
+    team_count = len(team_ids)
+    played = (np.bincount(home, minlength=team_count) +
+        np.bincount(away, minlength=team_count))
+    won = (np.bincount(home[home_team_scores > away_team_scores],
+        minlength=team_count) +
+        np.bincount(away[away_team_scores > home_team_scores],
+        minlength=team_count))
+    drawn = (np.bincount(home[home_team_scores == away_team_scores],
+        minlength=team_count) +
+        np.bincount(away[home_team_scores == away_team_scores],
+        minlength=team_count))
+    goals_for = goals.sum(axis=1)
+    goals_against = goals.sum(axis=0)
+    total_points = points.sum(axis=1)
+
+    order = order_group(np.arange(team_count), list(tiebreakers), points,
+        goals, team_ids)
+
+    standings = []
+    for position, index in enumerate(order, start=1):
+        standings.append({
+            "position": position,
+            "team_id": int(team_ids[index]),
+            "played": int(played[index]),
+            "won": int(won[index]),
+            "drawn": int(drawn[index]),
+            "lost": int(played[index] - won[index] - drawn[index]),
+            "goals_for": int(goals_for[index]),
+            "goals_against": int(goals_against[index]),
+            "goal_difference": int(goals_for[index] - goals_against[index]),
+            "points": int(total_points[index])
+        })
+
+    return standings
@@ -0,0 +1,160 @@
+from database.tournament_database import get_scored_game_columns
+import numpy as np
+
+# Team and league statistics over scored games.
+#
+# Scores are loaded once into columnar arrays and every aggregate is a
+# vectorized group-by (np.bincount or np.maximum.at) over team indexes, so the
+# cost is one query plus a few passes over the arrays, however many games
+# there are.
+
+# Win, draw and loss codes used for results and streaks
+WIN = 1
+DRAW = 0
+LOSS = -1
+RESULT_LETTERS = {WIN: "W", DRAW: "D", LOSS: "L"}
+
+# Loads the scored games, of one tournament or of all of them, as arrays.
+# Returns (team_ids, home, away, home_team_scores, away_team_scores), where
+# home and away are indexes into the sorted team_ids.
+def load_game_arrays(tournament_id: int = None):
+    columns = get_scored_game_columns(tournament_id=tournament_id)
+    home_teams = np.array(columns["home_team"], dtype=np.int64)
+    away_teams = np.array(columns["away_team"], dtype=np.int64)
+    team_ids = np.unique(np.concatenate([home_teams, away_teams]))
+    return (team_ids,
+        np.searchsorted(team_ids, home_teams),
+        np.searchsorted(team_ids, away_teams),
+        np.array(columns["home_team_score"], dtype=np.int64),
+        np.array(columns["away_team_score"], dtype=np.int64))
+
+# Sums weights per team, for the games the team played on one side
+def sum_by_team(indexes: np.ndarray, weights: np.ndarray, team_count: int):
+    return np.bincount(indexes, weights=weights,
+        minlength=team_count).astype(np.int64)
+
+# Played, won, drawn, lost, goals for and against of each team on one side
+# (home or away) as a dictionary of arrays indexed by team
+def get_side_totals(indexes: np.ndarray, goals_for: np.ndarray,
+        goals_against: np.ndarray, team_count: int):
+    results = np.sign(goals_for - goals_against)
+    return {
+        "played": np.bincount(indexes, minlength=team_count),
+        "won": np.bincount(indexes[results == WIN], minlength=team_count),
+        "drawn": np.bincount(indexes[results == DRAW], minlength=team_count),
+        "lost": np.bincount(indexes[results == LOSS], minlength=team_count),
+        "goals_for": sum_by_team(indexes, goals_for, team_count),
+        "goals_against": sum_by_team(indexes, goals_against, team_count)
+    }
+
+# Current streak (result code and length) and longest winning streak of each
+# team, from its results in game order
+def get_streaks(home: np.ndarray, away: np.ndarray,
+        home_team_scores: np.ndarray, away_team_scores: np.ndarray,
+        team_count: int):
+    game_count = len(home)
+    if game_count == 0:
+        empty = np.zeros(team_count, dtype=np.int64)
+        return empty, empty, empty
+
+    teams = np.concatenate([home, away])
+    game_order = np.concatenate([np.arange(game_count),
+        np.arange(game_count)])
+    results = np.concatenate([np.sign(home_team_scores - away_team_scores),
+        np.sign(away_team_scores - home_team_scores)])
+
+    # Each team's results in game order, teams one after another
+    order = np.lexsort((game_order, teams))
+    teams = teams[order]
+    results = results[order]
+
+    # Runs of the same result by the same team
+    breaks = np.flatnonzero((teams[1:] != teams[:-1]) |
+        (results[1:] != results[:-1])) + 1
+    run_starts = np.concatenate([[0], breaks]).astype(np.int64)
+    run_lengths = np.diff(np.concatenate([run_starts, [len(teams)]]))
+    run_teams = teams[run_starts]
+    run_results = results[run_starts]
+
+    longest_win_streak = np.zeros(team_count, dtype=np.int64)
+    wins = run_results == WIN
+    np.maximum.at(longest_win_streak, run_teams[wins], run_lengths[wins])
+
+    # The last run of each team is its current streak
+    current_result = np.zeros(team_count, dtype=np.int64)
+    current_length = np.zeros(team_count, dtype=np.int64)
+    current_result[run_teams] = run_results
+    current_length[run_teams] = run_lengths
+
+    return current_result, current_length, longest_win_streak
+
+# Computes statistics for every team that played a scored game, in one
+# tournament or across all tournaments if tournament_id is None
+# Return format is a dictionary where key is the team ID and value is a
+# dictionary with played, won, drawn, lost, goals_for, goals_against,
+# goals_for_average, goals_against_average, current_streak (such as "W3"),
+# longest_win_streak, and home and away, which are dictionaries with played,
+# won, drawn, lost, goals_for and goals_against for that side only
+def get_team_stats(tournament_id: int = None):
+    team_ids, home, away, home_team_scores, away_team_scores = (
+        load_game_arrays(tournament_id))
+    team_count = len(team_ids)
+
+    home_totals = get_side_totals(home, home_team_scores, away_team_scores,
+        team_count)
+    away_totals = get_side_totals(away, away_team_scores, home_team_scores,
+        team_count)
+    current_result, current_length, longest_win_streak = get_streaks(home,
+        away, home_team_scores, away_team_scores, team_count)
+
+    stats = {}
+    for index, team_id in enumerate(team_ids.tolist()):
+        home_stats = {name: int(values[index])
+            for name, values in home_totals.items()}
+        away_stats = {name: int(values[index])
+            for name, values in away_totals.items()}
+        team_stats = {name: home_stats[name] + away_stats[name]
+            for name in home_stats}
+
+        played = team_stats["played"]
+        team_stats["goals_for_average"] = team_stats["goals_for"] / played
+        team_stats["goals_against_average"] = (team_stats["goals_against"] /
+            played)
+        team_stats["current_streak"] = (
+            RESULT_LETTERS[int(current_result[index])] +
+            str(int(current_length[index])))
+        team_stats["longest_win_streak"] = int(longest_win_streak[index])
+        team_stats["home"] = home_stats
+        team_stats["away"] = away_stats
+        stats[team_id] = team_stats
+
+    return stats
+
+# Computes league-wide statistics for a tournament, or across all tournaments
+# if tournament_id is None
+# Return format is a dictionary with games_played, goals, goals_per_game,
+# home_wins, away_wins, draws and home_win_rate. Averages are None when no
+# games have been scored.
+def get_tournament_stats(tournament_id: int = None):
+    team_ids, home, away, home_team_scores, away_team_scores = (
+        load_game_arrays(tournament_id))
+
+    games_played = len(home)
+    goals = int(home_team_scores.sum() + away_team_scores.sum())
+    home_wins = int(np.count_nonzero(home_team_scores > away_team_scores))
+    away_wins = int(np.count_nonzero(home_team_scores < away_team_scores))
+
+    stats = {
+        "games_played": games_played,
+        "goals": goals,
+        "goals_per_game": None,
+        "home_wins": home_wins,
+        "away_wins": away_wins,
+        "draws": games_played - home_wins - away_wins,
+        "home_win_rate": None
+    }
+    if games_played:
+        stats["goals_per_game"] = goals / games_played
+        stats["home_win_rate"] = home_wins / games_played
+
+    return stats
@@ -0,0 +1,142 @@
+from database.tournament_database import (
+    GAME_DURATION,
+    create_games,
+    get_tournament_schedule,
+    transaction)
+from backend.standings import get_standings
+from datetime import datetime
+
+# Swiss-system pairing for large open tournaments.
+#
+# Each round, teams are ranked by the current standings (points, then the
+# usual tiebreakers) and paired with the nearest-ranked team they have not
+# played yet, top down (the Monrad system). This keeps teams with similar
+# scores together. A team left without a possible opponent is fixed by
+# swapping it into an existing pair: (a, b) becomes (stuck, a) and
+# (b, other stuck team), so the round only falls back to a rematch when no
+# swap exists. With an odd number of teams, the lowest-ranked team among
+# those that have played the most games (and so have not had a bye yet)
+# sits out.
+
+# Pairs one round. ranked_team_ids is best first, played is a set of
+# frozensets of teams that already met, and games_played maps team IDs to
+# their number of games so far.
+# Returns (pairs, bye), where pairs is a list of (team, opponent) tuples with
+# the higher-ranked team first and bye is the team sitting out, or None.
+def pair_round(ranked_team_ids: list, played: set, games_played: dict):
+    teams = list(ranked_team_ids)
+
+    bye = None
+    if len(teams) % 2 == 1:
+        most_games = max(games_played.get(team, 0) for team in teams)
+        for team in reversed(teams):
+            if games_played.get(team, 0) == most_games:
+                bye = team
+                break
+        teams.remove(bye)
+
+    def can_play(team, opponent):
+        return frozenset((team, opponent)) not in played
+
+    rank = {team: index for index, team in enumerate(teams)}
+    pairs = []
+    stuck = []
+    unpaired = teams
+    while unpaired:
+        team = unpaired[0]
+        opponent = None
+        for candidate in unpaired[1:]:
+            if can_play(team, candidate):
+                opponent = candidate
+                break
+        if opponent is None:
+            stuck.append(team)
+            unpaired = unpaired[1:]
+        else:
+            pairs.append((team, opponent))
+            unpaired = [other for other in unpaired[1:] if other != opponent]
+
+    while stuck:
+        team = stuck.pop(0)
+        partner = None
+        for other in stuck:
+            if can_play(team, other):
+                partner = other
+                break
+        if partner is not None:
+            stuck.remove(partner)
+            pairs.append((team, partner))
+            continue
+
+        # Swap into the nearest-ranked pair that can take both stuck teams
+        swapped = False
+        candidates = sorted(range(len(pairs)), key=lambda index:
+            abs(rank[pairs[index][0]] - rank[team]))
+        for index in candidates:
+            first, second = pairs[index]
+            for other in stuck:
+                for near, far in [(first, second), (second, first)]:
+                    if can_play(team, near) and can_play(far, other):
+                        pairs[index] = (team, near)
+                        pairs.append((far, other))
+                        stuck.remove(other)
+                        swapped = True
+                        break
+                if swapped:
+                    break
+            if swapped:
+                break
+
+        if not swapped and stuck:
+            # No pairing avoids every rematch, allow one
+            pairs.append((team, stuck.pop(0)))
+
+    pairs = [tuple(sorted(pair, key=lambda team: rank[team]))
+        for pair in pairs]
+    pairs.sort(key=lambda pair: rank[pair[0]])
+
+    return pairs, bye
+
+# Pairs the next Swiss round of a tournament from its standings and earlier
+# games, and creates the round's games in one bulk write. Games are spread
+# over locations, starting at time and following each other every
+# GAME_DURATION at each location.
+# Returns (game_ids, bye).
+def create_swiss_round(tournament_id: int, time: datetime, locations: list):
+    if not locations:
+        raise ValueError("a Swiss round needs at least one location")
+
+    # Pairing and creating the games are one transaction, so that the round
+    # is created on the same standings and games it was paired from
+    with transaction():
+        standings = get_standings(tournament_id)
+        schedule = get_tournament_schedule(tournament_id)
+        ranked_team_ids = [row["team_id"] for row in standings]
+
+        played = set()
+        games_played = {}
+        home_games = {}
+        for game in schedule:
+            if game["home_team"] is None or game["away_team"] is None:
+                continue
+            played.add(frozenset((game["home_team"], game["away_team"])))
+            for team in [game["home_team"], game["away_team"]]:
+                games_played[team] = games_played.get(team, 0) + 1
+            home_games[game["home_team"]] = (
+                home_games.get(game["home_team"], 0) + 1)
+
+        pairs, bye = pair_round(ranked_team_ids, played, games_played)
+
+        games = []
+        for index, (team, opponent) in enumerate(pairs):
+            # The team with fewer home games so far plays at home
+            if home_games.get(opponent, 0) < home_games.get(team, 0):
+                team, opponent = opponent, team
+            games.append({
+                "time": time + (index // len(locations)) * GAME_DURATION,
+                "location": locations[index % len(locations)],
+                "home_team": team,
+                "away_team": opponent
+            })
+
+        return create_games(tournament_id, games), bye
@@ -1,14 +1,16 @@
 from database.tournament_database import (
-    get_all_teams, 
-    get_all_tournaments, 
     get_team_age_range, 
     get_tournament_by_id, 
-    get_team_by_id, 
     get_team_gender_range,
     get_tournaments_by_manager,
-    get_games_by_tournament,
-    get_score_by_game)
+    get_team_names,
+    search_tournaments,
+    search_teams,
+    search_players)
 from backend.users import print_user
+from backend import read_model
+from backend.render_cache import get_cached_output, capture_output
+from backend.stats import get_team_stats, get_tournament_stats
 
 LONG_LINE_DELIMITER = "*" * 40
 MEDIUM_LINE_DELIMITER = "=" * 30
@@ -35,36 +37,26 @@ def print_tournaments(tournaments: dict):
             print(f"Team Name: {team['name']}")
         print(LONG_LINE_DELIMITER)
 
-def print_games(games: dict):
-    for game in games.values():
+# Schedule is a list of dicts from get_tournament_schedule
+def print_schedule(schedule: list):
+    for game in schedule:
         print(LONG_LINE_DELIMITER)
         print(f"Game ID: {game['game_id']}")
-        print(f"Home Team")
-        home_team_id = game['home_team']
-        print(MEDIUM_LINE_DELIMITER)
-        if home_team_id:
-            print_team(get_team_by_id(home_team_id))       
-        else:
-            print("No home team yet.")
-        print(MEDIUM_LINE_DELIMITER)
-        print(f"Away Team")
-        away_team_id = game['away_team']
-        print(MEDIUM_LINE_DELIMITER)
-        if away_team_id:
-            print_team(get_team_by_id(away_team_id))
-        else:
-            print("No away team yet.")
-        print(MEDIUM_LINE_DELIMITER)
         print(f"Time: {game['time']}")
         print(f"Location: {game['location']}")
-
-        score = get_score_by_game(game['game_id'])
-        if score:
-            print(f"Hometeam score: {score['homescore']}")
-            print(f"Awayteam score: {score['awayscore']}")
-
+        if game['home_team_name'] is not None:
+            print(f"Home Team: {game['home_team_name']}")
+        else:
+            print("Home Team: No home team yet.")
+        if game['away_team_name'] is not None:
+            print(f"Away Team: {game['away_team_name']}")
+        else:
+            print("Away Team: No away team yet.")
+        if game['homescore'] is not None:
+            print(f"Hometeam score: {game['homescore']}")
+            print(f"Awayteam score: {game['awayscore']}")
         print(LONG_LINE_DELIMITER)
-        
+
 def print_teams(teams: dict):
     for team in teams.values():
         print(LONG_LINE_DELIMITER)
@@ -83,17 +75,33 @@ def print_team(team: dict):
     print(SHORT_LINE_DELIMITER)
     print_roster(team["roster"])
 
+# The all teams and all tournaments listings are rendered once per data
+# version and served from the render cache until the next write.
 def print_all_teams():
+    print(get_all_teams_text(), end="")
+
+def get_all_teams_text():
+    return get_cached_output("all_teams_text",
+        lambda: capture_output(render_all_teams))
+
+def render_all_teams():
     print("*** VIEWING TEAMS ***")
-    teams = get_all_teams()
+    teams = read_model.get_all_teams()
     if not teams:
         print("No teams currently.")
 
     print_teams(teams)
 
 def print_all_tournaments():
+    print(get_all_tournaments_text(), end="")
+
+def get_all_tournaments_text():
+    return get_cached_output("all_tournaments_text",
+        lambda: capture_output(render_all_tournaments))
+
+def render_all_tournaments():
     print("*** VIEWING TOURNAMENTS ***")
-    tournaments = get_all_tournaments()
+    tournaments = read_model.get_all_tournaments()
     if not tournaments:
         print("No tournaments currently.")
 
@@ -109,11 +117,63 @@ def print_manager_tournaments(manager_id: int):
 
 def print_tournament_games(tournament_id: int):
     print("*** VIEWING GAMES ***")
-    games = get_games_by_tournament(tournament_id)
-    if not games:
+    schedule = read_model.get_tournament_schedule(tournament_id)
+    if not schedule:
         print("No games currently.")
 
-    print_games(games)
+    print_schedule(schedule)
+
+def print_tournament_stats(tournament_id: int):
+    print("*** VIEWING TOURNAMENT STATISTICS ***")
+    league_stats = get_tournament_stats(tournament_id)
+    if not league_stats["games_played"]:
+        print("No scored games currently.")
+        return
+
+    print(LONG_LINE_DELIMITER)
+    print(f"Games Played: {league_stats['games_played']}")
+    print(f"Goals: {league_stats['goals']} " +
+        f"({league_stats['goals_per_game']:.2f} per game)")
+    print(f"Home Wins: {league_stats['home_wins']}, Away Wins: " +
+        f"{league_stats['away_wins']}, Draws: {league_stats['draws']}")
+    print(LONG_LINE_DELIMITER)
+
+    team_names = get_team_names()
+    for team_id, team_stats in get_team_stats(tournament_id).items():
+        print(f"Team Name: {team_names.get(team_id)}")
+        print(f"Record (W-D-L): {team_stats['won']}-{team_stats['drawn']}-" +
+            f"{team_stats['lost']}")
+        print(f"Home (W-D-L): {team_stats['home']['won']}-" +
+            f"{team_stats['home']['drawn']}-{team_stats['home']['lost']}, " +
+            f"Away (W-D-L): {team_stats['away']['won']}-" +
+            f"{team_stats['away']['drawn']}-{team_stats['away']['lost']}")
+        print(f"Goals For/Against: {team_stats['goals_for']}/" +
+            f"{team_stats['goals_against']} " +
+            f"({team_stats['goals_for_average']:.2f}/" +
+            f"{team_stats['goals_against_average']:.2f} per game)")
+        print(f"Current Streak: {team_stats['current_streak']}, " +
+            f"Longest Win Streak: {team_stats['longest_win_streak']}")
+        print(SHORT_LINE_DELIMITER)
+
+# Prints the tournaments, teams and players whose names match query
+def print_search_results(query: str):
+    print("*** SEARCH RESULTS ***")
+    tournaments = search_tournaments(query)
+    teams = search_teams(query)
+    players = search_players(query)
+    if not tournaments and not teams and not players:
+        print("No matches.")
+        return
+
+    for title, results, id_key in [("Tournaments", tournaments,
+            "tournament_id"), ("Teams", teams, "team_id"),
+            ("Players", players, "player_id")]:
+        if not results:
+            continue
+        print(title)
+        print(SHORT_LINE_DELIMITER)
+        for result in results:
+            print(f"ID: {result[id_key]}, Name: {result['name']}")
 
 # Roster is a list of dicts which are players
 def print_roster(roster: list):
@@ -124,23 +184,24 @@ def print_roster(roster: list):
             f"{player['age']} years old. ID: {player['player_id']}")
 
 def check_team_eligibility(team_id: int, tournament_id: int):
-    # Check empty teams
-    if not get_team_by_id(team_id)["roster"]:
+    # Check empty teams, which have no age range
+    team_min_age, team_max_age = get_team_age_range(team_id)
+    if team_min_age is None:
         return False
 
     # Check if all players fit age requirement
-    eligible_age_min = get_tournament_by_id(tournament_id)["eligible_age_min"]
-    eligible_age_max = get_tournament_by_id(tournament_id)["eligible_age_max"]
-    team_min_age, team_max_age = get_team_age_range(team_id)
+    tournament = get_tournament_by_id(tournament_id)
+    eligible_age_min = tournament["eligible_age_min"]
+    eligible_age_max = tournament["eligible_age_max"]
 
     if team_min_age < eligible_age_min or team_max_age > eligible_age_max:
         return False
 
     # Check if all players fir gender requirement
-    eligible_gender = get_tournament_by_id(tournament_id)["eligible_gender"]
+    eligible_gender = tournament["eligible_gender"]
     team_gender = get_team_gender_range(team_id)
 
     if eligible_gender == team_gender or eligible_gender == "co-ed":
         return True
     else:
-        return False
\ No newline at end of file
+        return False
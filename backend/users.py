@@ -1,4 +1,5 @@
 from database.user_database import get_all_users, get_user_by_id
+from database.storage import set_tenant, tenant_exists, register_tenant
 
 # Logs the user in by returning the type and id of the user that was logged in
 # or None if the log in failed
@@ -12,6 +13,44 @@ def log_in(username: str, password: str) -> str:
     else:
         return None
 
+# Whether the league exists, the default league (a blank league_id) always
+# does. Raises an AssertionError if league_id is not a valid league ID.
+def league_exists(league_id: str):
+    league_id = league_id.strip()
+    if not league_id:
+        return True
+    return tenant_exists(league_id)
+
+# Selects the league whose databases the rest of the session uses. Each
+# league (tenant) has its own users, tournaments and archive databases, see
+# database/storage.py. A blank league_id selects the default databases.
+# A league that does not exist yet is only created if create is True, so a
+# mistyped ID does not start an empty league.
+# Raises an AssertionError if league_id is not a valid league ID, or if the
+# league does not exist and create is False.
+def select_league(league_id: str, create: bool = False):
+    league_id = league_id.strip()
+    if league_id and not league_exists(league_id):
+        assert(create), f"League {league_id} does not exist"
+        register_tenant(league_id)
+    set_tenant(league_id or None)
+
+# Asks for a league ID until an existing league is entered, or a new league
+# is confirmed, and selects it
+def league_menu(league_prompt: str, create_prompt: str):
+    while True:
+        league_id = input(league_prompt)
+        try:
+            if league_exists(league_id):
+                select_league(league_id)
+                return
+            answer = input(create_prompt.format(league_id.strip()))
+            if answer.strip().lower() == "y":
+                select_league(league_id, create=True)
+                return
+        except AssertionError as err:
+            print(err)
+
 # Takes in a user dict, such as from the get_user_by_id function
 # As an example:
 # {
@@ -0,0 +1,219 @@
+from util.util import get_conn_curs, commit_close, get_like_prefix
+from database.storage import transaction as storage_transaction
+
+# Cold storage for finished tournaments. Archived tournaments are moved out
+# of the tournaments database (see backend/archive.py) into this separate
+# database, "archive" (archive.db with the sqlite storage engine), so that
+# the live tables only hold current seasons. Archived rows are read-only
+# snapshots: team names are copied in, so an archived tournament still reads
+# the same after its teams are renamed or deleted.
+
+# Constants
+DB_NAME = "archive"
+# Keys of the dictionaries returned for archived tournaments, in the order of
+# the ArchivedTournaments columns they are read from
+TOURNAMENT_COLUMNS = ["tournament_id", "name", "eligible_gender",
+    "eligible_age_min", "eligible_age_max", "start_date", "end_date",
+    "tournament_manager", "location", "archived_at"]
+SELECT_TOURNAMENTS = ("SELECT id, name, eligible_gender, eligible_age_min, " +
+    "eligible_age_max, start_date, end_date, tournament_manager, location, " +
+    "archived_at FROM ArchivedTournaments ")
+
+###############################################################################
+# TRANSACTIONS
+###############################################################################
+
+# Groups archive database calls into one unit of work, see transaction in
+# tournament_database.py
+def transaction():
+    return storage_transaction(DB_NAME)
+
+###############################################################################
+# CREATE
+###############################################################################
+
+# Creates the archive tables in the database.
+# ArchivedTournaments table: the columns of Tournaments, plus
+# archived_at: datetime, when the tournament was archived
+#
+# ArchivedRegistrations table:
+# tournament_id: int, ID of the archived tournament
+# team_id: int, ID the team had
+# team_name: string, name of the team when archived
+#
+# ArchivedGames table:
+# id: int, ID the game had
+# tournament_id: int, ID of the archived tournament
+# time: datetime, time that the game took place
+# location: string, where the game took place
+# home_team, away_team: int, IDs the teams had
+# home_team_name, away_team_name: string, names of the teams when archived
+# home_team_score, away_team_score: int, final score, NULL if never scored
+def create_archive_tables():
+    conn, curs = get_conn_curs(DB_NAME)
+
+    tournaments_create = ("CREATE TABLE if not exists ArchivedTournaments " +
+        "(id INTEGER PRIMARY KEY, name VARCHAR(250), " +
+        "eligible_gender VARCHAR(5), eligible_age_min INT, " +
+        "eligible_age_max INT, start_date DATETIME, end_date DATETIME, " +
+        "tournament_manager INT, location VARCHAR(50), is_reg_open INT, " +
+        "archived_at DATETIME)")
+
+    registrations_create = ("CREATE TABLE if not exists " +
+        "ArchivedRegistrations (tournament_id INT, team_id INT, " +
+        "team_name VARCHAR(250), PRIMARY KEY(tournament_id, team_id), " +
+        "FOREIGN KEY(tournament_id) REFERENCES ArchivedTournaments(id))")
+
+    games_create = ("CREATE TABLE if not exists ArchivedGames " +
+        "(id INTEGER PRIMARY KEY, tournament_id INT, time DATETIME, " +
+        "location VARCHAR(50), home_team INT, away_team INT, " +
+        "home_team_name VARCHAR(250), away_team_name VARCHAR(250), " +
+        "home_team_score INT, away_team_score INT, " +
+        "FOREIGN KEY(tournament_id) REFERENCES ArchivedTournaments(id))")
+
+    statements = [tournaments_create, registrations_create, games_create,
+        ("CREATE INDEX if not exists ArchivedGamesByTournament " +
+            "ON ArchivedGames (tournament_id, time)")]
+    for statement in statements:
+        curs.execute(statement)
+
+    commit_close(conn, curs)
+
+# Stores a tournament in the archive, from the dictionary returned by
+# get_tournament_export. Archiving the same tournament again replaces the
+# earlier copy, so an interrupted archive run can simply be repeated.
+def archive_tournament_export(export: dict, archived_at):
+    tournament = export["tournament"]
+    tournament_id = tournament["tournament_id"]
+
+    with transaction():
+        conn, curs = get_conn_curs(DB_NAME)
+
+        curs.execute("DELETE FROM ArchivedGames WHERE tournament_id = ?",
+            [tournament_id])
+        curs.execute("DELETE FROM ArchivedRegistrations " +
+            "WHERE tournament_id = ?", [tournament_id])
+
+        tournament_insert = ("INSERT OR REPLACE INTO ArchivedTournaments " +
+            "(id, name, eligible_gender, eligible_age_min, " +
+            "eligible_age_max, start_date, end_date, tournament_manager, " +
+            "location, is_reg_open, archived_at) " +
+            "VALUES (?,?,?,?,?,?,?,?,?,?,?)")
+        curs.execute(tournament_insert, [tournament_id, tournament["name"],
+            tournament["eligible_gender"], tournament["eligible_age_min"],
+            tournament["eligible_age_max"], tournament["start_date"],
+            tournament["end_date"], tournament["tournament_manager"],
+            tournament["location"], tournament["is_reg_open"],
+            str(archived_at)])
+
+        curs.executemany("INSERT INTO ArchivedRegistrations " +
+            "(tournament_id, team_id, team_name) VALUES (?,?,?)",
+            [(tournament_id, team["team_id"], team["name"])
+                for team in export["registrations"]])
+
+        curs.executemany("INSERT INTO ArchivedGames (id, tournament_id, " +
+            "time, location, home_team, away_team, home_team_name, " +
+            "away_team_name, home_team_score, away_team_score) " +
+            "VALUES (?,?,?,?,?,?,?,?,?,?)",
+            [(game["game_id"], tournament_id, game["time"], game["location"],
+                game["home_team"], game["away_team"],
+                game["home_team_name"], game["away_team_name"],
+                game["homescore"], game["awayscore"])
+                for game in export["games"]])
+
+        commit_close(conn, curs)
+
+###############################################################################
+# READ
+###############################################################################
+
+# Gets the archived tournaments, optionally only those managed by manager_id
+# Return format is a list of dictionaries ordered by end date, newest first,
+# each with tournament_id, name, eligible_gender, eligible_age_min,
+# eligible_age_max, start_date, end_date, tournament_manager, location and
+# archived_at
+def get_archived_tournaments(manager_id: int = None):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select_tournaments = SELECT_TOURNAMENTS
+    select_data = []
+    if manager_id is not None:
+        select_tournaments += "WHERE tournament_manager = ? "
+        select_data.append(manager_id)
+    curs.execute(select_tournaments + "ORDER BY end_date DESC, id",
+        select_data)
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    return [dict(zip(TOURNAMENT_COLUMNS, row)) for row in rows]
+
+# Gets one page of archived tournaments, ordered by ID, for pickers. after_id
+# is the last ID of the previous page, 0 for the first page. If query is
+# given, only names starting with it are kept.
+# Return format is a list of dictionaries with tournament_id and name
+def get_archived_tournament_page(after_id: int = 0, limit: int = 20,
+        query: str = None):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select_tournaments = ("SELECT id, name FROM ArchivedTournaments " +
+        "WHERE id > ? ")
+    select_data = [after_id]
+    if query is not None and query.strip():
+        select_tournaments += "AND name LIKE ? ESCAPE '\\' "
+        select_data.append(get_like_prefix(query.strip()))
+    curs.execute(select_tournaments + "ORDER BY id LIMIT ?",
+        select_data + [limit])
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    return [{"tournament_id": row[0], "name": row[1]} for row in rows]
+
+# Gets an archived tournament with its registered teams and games
+# Return format is a dictionary like the ones from get_archived_tournaments,
+# plus registered_teams (a list of dictionaries with team_id and name) and
+# games (a list of dictionaries ordered by time, with the keys of
+# get_tournament_schedule)
+def get_archived_tournament_by_id(tournament_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    curs.execute(SELECT_TOURNAMENTS + "WHERE id = ?", [tournament_id])
+    row = curs.fetchone()
+    if row is None:
+        commit_close(conn, curs)
+        raise Exception("Archived tournament does not exist")
+
+    tournament = dict(zip(TOURNAMENT_COLUMNS, row))
+
+    curs.execute("SELECT team_id, team_name FROM ArchivedRegistrations " +
+        "WHERE tournament_id = ? ORDER BY rowid", [tournament_id])
+    tournament["registered_teams"] = [{"team_id": team[0], "name": team[1]}
+        for team in curs.fetchall()]
+
+    curs.execute("SELECT id, time, location, home_team, home_team_name, " +
+        "away_team, away_team_name, home_team_score, away_team_score " +
+        "FROM ArchivedGames WHERE tournament_id = ? ORDER BY time, id",
+        [tournament_id])
+    tournament["games"] = [{
+        "game_id": game[0],
+        "time": game[1],
+        "location": game[2],
+        "home_team": game[3],
+        "home_team_name": game[4],
+        "away_team": game[5],
+        "away_team_name": game[6],
+        "homescore": game[7],
+        "awayscore": game[8]
+    } for game in curs.fetchall()]
+
+    commit_close(conn, curs)
+
+    return tournament
+
+###############################################################################
+# SETUP
+###############################################################################
+
+def setup_archive_database():
+    create_archive_tables()
@@ -0,0 +1,134 @@
+from util.util import get_conn_curs, commit_close
+import json
+
+# Change data capture for the database modules. Every insert, update and
+# delete on a logged table appends a row to that database's ChangeLog table.
+# The rows are written by triggers, so they are part of the same transaction
+# as the write that caused them: a rolled back write leaves no change behind,
+# and no write path (including bulk and set-based statements) can skip the
+# log. Consumers such as scoreboards, stats jobs and backups remember the
+# last sequence number they processed and read the changes after it with
+# get_changes_since, instead of rescanning the tables.
+#
+# ChangeLog table:
+# seq: int, sequence number, increases with every change and is never reused
+# table_name: string, table that was written
+# operation: string, ('insert', 'update' or 'delete')
+# row_id: int, rowid of the written row
+# data: string, JSON object of the row's columns, after the write for
+#   inserts and updates, before it for deletes. Columns that must not be
+#   copied into the log, such as passwords, are left out (see
+#   create_change_log), so consumers that need them read the row itself.
+
+# Constants
+OPERATIONS = {"INSERT": "new", "UPDATE": "new", "DELETE": "old"}
+
+# Creates the ChangeLog table of a database and the triggers that fill it for
+# the given tables. The triggers are recreated every time, so that their
+# JSON follows the current columns of each table after an upgrade.
+# excluded_columns is a dictionary where key is a table and value is a list
+# of its columns to leave out of the log. They are also removed from the
+# changes already logged, in case they were logged before being excluded.
+def create_change_log(db_name: str, tables: list,
+        excluded_columns: dict = None):
+    if excluded_columns is None:
+        excluded_columns = {}
+    conn, curs = get_conn_curs(db_name)
+
+    curs.execute("CREATE TABLE if not exists ChangeLog " +
+        "(seq INTEGER PRIMARY KEY AUTOINCREMENT, table_name VARCHAR(50), " +
+        "operation VARCHAR(6), row_id INT, data TEXT)")
+
+    for table in tables:
+        excluded = excluded_columns.get(table, [])
+        curs.execute("PRAGMA table_info(" + table + ")")
+        columns = [row[1] for row in curs.fetchall()
+            if row[1] not in excluded]
+
+        for operation, row in OPERATIONS.items():
+            trigger = table + "ChangeLog" + operation.capitalize()
+            row_json = ("json_object(" + ", ".join("'" + column + "', " +
+                row + "." + column for column in columns) + ")")
+            curs.execute("DROP TRIGGER if exists " + trigger)
+            curs.execute("CREATE TRIGGER " + trigger + " AFTER " +
+                operation + " ON " + table + " BEGIN " +
+                "INSERT INTO ChangeLog (table_name, operation, row_id, " +
+                "data) VALUES ('" + table + "', '" + operation.lower() +
+                "', " + row + ".rowid, " + row_json + "); END")
+
+        for column in excluded:
+            curs.execute("UPDATE ChangeLog SET data = json_remove(data, ?) " +
+                "WHERE table_name = ? AND json_type(data, ?) IS NOT NULL",
+                ["$." + column, table, "$." + column])
+
+    commit_close(conn, curs)
+
+# Gets the changes made to a database after the change with sequence number
+# since_seq, oldest first, at most limit of them. Pass 0 to read from the
+# beginning, then the seq of the last change read to continue.
+# Return format is a list of dictionaries with seq, table, operation, row_id
+# and data (a dictionary of the row's columns), for example:
+# [{'seq': 5, 'table': 'Teams', 'operation': 'insert', 'row_id': 1,
+#   'data': {'id': 1, 'name': 'Test Name 1', ...}}]
+def get_changes_since(db_name: str, since_seq: int, limit: int):
+    assert(isinstance(since_seq, int)), "since_seq must be an int"
+    conn, curs = get_conn_curs(db_name)
+
+    curs.execute("SELECT seq, table_name, operation, row_id, data " +
+        "FROM ChangeLog WHERE seq > ? ORDER BY seq LIMIT ?",
+        [since_seq, limit])
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    return [{
+        "seq": row[0],
+        "table": row[1],
+        "operation": row[2],
+        "row_id": row[3],
+        "data": json.loads(row[4])
+    } for row in rows]
+
+# Gets the sequence number of the latest change to a database, 0 if there
+# are none. A consumer that only wants future changes starts from here.
+def get_latest_change_seq(db_name: str):
+    conn, curs = get_conn_curs(db_name)
+
+    curs.execute("SELECT MAX(seq) FROM ChangeLog")
+    seq = curs.fetchone()[0]
+
+    commit_close(conn, curs)
+
+    return seq or 0
+
+# Gets every row of a table in the format of the data of its changes, for
+# consumers that start from a full copy and then follow the log. Read the
+# latest sequence number first: replaying the changes after it over the copy
+# gives the current rows, even if writes happened in between.
+# Return format is a dictionary where key is the rowid and value is a
+# dictionary of the row's columns
+def get_table_rows(db_name: str, table: str):
+    conn, curs = get_conn_curs(db_name)
+
+    curs.execute("SELECT rowid, * FROM " + table)
+    columns = [column[0] for column in curs.description[1:]]
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    return {row[0]: dict(zip(columns, row[1:])) for row in rows}
+
+# Gets one row of a table in the same format as get_table_rows, with all of
+# its columns, or None if there is no row with that rowid
+def get_table_row(db_name: str, table: str, row_id: int):
+    conn, curs = get_conn_curs(db_name)
+
+    curs.execute("SELECT * FROM " + table + " WHERE rowid = ?", [row_id])
+    columns = [column[0] for column in curs.description]
+    row = curs.fetchone()
+
+    commit_close(conn, curs)
+
+    if row is None:
+        return None
+    return dict(zip(columns, row))
@@ -0,0 +1,103 @@
+from database.storage import get_tenant, on_commit
+import asyncio
+import threading
+import traceback
+
+# In-process publish/subscribe for data changes, so that watchers are told
+# about a change instead of polling the database for it. Write paths publish
+# an event on a topic once their transaction commits (publish_on_commit), and
+# every subscriber of that topic in the same league (tenant) receives it.
+#
+# Topics:
+# SCORE_TOPIC: a game's score was entered or corrected, the event is a
+#   dictionary with game_id, tournament_id, home_team, home_team_name,
+#   away_team, away_team_name, homescore, awayscore and score_id
+#
+# Subscribers are either plain callbacks (subscribe), run on the publishing
+# thread and so expected to be quick, or asyncio consumers (subscribe_async),
+# which read events from a queue on their own event loop. Events only reach
+# subscribers in the process that made the write, see backend/live_scores.py
+# for serving them to other local processes.
+
+# Constants
+SCORE_TOPIC = "scores"
+
+# Callbacks of every subscription, keyed by (tenant ID, topic)
+_subscribers = {}
+_subscribers_lock = threading.Lock()
+
+# Calls callback(event) for every event published on topic in the current
+# tenant. Returns the subscription, to be passed to unsubscribe.
+def subscribe(topic: str, callback):
+    key = (get_tenant(), topic)
+    with _subscribers_lock:
+        _subscribers[key] = _subscribers.get(key, []) + [callback]
+    return (key, callback)
+
+def unsubscribe(subscription):
+    key, callback = subscription
+    with _subscribers_lock:
+        callbacks = [other for other in _subscribers.get(key, [])
+            if other is not callback]
+        if callbacks:
+            _subscribers[key] = callbacks
+        else:
+            _subscribers.pop(key, None)
+
+# Sends event to the subscribers of topic in the current tenant. A failing
+# subscriber is reported and skipped, so it cannot fail the write that
+# published the event or starve the other subscribers.
+def publish(topic: str, event: dict):
+    with _subscribers_lock:
+        callbacks = _subscribers.get((get_tenant(), topic), [])
+    for callback in callbacks:
+        try:
+            callback(event)
+        except Exception:
+            traceback.print_exc()
+
+# Publishes event once the current transaction on db_name commits, and never
+# if it rolls back
+def publish_on_commit(db_name: str, topic: str, event: dict):
+    on_commit(db_name, lambda: publish(topic, event))
+
+# Subscription for asyncio consumers. Events published from any thread are
+# put on a queue of the consumer's event loop and read with get() or
+# `async for event in subscription`. If the consumer falls more than maxsize
+# events behind, the oldest waiting events are dropped, so one slow watcher
+# cannot hold memory for every score of the day.
+class AsyncSubscription:
+    def __init__(self, topic: str, maxsize: int = 1000,
+            loop: asyncio.AbstractEventLoop = None):
+        self.loop = loop or asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self.subscription = subscribe(topic, self.put_threadsafe)
+
+    def put_threadsafe(self, event: dict):
+        if self.loop.is_closed():
+            self.close()
+            return
+        self.loop.call_soon_threadsafe(self.put, event)
+
+    def put(self, event: dict):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        unsubscribe(self.subscription)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.get()
+
+# Subscribes the running event loop to topic, see AsyncSubscription
+def subscribe_async(topic: str, maxsize: int = 1000):
+    return AsyncSubscription(topic, maxsize)
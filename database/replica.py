@@ -0,0 +1,190 @@
+from database.storage import (
+    connect,
+    transaction,
+    get_tenant,
+    set_tenant,
+    set_read_route)
+from database import change_log
+from database.tournament_database import DB_NAME as TOURNAMENTS_DB_NAME
+import json
+import os
+import sqlite3
+import threading
+import traceback
+
+# Read replicas for reporting. A replica of a database ("tournaments" for
+# example) is another database of the same engine, "tournaments_replica"
+# (tournaments_replica.db with the sqlite engine), which lags the primary by
+# at most a few seconds:
+#
+# - create_replica copies the primary with SQLite's online backup API, which
+#   also copies its change log (see change_log.py).
+# - sync_replica then ships the primary's change log: the changes after the
+#   replica's latest sequence number are applied to its rows, together with
+#   the log entries themselves, in one transaction on the replica. Applying
+#   nothing but logged row images keeps the replica an exact copy, and a
+#   replica that is behind by a few changes is caught up without copying the
+#   whole file again.
+# - ReplicaShipper runs sync_replica every few seconds in a background thread.
+#
+# With reads routed to the replica (set_read_route in storage.py, done by
+# start_replica), the report reads of tournament_database.py made inside
+# read_from_replica are served by the replica. Every other read, and every
+# write, still goes to the primary.
+#
+# For example, to report from a replica that is at most two seconds behind:
+#
+# shipper = start_replica("tournaments", interval=2)
+# ...
+# stop_replica(shipper)
+
+# Constants
+REPLICA_SUFFIX = "_replica"
+# Changes shipped to the replica per transaction
+CHANGE_BATCH = 1000
+# Pages copied per step of create_replica
+BACKUP_PAGES = 1024
+# Seconds between syncs of a ReplicaShipper
+DEFAULT_INTERVAL = 1.0
+
+def get_replica_name(db_name: str):
+    return db_name + REPLICA_SUFFIX
+
+# Copies the primary into its replica with the online backup API, replacing
+# whatever the replica held. The copy is made BACKUP_PAGES pages at a time,
+# so writers of the primary are only held up for one step at a time. The
+# replica's change log triggers are dropped, since its log is filled from
+# the primary's.
+def create_replica(db_name: str):
+    primary = connect(db_name)
+    replica = connect(get_replica_name(db_name))
+    try:
+        primary.backup(replica, pages=BACKUP_PAGES)
+
+        triggers = replica.execute("SELECT name FROM sqlite_master " +
+            "WHERE type = 'trigger' AND sql LIKE '%INSERT INTO ChangeLog%'")
+        for trigger in triggers.fetchall():
+            replica.execute("DROP TRIGGER " + trigger[0])
+        replica.commit()
+    finally:
+        replica.close()
+        primary.close()
+
+# Applies changes read from the primary's change log to the replica, in one
+# transaction on the replica. Foreign keys are checked at commit, once the
+# whole batch is in, as the rows of one statement may arrive in any order.
+def apply_changes(db_name: str, changes: list):
+    with transaction(get_replica_name(db_name)) as conn:
+        curs = conn.cursor()
+        curs.execute("PRAGMA defer_foreign_keys = ON")
+
+        for change in changes:
+            table = change["table"]
+            data = change["data"]
+            if change["operation"] == "delete":
+                curs.execute("DELETE FROM " + table + " WHERE rowid = ?",
+                    [change["row_id"]])
+            else:
+                columns = list(data)
+                values = [data[column] for column in columns]
+                curs.execute("UPDATE " + table + " SET " +
+                    ", ".join(column + " = ?" for column in columns) +
+                    " WHERE rowid = ?", values + [change["row_id"]])
+                if curs.rowcount == 0:
+                    curs.execute("INSERT INTO " + table + " (rowid, " +
+                        ", ".join(columns) + ") VALUES (" +
+                        ", ".join("?" for column in columns) + ", ?)",
+                        [change["row_id"]] + values)
+
+            curs.execute("INSERT INTO ChangeLog (seq, table_name, " +
+                "operation, row_id, data) VALUES (?,?,?,?,?)",
+                [change["seq"], table, change["operation"], change["row_id"],
+                json.dumps(data, ensure_ascii=False,
+                    separators=(",", ":"))])
+
+        curs.close()
+
+# Brings the replica up to date with the primary. The replica is copied again
+# if it does not exist yet, if the primary's change log was cleared, or if
+# changes cannot be applied to it (for example after the primary's tables
+# were upgraded).
+# Returns the number of changes applied, or None if the replica was copied.
+def sync_replica(db_name: str):
+    replica_name = get_replica_name(db_name)
+    latest_seq = change_log.get_latest_change_seq(db_name)
+    try:
+        replica_seq = change_log.get_latest_change_seq(replica_name)
+    except sqlite3.OperationalError:
+        create_replica(db_name)
+        return None
+
+    if latest_seq < replica_seq:
+        create_replica(db_name)
+        return None
+
+    applied = 0
+    while replica_seq < latest_seq:
+        changes = change_log.get_changes_since(db_name, replica_seq,
+            CHANGE_BATCH)
+        if not changes:
+            break
+        try:
+            apply_changes(db_name, changes)
+        except sqlite3.DatabaseError:
+            create_replica(db_name)
+            return None
+        replica_seq = changes[-1]["seq"]
+        applied += len(changes)
+
+    return applied
+
+# Keeps the replica of a database in sync from a background thread, syncing
+# every interval seconds, for the tenant that was current when it started
+class ReplicaShipper:
+    def __init__(self, db_name: str, interval: float = DEFAULT_INTERVAL):
+        self.db_name = db_name
+        self.interval = interval
+        self.tenant_id = get_tenant()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def run(self):
+        set_tenant(self.tenant_id)
+        while not self.stopped.wait(self.interval):
+            # A failed sync is retried on the next tick
+            try:
+                sync_replica(self.db_name)
+            except Exception:
+                traceback.print_exc()
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+
+# Brings the replica of a database up to date, routes its reads to the
+# replica and starts shipping changes to it in the background.
+# Returns the ReplicaShipper, to be passed to stop_replica.
+def start_replica(db_name: str, interval: float = DEFAULT_INTERVAL):
+    sync_replica(db_name)
+    set_read_route(db_name, get_replica_name(db_name))
+    shipper = ReplicaShipper(db_name, interval)
+    shipper.start()
+    return shipper
+
+# Stops shipping changes and sends reads back to the primary
+def stop_replica(shipper: ReplicaShipper):
+    shipper.stop()
+    set_read_route(shipper.db_name)
+
+# Starts a replica of db_name (the tournaments database by default) if the
+# READ_REPLICA environment variable is set, to the number of seconds between
+# syncs, for example `READ_REPLICA=2 python3 new_menu.py`. Used by the app
+# entry points. Returns the ReplicaShipper, or None.
+def configure_replica_from_env(db_name: str = TOURNAMENTS_DB_NAME):
+    interval = os.environ.get("READ_REPLICA")
+    if not interval:
+        return None
+    return start_replica(db_name, float(interval))
@@ -0,0 +1,435 @@
+from contextlib import contextmanager
+import contextvars
+import os
+import re
+import sqlite3
+import threading
+
+# Storage engines sit behind get_conn_curs in util/util.py. Every public
+# function in the database modules asks the active engine for a connection
+# to a logical database ("tournaments", "users" or "archive") instead of
+# opening a hard-coded file in the working directory.
+#
+# Available engines:
+# "sqlite": SQLiteFileEngine, one <name>.db file per database in a directory
+# "memory": MemoryEngine, databases live in memory for the life of the process
+#
+# The engine is selected once at startup with configure_storage, for example
+# configure_storage("memory") in tests and simulations, or
+# configure_storage("sqlite", directory="data") for a non-default location.
+#
+# Several independent leagues (tenants) can share one app. Each tenant gets
+# its own engine, and so its own databases, files and connection pool, made
+# by the configured engine's for_tenant. The current session's tenant is
+# chosen with set_tenant, usually at login, and every connection is routed to
+# that tenant's engine. With no tenant set the configured engine itself is
+# used, as in a single-league install.
+#
+# Writes can be grouped with the transaction context manager. Inside it every
+# call against the same database shares one connection and the data is
+# committed once when the outermost block exits. Nested blocks become
+# savepoints, so an inner failure can be caught without losing outer work.
+
+###############################################################################
+# CONNECTIONS
+###############################################################################
+
+# Connection type handed out by every engine. Engines that keep a single
+# connection open for their whole lifetime mark it as persistent, so that the
+# close() in commit_close does not throw the database away.
+# While a transaction is active on the connection, commit() and close() are
+# deferred to the end of the outermost transaction block.
+class StorageConnection(sqlite3.Connection):
+    persistent = False
+    in_unit_of_work = False
+    savepoint_depth = 0
+    # Callbacks registered with on_commit during the current transaction
+    commit_callbacks = []
+
+    def commit(self):
+        if not self.in_unit_of_work:
+            super().commit()
+
+    def close(self):
+        if not self.persistent and not self.in_unit_of_work:
+            super().close()
+
+    # Closes the connection even if it is persistent
+    def shutdown(self):
+        super().close()
+
+# A connection handed out by a ConnectionPool. close() returns it to the pool
+# instead of closing it, so the next call skips opening the file and reading
+# the schema again.
+class PooledConnection(StorageConnection):
+    pool = None
+
+    def close(self):
+        if self.in_unit_of_work:
+            return
+        if self.pool is None:
+            super().close()
+        else:
+            self.pool.release(self)
+
+# Keeps up to size idle connections to one database file for reuse. A
+# connection is only ever used by one caller at a time: it leaves the pool
+# when handed out and comes back when closed.
+class ConnectionPool:
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        conn = sqlite3.connect(self.path, factory=PooledConnection,
+            check_same_thread=False)
+        conn.pool = self
+        return conn
+
+    # Takes a connection back, rolling back anything left uncommitted by a
+    # failed call so that it holds no locks while idle
+    def release(self, conn: PooledConnection):
+        if conn.in_transaction:
+            conn.rollback()
+        with self.lock:
+            if len(self.idle) < self.size:
+                self.idle.append(conn)
+                return
+        conn.shutdown()
+
+    def dispose(self):
+        with self.lock:
+            idle = self.idle
+            self.idle = []
+        for conn in idle:
+            conn.shutdown()
+
+###############################################################################
+# ENGINES
+###############################################################################
+
+# Stores each database in its own file, <directory>/<db_name>.db, with a
+# pool of up to pool_size idle connections per file. A tenant's files are in
+# the tenants/<tenant_id> subdirectory unless the tenant is given its own
+# directory with register_tenant, e.g. to put a large league on another disk.
+class SQLiteFileEngine:
+    def __init__(self, directory: str = ".", pool_size: int = 4):
+        self.directory = directory
+        self.pool_size = pool_size
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def get_path(self, db_name: str):
+        return os.path.join(self.directory, f"{db_name}.db")
+
+    def connect(self, db_name: str):
+        with self.lock:
+            pool = self.pools.get(db_name)
+            if pool is None:
+                pool = ConnectionPool(self.get_path(db_name), self.pool_size)
+                self.pools[db_name] = pool
+        return pool.acquire()
+
+    def get_tenant_directory(self, tenant_id: str):
+        return os.path.join(self.directory, "tenants", tenant_id)
+
+    def for_tenant(self, tenant_id: str, directory: str = None):
+        if directory is None:
+            directory = self.get_tenant_directory(tenant_id)
+        os.makedirs(directory, exist_ok=True)
+        return SQLiteFileEngine(directory, self.pool_size)
+
+    # A tenant exists once its directory has been made
+    def tenant_exists(self, tenant_id: str):
+        return os.path.isdir(self.get_tenant_directory(tenant_id))
+
+    def database_exists(self, db_name: str):
+        return os.path.exists(self.get_path(db_name))
+
+    def dispose(self):
+        with self.lock:
+            pools = list(self.pools.values())
+            self.pools = {}
+        for pool in pools:
+            pool.dispose()
+
+# Stores each database in memory. One connection per database is kept open
+# and shared by every call, so no disk I/O happens and the data lasts until
+# dispose() is called or the process exits.
+class MemoryEngine:
+    def __init__(self):
+        self.connections = {}
+
+    def connect(self, db_name: str):
+        conn = self.connections.get(db_name)
+        if conn is None:
+            conn = sqlite3.connect(":memory:", factory=StorageConnection,
+                check_same_thread=False)
+            conn.persistent = True
+            self.connections[db_name] = conn
+        return conn
+
+    # Options such as directory have no meaning in memory and are ignored
+    def for_tenant(self, tenant_id: str, **options):
+        return MemoryEngine()
+
+    # Tenants in memory only exist once registered or used
+    def tenant_exists(self, tenant_id: str):
+        return False
+
+    def database_exists(self, db_name: str):
+        return db_name in self.connections
+
+    def dispose(self):
+        for conn in self.connections.values():
+            conn.shutdown()
+        self.connections = {}
+
+ENGINES = {
+    "sqlite": SQLiteFileEngine,
+    "memory": MemoryEngine
+}
+
+_engine = SQLiteFileEngine()
+# Engines of the tenants used so far, keyed by tenant ID
+_tenant_engines = {}
+_tenant_engines_lock = threading.Lock()
+# Tenant of the current session, None for the default (untenanted) databases
+_tenant = contextvars.ContextVar("tenant", default=None)
+# Database that reads of each routed database go to, see set_read_route
+_read_routes = {}
+# Whether the current session has opted in to replica reads, see
+# read_from_replica
+_replica_reads = contextvars.ContextVar("replica_reads", default=False)
+
+###############################################################################
+# CONFIGURATION
+###############################################################################
+
+# Replaces the active engine. kind is a key of ENGINES and options are passed
+# to the engine's constructor. Returns the new engine.
+def configure_storage(kind: str = "sqlite", **options):
+    global _engine
+
+    if kind not in ENGINES:
+        raise Exception(f"Unknown storage engine: {kind}")
+
+    with _tenant_engines_lock:
+        engines = list(_tenant_engines.values())
+        _tenant_engines.clear()
+    for engine in engines + [_engine]:
+        engine.dispose()
+    _engine = ENGINES[kind](**options)
+
+    return _engine
+
+# Returns the engine of the current tenant, or the configured engine if no
+# tenant is set
+def get_engine():
+    tenant_id = _tenant.get()
+    if tenant_id is None:
+        return _engine
+    with _tenant_engines_lock:
+        engine = _tenant_engines.get(tenant_id)
+        if engine is None:
+            engine = _engine.for_tenant(tenant_id)
+            _tenant_engines[tenant_id] = engine
+    return engine
+
+# Returns a connection to db_name for the current tenant, which is the
+# connection of the current thread's active transaction on that database if
+# there is one
+def connect(db_name: str):
+    conn = _active_units().get((_tenant.get(), db_name))
+    if conn is not None:
+        return conn
+    return get_engine().connect(db_name)
+
+# Returns a connection for reads that may be served by a replica of db_name,
+# see set_read_route. The replica is only used inside read_from_replica, and
+# inside a transaction on db_name the transaction's connection is returned
+# instead, so a unit of work always reads its own writes.
+def connect_for_read(db_name: str):
+    conn = _active_units().get((_tenant.get(), db_name))
+    if conn is not None:
+        return conn
+    if not _replica_reads.get():
+        return get_engine().connect(db_name)
+    return get_engine().connect(_read_routes.get(db_name, db_name))
+
+###############################################################################
+# READ ROUTING
+###############################################################################
+
+# A replica lags its primary by a few seconds, so reads only go to it when
+# the caller says a report may be that stale. Everything else, such as menu
+# pickers, input checks and the reads that decide writes, reads the primary.
+#
+# For example, to serve a statistics report from the replica:
+#
+# with read_from_replica():
+#     print_tournament_stats(tournament_id)
+
+# Sends the reads made with connect_for_read on db_name inside
+# read_from_replica to the database read_db_name, usually a replica kept in
+# sync by database/replica.py, or back to db_name itself if read_db_name is
+# None. Writes are not affected.
+def set_read_route(db_name: str, read_db_name: str = None):
+    if read_db_name is None or read_db_name == db_name:
+        _read_routes.pop(db_name, None)
+    else:
+        _read_routes[db_name] = read_db_name
+
+def get_read_route(db_name: str):
+    return _read_routes.get(db_name, db_name)
+
+# Lets the reads made with connect_for_read inside the block, in the current
+# thread or asyncio task, be served by the routed replicas
+@contextmanager
+def read_from_replica():
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+###############################################################################
+# TENANTS
+###############################################################################
+
+# Gives a tenant its own engine options, such as the directory of its files
+# with the sqlite engine. Tenants that are not registered use the defaults of
+# the configured engine's for_tenant.
+def register_tenant(tenant_id: str, **options):
+    check_tenant_id(tenant_id)
+    engine = _engine.for_tenant(tenant_id, **options)
+    with _tenant_engines_lock:
+        old_engine = _tenant_engines.get(tenant_id)
+        _tenant_engines[tenant_id] = engine
+    if old_engine is not None:
+        old_engine.dispose()
+    return engine
+
+# Selects the tenant for the rest of the session (the current thread, or the
+# current asyncio task and the tasks it creates), None for the default
+# databases
+def set_tenant(tenant_id: str = None):
+    if tenant_id is not None:
+        check_tenant_id(tenant_id)
+    _tenant.set(tenant_id)
+
+def get_tenant():
+    return _tenant.get()
+
+# Whether the tenant has databases already, because it was registered or used
+# in this process or, with the sqlite engine, because its directory exists
+def tenant_exists(tenant_id: str):
+    check_tenant_id(tenant_id)
+    with _tenant_engines_lock:
+        if tenant_id in _tenant_engines:
+            return True
+    return _engine.tenant_exists(tenant_id)
+
+# Whether db_name already exists for the current tenant, without creating
+# it as connecting would
+def database_exists(db_name: str):
+    return get_engine().database_exists(db_name)
+
+# Tenant IDs become directory names, so only letters, digits, - and _ are
+# allowed
+def check_tenant_id(tenant_id: str):
+    assert(isinstance(tenant_id, str)), "tenant_id must be a string"
+    assert(re.fullmatch(r"[A-Za-z0-9_-]+", tenant_id)), ("tenant_id may " +
+        "only contain letters, digits, - and _")
+
+# Selects the engine named by the STORAGE_ENGINE environment variable,
+# defaulting to SQLite files in the working directory. Used by the app entry
+# points, e.g. `STORAGE_ENGINE=memory python3 new_menu.py`.
+def configure_storage_from_env():
+    return configure_storage(os.environ.get("STORAGE_ENGINE", "sqlite"))
+
+###############################################################################
+# TRANSACTIONS
+###############################################################################
+
+_local = threading.local()
+
+# Active transaction connections of the current thread, keyed by tenant ID
+# and db_name
+def _active_units():
+    if not hasattr(_local, "units"):
+        _local.units = {}
+    return _local.units
+
+# Runs the enclosed block as one unit of work on db_name. Yields the shared
+# connection. The outermost block commits once on success and rolls back
+# everything on an exception; nested blocks use savepoints and only roll back
+# their own work. Exceptions are always re-raised.
+@contextmanager
+def transaction(db_name: str):
+    units = _active_units()
+    key = (_tenant.get(), db_name)
+    conn = units.get(key)
+
+    if conn is not None:
+        conn.savepoint_depth += 1
+        savepoint = f"unit_of_work_{conn.savepoint_depth}"
+        callback_count = len(conn.commit_callbacks)
+        conn.execute(f"SAVEPOINT {savepoint}")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute(f"ROLLBACK TO {savepoint}")
+            conn.execute(f"RELEASE {savepoint}")
+            del conn.commit_callbacks[callback_count:]
+            raise
+        else:
+            conn.execute(f"RELEASE {savepoint}")
+        finally:
+            conn.savepoint_depth -= 1
+        return
+
+    conn = get_engine().connect(db_name)
+    # Foreign keys cannot be switched on once the transaction has begun
+    conn.execute("PRAGMA foreign_keys=on;")
+    conn.execute("BEGIN IMMEDIATE")
+    conn.in_unit_of_work = True
+    conn.savepoint_depth = 0
+    conn.commit_callbacks = []
+    units[key] = conn
+    try:
+        yield conn
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.in_unit_of_work = False
+        conn.commit()
+    finally:
+        conn.in_unit_of_work = False
+        callbacks = conn.commit_callbacks
+        conn.commit_callbacks = []
+        del units[key]
+        conn.close()
+
+    for callback in callbacks:
+        callback()
+
+# Returns True if the current thread is inside a transaction on db_name
+def in_transaction(db_name: str):
+    return (_tenant.get(), db_name) in _active_units()
+
+# Runs callback once the current transaction on db_name has committed, or
+# straight away if there is none. Callbacks registered inside a block that
+# rolls back are dropped with its work, so they only ever see committed data.
+def on_commit(db_name: str, callback):
+    conn = _active_units().get((_tenant.get(), db_name))
+    if conn is None:
+        callback()
+    else:
+        conn.commit_callbacks.append(callback)
@@ -1,9 +1,40 @@
 from datetime import datetime, timedelta
-from util.util import get_conn_curs, commit_close
+import json
+from util.util import (
+    get_conn_curs,
+    get_read_conn_curs,
+    commit_close,
+    get_like_prefix)
 from database.user_database import get_user_by_id
+from database.storage import database_exists
+from database.storage import transaction as storage_transaction
+from database import change_log, events
 
 # Constants
-DB_FILENAME = "tournaments.db"
+DB_NAME = "tournaments"
+# Tables whose writes are recorded in the change log, see change_log.py
+CHANGE_LOG_TABLES = ["Tournaments", "Teams", "Players", "Games", "Scores",
+    "TournamentRegistrations", "PlayersOnTeams", "GamesInTournaments",
+    "GameScores", "BracketGames"]
+# Length of every game, two bookings overlap if they start less than this
+# far apart
+GAME_DURATION = timedelta(hours=2)
+
+###############################################################################
+# TRANSACTIONS
+###############################################################################
+
+# Groups tournament database calls into one unit of work. Every call made
+# inside the block shares one connection and the writes are committed once
+# when the outermost block exits, or all rolled back if it raises. Nested
+# blocks are savepoints. For example, creating a team and its roster:
+#
+# with transaction():
+#     create_team(...)
+#     for player in players:
+#         create_player(...)
+def transaction():
+    return storage_transaction(DB_NAME)
 
 ###############################################################################
 # CREATE
@@ -28,6 +59,13 @@ DB_FILENAME = "tournaments.db"
 # team_age_min: int, minimum age of player on team
 # team_age_max: int, maximum age of player on team
 # team_manager: int, ID of user who created team
+# roster_count: int, number of players on the team
+# min_age: int, age of the youngest player, NULL if no players
+# max_age: int, age of the oldest player, NULL if no players
+# male_count: int, number of players with gender 'm'
+# female_count: int, number of other players
+# The last five are kept up to date by every write to the roster, see
+# update_team_aggregates
 #
 # Players table:
 # id: int, automatically increments on insert
@@ -41,13 +79,14 @@ DB_FILENAME = "tournaments.db"
 # away_team: int, foreign key (Teams)
 # time: datetime, time that the game takes place
 # location: string, where the game takes place
+# current_score: int, foreign key (Scores), most recent score for the game
 
 # Scores table:
 # id: int, automatically increments on insert
 # home_team_score: int, score for the home team
 # away_team_score: int, score for the away team
 def create_basic_tables():
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     tournaments_create = ("CREATE TABLE if not exists Tournaments " +
         "(id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(250), " +
@@ -58,7 +97,8 @@ def create_basic_tables():
     teams_create = ("CREATE TABLE if not exists Teams " +
         "(id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(250), " +
         "team_gender VARCHAR(5), team_age_min INT, team_age_max INT, " +
-        "team_manager INT)")
+        "team_manager INT, roster_count INT DEFAULT 0, min_age INT, " +
+        "max_age INT, male_count INT DEFAULT 0, female_count INT DEFAULT 0)")
 
     players_create = ("CREATE TABLE if not exists Players " +
         "(id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(250), " +
@@ -67,8 +107,10 @@ def create_basic_tables():
     games_create = ("CREATE TABLE if not exists Games " +
         "(id INTEGER PRIMARY KEY AUTOINCREMENT, home_team INT, " +
         "away_team INT, time DATETIME, location VARCHAR(50), " +
+        "current_score INT, " +
         "FOREIGN KEY(home_team) REFERENCES Teams(id), " +
-        "FOREIGN KEY(away_team) REFERENCES Teams(id))")
+        "FOREIGN KEY(away_team) REFERENCES Teams(id), " +
+        "FOREIGN KEY(current_score) REFERENCES Scores(id))")
     
     scores_create = ("CREATE TABLE if not exists Scores " +
         "(id INTEGER PRIMARY KEY AUTOINCREMENT, home_team_score INT, " +
@@ -105,8 +147,21 @@ def create_basic_tables():
 # GamesInTournaments table:
 # tournament_id: int, foreign key
 # game_id: int, foreign key
+#
+# GameScores table (full history of scores, including corrections):
+# game_id: int, foreign key
+# score_id: int, foreign key
+#
+# BracketGames table (games of single-elimination brackets):
+# game_id: int, foreign key (Games), primary key
+# tournament_id: int, foreign key
+# round: int, 1 for the first round
+# position: int, 0-based position of the game within its round
+# next_game_id: int, foreign key (Games), game the winner advances to, or
+#   NULL for the final
+# next_slot: string, ('home' or 'away') side of next_game_id the winner takes
 def create_relational_tables():
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     tournament_registrations_create = ("CREATE TABLE if not exists " +
         "TournamentRegistrations (tournament_id INT, team_id INT, " +
@@ -128,19 +183,161 @@ def create_relational_tables():
         "FOREIGN KEY(game_id) REFERENCES Games(id), " +
         "FOREIGN KEY(score_id) REFERENCES Scores(id))")
 
+    bracket_games_create = ("CREATE TABLE if not exists BracketGames " +
+        "(game_id INTEGER PRIMARY KEY, tournament_id INT, round INT, " +
+        "position INT, next_game_id INT, next_slot VARCHAR(4), " +
+        "FOREIGN KEY(game_id) REFERENCES Games(id), " +
+        "FOREIGN KEY(tournament_id) REFERENCES Tournaments(id), " +
+        "FOREIGN KEY(next_game_id) REFERENCES Games(id))")
+
     # Execute the statements
     statements = [tournament_registrations_create, players_on_teams_create,
-        games_in_tournaments_create, game_scores_create]
+        games_in_tournaments_create, game_scores_create, bracket_games_create]
+    for statement in statements:
+        curs.execute(statement)
+
+    commit_close(conn, curs)
+
+# Creates the indexes used by lookups on the relational tables
+def create_indexes():
+    conn, curs = get_conn_curs(DB_NAME)
+
+    statements = [
+        ("CREATE INDEX if not exists GamesInTournamentsByTournament " +
+            "ON GamesInTournaments (tournament_id, game_id)"),
+        ("CREATE INDEX if not exists TournamentRegistrationsByTournament " +
+            "ON TournamentRegistrations (tournament_id, team_id)"),
+        ("CREATE INDEX if not exists GameScoresByGame " +
+            "ON GameScores (game_id)"),
+        # Interval lookups for booking conflicts are range scans on time
+        ("CREATE INDEX if not exists GamesByLocationTime " +
+            "ON Games (location, time)"),
+        ("CREATE INDEX if not exists GamesByHomeTeamTime " +
+            "ON Games (home_team, time)"),
+        ("CREATE INDEX if not exists GamesByAwayTeamTime " +
+            "ON Games (away_team, time)"),
+        ("CREATE INDEX if not exists GamesByTime ON Games (time)"),
+        ("CREATE INDEX if not exists BracketGamesByTournament " +
+            "ON BracketGames (tournament_id, round, position)"),
+        ("CREATE INDEX if not exists BracketGamesByNextGame " +
+            "ON BracketGames (next_game_id)"),
+        ("CREATE INDEX if not exists GamesByCurrentScore " +
+            "ON Games (current_score)"),
+        ("CREATE INDEX if not exists TournamentsByName " +
+            "ON Tournaments (name)"),
+        ("CREATE INDEX if not exists TournamentsByEndDate " +
+            "ON Tournaments (end_date)"),
+        ("CREATE INDEX if not exists TournamentsByManager " +
+            "ON Tournaments (tournament_manager)"),
+        ("CREATE INDEX if not exists TeamsByManager " +
+            "ON Teams (team_manager)"),
+        ("CREATE INDEX if not exists PlayersOnTeamsByTeam " +
+            "ON PlayersOnTeams (team_id, player_id)"),
+        ("CREATE INDEX if not exists PlayersOnTeamsByPlayer " +
+            "ON PlayersOnTeams (player_id)")]
     for statement in statements:
         curs.execute(statement)
 
     commit_close(conn, curs)
 
+# Search tables, one per searchable entity: (table, search table)
+SEARCH_TABLES = [
+    ("Tournaments", "TournamentSearch"),
+    ("Teams", "TeamSearch"),
+    ("Players", "PlayerSearch")]
+
+# Creates the full-text search index over the names of tournaments, teams
+# and players. Each search table is an FTS5 index of the name column of its
+# table, using the trigram tokenizer so that any part of a name (three
+# characters or more) can be matched. Triggers keep the index in sync with
+# every insert, update and delete, however the row is written. Indexes
+# created for an existing database are filled from its current rows.
+def create_search_tables():
+    conn, curs = get_conn_curs(DB_NAME)
+
+    for table, search_table in SEARCH_TABLES:
+        curs.execute("SELECT name FROM sqlite_master WHERE name = ?",
+            [search_table])
+        exists = curs.fetchone() is not None
+
+        curs.execute("CREATE VIRTUAL TABLE if not exists " + search_table +
+            " USING fts5(name, content='" + table + "', " +
+            "content_rowid='id', tokenize='trigram')")
+
+        curs.execute("CREATE TRIGGER if not exists " + search_table +
+            "Insert AFTER INSERT ON " + table + " BEGIN " +
+            "INSERT INTO " + search_table + " (rowid, name) " +
+            "VALUES (new.id, new.name); END")
+        curs.execute("CREATE TRIGGER if not exists " + search_table +
+            "Delete AFTER DELETE ON " + table + " BEGIN " +
+            "INSERT INTO " + search_table + " (" + search_table +
+            ", rowid, name) VALUES ('delete', old.id, old.name); END")
+        curs.execute("CREATE TRIGGER if not exists " + search_table +
+            "Update AFTER UPDATE OF name ON " + table + " BEGIN " +
+            "INSERT INTO " + search_table + " (" + search_table +
+            ", rowid, name) VALUES ('delete', old.id, old.name); " +
+            "INSERT INTO " + search_table + " (rowid, name) " +
+            "VALUES (new.id, new.name); END")
+
+        if not exists:
+            curs.execute("INSERT INTO " + search_table + " (" +
+                search_table + ") VALUES ('rebuild')")
+
+    commit_close(conn, curs)
+
+# Adds columns introduced after a database file was first created, so that
+# existing tournaments.db files keep working. Backfills the new columns.
+def upgrade_tables():
+    conn, curs = get_conn_curs(DB_NAME)
+
+    curs.execute("PRAGMA table_info(Games)")
+    game_columns = [row[1] for row in curs.fetchall()]
+    if "current_score" not in game_columns:
+        curs.execute("ALTER TABLE Games ADD COLUMN current_score INT " +
+            "REFERENCES Scores(id)")
+        curs.execute("UPDATE Games SET current_score = (" +
+            "SELECT score_id FROM GameScores WHERE game_id = Games.id " +
+            "ORDER BY rowid DESC LIMIT 1)")
+
+    curs.execute("PRAGMA table_info(Teams)")
+    team_columns = [row[1] for row in curs.fetchall()]
+    if "roster_count" not in team_columns:
+        for column in ["roster_count INT DEFAULT 0", "min_age INT",
+                "max_age INT", "male_count INT DEFAULT 0",
+                "female_count INT DEFAULT 0"]:
+            curs.execute("ALTER TABLE Teams ADD COLUMN " + column)
+        update_team_aggregates(curs)
+
+    commit_close(conn, curs)
+
+# Recomputes the roster aggregates of Teams (roster_count, min_age, max_age,
+# male_count and female_count) from the players, for the teams with the
+# given IDs or for every team if team_ids is None, using the cursor of the
+# current transaction. Used when players leave a team, where the new minimum
+# or maximum age cannot be known without looking at the rest of the roster.
+def update_team_aggregates(curs, team_ids: list = None):
+    roster = ("FROM PlayersOnTeams " +
+        "JOIN Players ON Players.id = PlayersOnTeams.player_id " +
+        "WHERE PlayersOnTeams.team_id = Teams.id")
+    team_update = ("UPDATE Teams SET " +
+        "roster_count = (SELECT COUNT(*) " + roster + "), " +
+        "min_age = (SELECT MIN(Players.age) " + roster + "), " +
+        "max_age = (SELECT MAX(Players.age) " + roster + "), " +
+        "male_count = (SELECT COUNT(*) " + roster +
+            " AND Players.gender = 'm'), " +
+        "female_count = (SELECT COUNT(*) " + roster +
+            " AND Players.gender != 'm')")
+    if team_ids is None:
+        curs.execute(team_update)
+    else:
+        curs.execute(team_update + " WHERE id IN " +
+            "(SELECT value FROM json_each(?))", [json.dumps(team_ids)])
+
 # Creates a tournament
 def create_tournament(name: str, eligible_gender: str, eligible_age_min: int, 
         eligible_age_max: int, start_date: datetime, end_date: datetime,
         tournament_manager: int, location: str):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     # Ensures that each input is of the correct type, throws an AssertionError
     # with the provided message if not
@@ -176,8 +373,6 @@ def create_tournament(name: str, eligible_gender: str, eligible_age_min: int,
 # Potentially raises sqlite errors, they must be caught by calling function
 def create_game(time: datetime, tournament_id: int, location: str, 
         home_team: int = None, away_team: int = None):
-    conn, curs = get_conn_curs(DB_FILENAME)
-
     # Ensures that each input is of the correct type, throws an AssertionError
     # with the provided message if not
     assert(isinstance(time, datetime)), "time must be a datetime"
@@ -188,26 +383,96 @@ def create_game(time: datetime, tournament_id: int, location: str,
     assert(isinstance(away_team, int) or away_team is None), ("away_team " +
         "must be an int or None")
 
-    game_insert = ("INSERT INTO Games (home_team, away_team, time, " +
-        "location) VALUES (?,?,?,?)")
-    game_data = (home_team, away_team, time, location)
+    with transaction():
+        conn, curs = get_conn_curs(DB_NAME)
 
-    curs.execute(game_insert, game_data)
-    game_id = curs.lastrowid
+        game_insert = ("INSERT INTO Games (home_team, away_team, time, " +
+            "location) VALUES (?,?,?,?)")
+        game_data = (home_team, away_team, time, location)
 
-    game_tournament_insert = ("INSERT INTO GamesInTournaments " +
-        "(tournament_id, game_id) VALUES (?,?)")
-    game_tournament_data = (tournament_id, game_id)
+        curs.execute(game_insert, game_data)
+        game_id = curs.lastrowid
 
-    curs.execute(game_tournament_insert, game_tournament_data)
+        game_tournament_insert = ("INSERT INTO GamesInTournaments " +
+            "(tournament_id, game_id) VALUES (?,?)")
+        game_tournament_data = (tournament_id, game_id)
 
-    commit_close(conn, curs)
+        curs.execute(game_tournament_insert, game_tournament_data)
 
+        commit_close(conn, curs)
+
+
+# Creates many games in one tournament with a single transaction and bulk
+# inserts. Each game is a dictionary with time, location, home_team and
+# away_team (teams may be None). Returns the IDs of the new games in order.
+# Potentially raises sqlite errors, they must be caught by calling function
+def create_games(tournament_id: int, games: list):
+    assert(isinstance(tournament_id, int)), "tournament_id must be an int"
+    for game in games:
+        assert(isinstance(game["time"], datetime)), "time must be a datetime"
+        assert(isinstance(game["location"], str)), ("location must be a " +
+            "string")
+
+    with transaction():
+        conn, curs = get_conn_curs(DB_NAME)
+
+        # New games get IDs above the current largest one, which lets the
+        # tournament links be inserted with one statement
+        curs.execute("SELECT COALESCE(MAX(id), 0) FROM Games")
+        last_game_id = curs.fetchone()[0]
+
+        game_insert = ("INSERT INTO Games (home_team, away_team, time, " +
+            "location) VALUES (?,?,?,?)")
+        game_data = [(game["home_team"], game["away_team"], game["time"],
+            game["location"]) for game in games]
+        curs.executemany(game_insert, game_data)
+
+        game_tournament_insert = ("INSERT INTO GamesInTournaments " +
+            "(tournament_id, game_id) SELECT ?, id FROM Games " +
+            "WHERE id > ? ORDER BY id")
+        curs.execute(game_tournament_insert, [tournament_id, last_game_id])
+
+        curs.execute("SELECT id FROM Games WHERE id > ? ORDER BY id",
+            [last_game_id])
+        game_ids = [row[0] for row in curs.fetchall()]
+
+        commit_close(conn, curs)
+
+    return game_ids
+
+# Creates the games of an elimination bracket and links each game to the game
+# its winner advances to, in one transaction. Each game is a dictionary with
+# time, location, home_team, away_team (teams may be None until decided),
+# round, position, next_index (index in games of the next game, or None for
+# the final) and next_slot ('home' or 'away'). Returns the new game IDs in
+# the order of games.
+# Potentially raises sqlite errors, they must be caught by calling function
+def create_bracket(tournament_id: int, games: list):
+    with transaction():
+        game_ids = create_games(tournament_id, games)
+
+        conn, curs = get_conn_curs(DB_NAME)
+
+        bracket_insert = ("INSERT INTO BracketGames (game_id, " +
+            "tournament_id, round, position, next_game_id, next_slot) " +
+            "VALUES (?,?,?,?,?,?)")
+        bracket_data = []
+        for game_id, game in zip(game_ids, games):
+            next_game_id = None
+            if game["next_index"] is not None:
+                next_game_id = game_ids[game["next_index"]]
+            bracket_data.append((game_id, tournament_id, game["round"],
+                game["position"], next_game_id, game["next_slot"]))
+        curs.executemany(bracket_insert, bracket_data)
+
+        commit_close(conn, curs)
+
+    return game_ids
 
 # Creates a team in Teams table
 def create_team(name: str, team_gender: str, team_age_min: int,
         team_age_max: int, team_manager: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     # Ensures that each input is of the correct type, throws an AssertionError
     # with the provided message if not
@@ -229,8 +494,6 @@ def create_team(name: str, team_gender: str, team_age_min: int,
 # PlayersOnTeams table
 # Potentially raises sqlite errors, they must be caught by calling function
 def create_player(name: str, gender: str, age: int, team_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
-
     # Ensures that each input is of the correct type, throws an AssertionError
     # with the provided message if not
     assert(isinstance(name, str)), "name must be a string"
@@ -238,25 +501,42 @@ def create_player(name: str, gender: str, age: int, team_id: int):
     assert(isinstance(age, int)), "age must be an int"
     assert(isinstance(team_id, int)), "team_id must be an int"
 
-    player_insert = "INSERT INTO Players (name, gender, age) VALUES (?,?,?)"
-    player_data = (name, gender, age)
+    with transaction():
+        conn, curs = get_conn_curs(DB_NAME)
 
-    curs.execute(player_insert, player_data)
-    player_id = curs.lastrowid
+        player_insert = ("INSERT INTO Players (name, gender, age) " +
+            "VALUES (?,?,?)")
+        player_data = (name, gender, age)
 
-    player_team_insert = ("INSERT INTO PlayersOnTeams (team_id, player_id) " +
-        "VALUES (?,?)")
-    player_team_data = (team_id, player_id)
+        curs.execute(player_insert, player_data)
+        player_id = curs.lastrowid
 
-    curs.execute(player_team_insert, player_team_data)
+        player_team_insert = ("INSERT INTO PlayersOnTeams " +
+            "(team_id, player_id) VALUES (?,?)")
+        player_team_data = (team_id, player_id)
 
-    commit_close(conn, curs)
+        curs.execute(player_team_insert, player_team_data)
+
+        # A new player can only widen the age range, so the aggregates are
+        # updated in place
+        team_update = ("UPDATE Teams SET roster_count = roster_count + 1, " +
+            "min_age = CASE WHEN min_age IS NULL OR ? < min_age " +
+            "THEN ? ELSE min_age END, " +
+            "max_age = CASE WHEN max_age IS NULL OR ? > max_age " +
+            "THEN ? ELSE max_age END, " +
+            "male_count = male_count + ?, " +
+            "female_count = female_count + ? WHERE id = ?")
+        is_male = 1 if gender == "m" else 0
+        curs.execute(team_update, [age, age, age, age, is_male, 1 - is_male,
+            team_id])
+
+        commit_close(conn, curs)
 
 # Registers an existing team in an existing tournament by inserting into
 # TournamentRegistrations table
 # Potentially raises sqlite errors, they must be caught by calling function
 def register_team_in_tournament(tournament_id: int, team_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     # Ensures that each input is of the correct type, throws an AssertionError
     # with the provided message if not
@@ -273,38 +553,116 @@ def register_team_in_tournament(tournament_id: int, team_id: int):
 
 def create_game_score(game_id: int, home_team_score: int, 
         away_team_score: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
-
     assert(isinstance(game_id, int)), "game_id must be an int"
     assert(isinstance(home_team_score, int)), "home_team_score must be an int"
     assert(isinstance(away_team_score, int)), "away_team_score must be an int"
 
-    score_insert = ("INSERT INTO Scores (home_team_score, away_team_score) " +
-        "VALUES (?,?)")
-    score_data = (home_team_score, away_team_score)
-
-    curs.execute(score_insert, score_data)
-    score_id = curs.lastrowid
-
-    game_score_insert = ("INSERT INTO GameScores (game_id, score_id) " +
-        "VALUES (?,?)")
-    game_score_data = (game_id, score_id)
-
-    curs.execute(game_score_insert, game_score_data)
+    with transaction():
+        conn, curs = get_conn_curs(DB_NAME)
+
+        score_insert = ("INSERT INTO Scores " +
+            "(home_team_score, away_team_score) VALUES (?,?)")
+        score_data = (home_team_score, away_team_score)
+
+        curs.execute(score_insert, score_data)
+        score_id = curs.lastrowid
+
+        game_score_insert = ("INSERT INTO GameScores (game_id, score_id) " +
+            "VALUES (?,?)")
+        game_score_data = (game_id, score_id)
+
+        curs.execute(game_score_insert, game_score_data)
+
+        # The newest score becomes the game's current score, older ones stay
+        # in GameScores as history
+        curs.execute("UPDATE Games SET current_score = ? WHERE id = ?",
+            [score_id, game_id])
+
+        advance_bracket_winner(curs, game_id, home_team_score,
+            away_team_score)
+
+        curs.execute("SELECT Games.home_team, HomeTeams.name, " +
+            "Games.away_team, AwayTeams.name, (" +
+            "SELECT tournament_id FROM GamesInTournaments " +
+            "WHERE game_id = Games.id) FROM Games " +
+            "LEFT JOIN Teams AS HomeTeams ON HomeTeams.id = Games.home_team " +
+            "LEFT JOIN Teams AS AwayTeams ON AwayTeams.id = Games.away_team " +
+            "WHERE Games.id = ?", [game_id])
+        game = curs.fetchone()
+
+        # Live score watchers get the changed game once the score commits
+        events.publish_on_commit(DB_NAME, events.SCORE_TOPIC, {
+            "game_id": game_id,
+            "tournament_id": game[4],
+            "home_team": game[0],
+            "home_team_name": game[1],
+            "away_team": game[2],
+            "away_team_name": game[3],
+            "homescore": home_team_score,
+            "awayscore": away_team_score,
+            "score_id": score_id
+        })
+
+        commit_close(conn, curs)
+
+# Statements that place a bracket winner into the next game, by next_slot
+ADVANCE_WINNER_UPDATES = {
+    "home": "UPDATE Games SET home_team = ? WHERE id = ?",
+    "away": "UPDATE Games SET away_team = ? WHERE id = ?"
+}
+
+# If the game is part of an elimination bracket, puts the winner into their
+# slot of the next round's game. Uses only primary-key lookups on the
+# game, so advancing costs the same however large the bracket is. A
+# corrected score replaces the previously advanced team, and a tie leaves
+# the slot empty. Once the next round's game has a score, the teams that
+# played it can no longer change, so a correction raises an Exception.
+def advance_bracket_winner(curs, game_id: int, home_team_score: int,
+        away_team_score: int):
+    select = ("SELECT BracketGames.next_game_id, BracketGames.next_slot, " +
+        "Games.home_team, Games.away_team, NextGames.current_score " +
+        "FROM BracketGames " +
+        "JOIN Games ON Games.id = BracketGames.game_id " +
+        "LEFT JOIN Games AS NextGames " +
+        "ON NextGames.id = BracketGames.next_game_id " +
+        "WHERE BracketGames.game_id = ?")
+    curs.execute(select, [game_id])
+    bracket_game = curs.fetchone()
+
+    if not bracket_game or bracket_game[0] is None:
+        return
+
+    next_game_id, next_slot, home_team, away_team, next_score = bracket_game
+    if next_score is not None:
+        raise Exception("The next round's game already has a score")
+
+    if home_team_score > away_team_score:
+        winner = home_team
+    elif away_team_score > home_team_score:
+        winner = away_team
+    else:
+        winner = None
 
-    commit_close(conn, curs)
+    curs.execute(ADVANCE_WINNER_UPDATES[next_slot], [winner, next_game_id])
 
 ###############################################################################
 # READ
 ###############################################################################
 
+# Read functions connect to the primary database, so that what they return
+# includes every committed write, and the pickers, checks and reads that
+# decide writes never act on stale data. The bulk reads made for reports
+# (scored game columns and the streaming JSON reads) connect with
+# get_read_conn_curs instead: they are served by the read replica when the
+# caller opts in with read_from_replica (see database/storage.py).
+
 # Gets all tournaments in the Tournaments table
 # Return format is a dictionary where key is the ID of the tournament
 # and value is another dictionary with tournament_id, name, eligible_gender, 
 # eligible_age_min, eligible_age_max, start_date, end_date, and 
 # registered_teams (which is a list of dictionaries of each team's information)
 def get_all_tournaments():
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Tournaments")
     rows = curs.fetchall()
@@ -325,7 +683,7 @@ def get_all_tournaments():
 # user's information), and roster (which is a list of dictionaries of each
 # player's information)
 def get_all_teams():
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Teams")
     rows = curs.fetchall()
@@ -340,7 +698,7 @@ def get_all_teams():
     return teams
 
 def get_teams_by_manager(manager_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Teams WHERE team_manager = ?",
                  [manager_id])
@@ -355,8 +713,21 @@ def get_teams_by_manager(manager_id: int):
 
     return teams
 
+# Gets the name of every team in one read
+# Return format is a dictionary where key is the ID of the team and value is
+# its name
+def get_team_names():
+    conn, curs = get_conn_curs(DB_NAME)
+
+    curs.execute("SELECT id, name FROM Teams")
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    return dict(rows)
+
 def get_players_by_team(team_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     select_roster = "SELECT * FROM PlayersOnTeams WHERE team_id = ?"
     select_data = [team_id]
@@ -373,21 +744,94 @@ def get_players_by_team(team_id: int):
 
     return players
 
+# Gets the ID of the tournament with exactly the given name, or False if
+# there is none
 def get_tournament_by_name(tournament_name: str):
-    # Is tournament name in database?
-    conn, curs = get_conn_curs(DB_FILENAME)
-    query = "SELECT * FROM Tournaments WHERE name = '{}'".format(tournament_name)
+    conn, curs = get_conn_curs(DB_NAME)
 
-    curs.execute(query)
-    rows = curs.fetchall()
-    if len(rows) > 0:
-        ids = rows[0][0]
-        return ids
-    else:
+    curs.execute("SELECT id FROM Tournaments WHERE name = ? LIMIT 1",
+        [tournament_name])
+    row = curs.fetchone()
+
+    commit_close(conn, curs)
+
+    if row is None:
         return False
+    return row[0]
+
+# Searches the names in one table through its search table, best match first.
+# A query of three characters or more matches names containing it, ranked by
+# relevance with names starting with the query first. If that finds fewer
+# than limit names, names sharing only some of the query's trigrams are added
+# (fuzzy matching, so a typo still finds the name), ranked by how many they
+# share. Shorter queries match names starting with the query.
+# Returns a list of (id, name) tuples.
+def search_names(table: str, search_table: str, query: str, limit: int):
+    assert(isinstance(query, str)), "query must be a string"
+    assert(isinstance(limit, int)), "limit must be an int"
+
+    query = query.strip()
+    if not query:
+        return []
+
+    conn, curs = get_conn_curs(DB_NAME)
+
+    if len(query) < 3:
+        curs.execute("SELECT id, name FROM " + table + " " +
+            "WHERE name LIKE ? ESCAPE '\\' ORDER BY name LIMIT ?",
+            [get_like_prefix(query), limit])
+        results = curs.fetchall()
+        commit_close(conn, curs)
+        return results
+
+    # Double quotes make each term a literal string for FTS5
+    phrase = '"' + query.replace('"', '""') + '"'
+    curs.execute("SELECT rowid, name FROM " + search_table + " " +
+        "WHERE " + search_table + " MATCH ? " +
+        "ORDER BY instr(lower(name), lower(?)) != 1, rank LIMIT ?",
+        [phrase, query, limit])
+    results = curs.fetchall()
+
+    if len(results) < limit:
+        trigrams = {query[index:index + 3].lower()
+            for index in range(len(query) - 2)}
+        fuzzy = " OR ".join('"' + trigram.replace('"', '""') + '"'
+            for trigram in sorted(trigrams))
+        found = {row[0] for row in results}
+        curs.execute("SELECT rowid, name FROM " + search_table + " " +
+            "WHERE " + search_table + " MATCH ? ORDER BY rank LIMIT ?",
+            [fuzzy, limit + len(found)])
+        for row in curs.fetchall():
+            if len(results) < limit and row[0] not in found:
+                results.append(row)
+
+    commit_close(conn, curs)
+
+    return results
+
+# Searches tournaments by name, see search_names
+# Return format is a list of dictionaries with tournament_id and name, best
+# match first
+def search_tournaments(query: str, limit: int = 20):
+    return [{"tournament_id": row[0], "name": row[1]} for row in
+        search_names("Tournaments", "TournamentSearch", query, limit)]
+
+# Searches teams by name, see search_names
+# Return format is a list of dictionaries with team_id and name, best match
+# first
+def search_teams(query: str, limit: int = 20):
+    return [{"team_id": row[0], "name": row[1]} for row in
+        search_names("Teams", "TeamSearch", query, limit)]
+
+# Searches players by name, see search_names
+# Return format is a list of dictionaries with player_id and name, best
+# match first
+def search_players(query: str, limit: int = 20):
+    return [{"player_id": row[0], "name": row[1]} for row in
+        search_names("Players", "PlayerSearch", query, limit)]
 
 def get_tournaments_by_manager(manager_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Tournaments WHERE tournament_manager = ?",
                  [manager_id])
@@ -403,7 +847,7 @@ def get_tournaments_by_manager(manager_id: int):
     return tournaments
 
 def get_tournament_by_id(tournament_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Tournaments WHERE id = ?", [tournament_id])
     rows = curs.fetchall()
@@ -442,29 +886,76 @@ def get_tournament_by_id(tournament_id: int):
 
     return tournament
 
+# Returns the current (most recent) score of the game as a dictionary with
+# homescore and awayscore, or None if the game has no score yet
 def get_score_by_game(game_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
-    select = ("SELECT * FROM GameScores " +
-        "WHERE game_id = ?")
+    select = ("SELECT Scores.home_team_score, Scores.away_team_score " +
+        "FROM Games JOIN Scores ON Scores.id = Games.current_score " +
+        "WHERE Games.id = ?")
     select_data = [game_id]
 
     curs.execute(select, select_data)
-    score_id = curs.fetchall()
+    score = curs.fetchone()
 
     commit_close(conn, curs)
 
-    # print(f"score id {score_id}")
-
-    # use most recent score
-    if score_id:
-        return get_score_by_id(score_id[-1][1]) 
+    if score:
+        return {"homescore": score[0], "awayscore": score[1]}
     else:
         return None
 
+# Returns the current scores of every scored game in the tournament
+# Return format is a dictionary where key is the ID of the game and value is
+# a dictionary with homescore and awayscore
+def get_scores_by_tournament(tournament_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select = ("SELECT Games.id, Scores.home_team_score, " +
+        "Scores.away_team_score FROM GamesInTournaments " +
+        "JOIN Games ON Games.id = GamesInTournaments.game_id " +
+        "JOIN Scores ON Scores.id = Games.current_score " +
+        "WHERE GamesInTournaments.tournament_id = ?")
+    select_data = [tournament_id]
+
+    curs.execute(select, select_data)
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    scores = {}
+    for row in rows:
+        scores[row[0]] = {"homescore": row[1], "awayscore": row[2]}
+
+    return scores
+
+# Returns every score ever recorded for the game, oldest first, including
+# corrections. Each score is a dictionary with score_id, homescore and
+# awayscore.
+def get_score_history_by_game(game_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select = ("SELECT Scores.id, Scores.home_team_score, " +
+        "Scores.away_team_score FROM GameScores " +
+        "JOIN Scores ON Scores.id = GameScores.score_id " +
+        "WHERE GameScores.game_id = ? ORDER BY GameScores.rowid")
+    select_data = [game_id]
+
+    curs.execute(select, select_data)
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    history = []
+    for row in rows:
+        history.append({"score_id": row[0], "homescore": row[1],
+            "awayscore": row[2]})
+
+    return history
 
 def get_score_by_id(score_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     select = ("SELECT * FROM Scores " +
         "WHERE id = ?")
@@ -480,7 +971,7 @@ def get_score_by_id(score_id: int):
     return {"homescore": score[0][1], "awayscore": score[0][2]}
 
 def get_games_by_tournament(tournament_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     select_games = ("SELECT * FROM GamesInTournaments " +
         "WHERE tournament_id = ?")
@@ -498,8 +989,266 @@ def get_games_by_tournament(tournament_id: int):
 
     return games
 
+# Gets the schedule and results of a tournament in a single joined read
+# Return format is a list of dictionaries ordered by game time, each with
+# game_id, time, location, home_team, home_team_name, away_team,
+# away_team_name, homescore and awayscore. Team fields are None for games
+# without that team yet and score fields are None for unscored games.
+def get_tournament_schedule(tournament_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select = ("SELECT Games.id, Games.time, Games.location, " +
+        "Games.home_team, HomeTeams.name, Games.away_team, AwayTeams.name, " +
+        "Scores.home_team_score, Scores.away_team_score " +
+        "FROM GamesInTournaments " +
+        "JOIN Games ON Games.id = GamesInTournaments.game_id " +
+        "LEFT JOIN Teams AS HomeTeams ON HomeTeams.id = Games.home_team " +
+        "LEFT JOIN Teams AS AwayTeams ON AwayTeams.id = Games.away_team " +
+        "LEFT JOIN Scores ON Scores.id = Games.current_score " +
+        "WHERE GamesInTournaments.tournament_id = ? " +
+        "ORDER BY Games.time, Games.id")
+    select_data = [tournament_id]
+
+    curs.execute(select, select_data)
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    schedule = []
+    for row in rows:
+        schedule.append({
+            "game_id": row[0],
+            "time": row[1],
+            "location": row[2],
+            "home_team": row[3],
+            "home_team_name": row[4],
+            "away_team": row[5],
+            "away_team_name": row[6],
+            "homescore": row[7],
+            "awayscore": row[8]
+        })
+
+    return schedule
+
+# Finds bookings that overlap a proposed game: games at the same location,
+# and games of either team, starting less than GAME_DURATION apart.
+# Return format is the same as get_batch_game_conflicts.
+def get_game_conflicts(time: datetime, location: str, home_team: int = None,
+        away_team: int = None):
+    proposed_game = {
+        "time": time,
+        "location": location,
+        "home_team": home_team,
+        "away_team": away_team
+    }
+    return get_batch_game_conflicts([proposed_game])
+
+# Finds every conflict for a batch of proposed games at once, both against
+# existing games and between games of the batch. Each proposed game is a
+# dictionary with time, location, home_team and away_team (teams may be None).
+# Existing games are found with range scans on the (location, time),
+# (home_team, time) and (away_team, time) indexes, never a table scan.
+# Return format is a list of dictionaries with index (position of the proposed
+# game in the batch), conflict ("location", "home_team" or "away_team", the
+# proposed game's field that clashes), and either game_id (an existing game)
+# or other_index (another game of the batch), the other being None.
+def get_batch_game_conflicts(games: list):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select_location = ("SELECT id FROM Games WHERE location = ? " +
+        "AND time > ? AND time < ?")
+    select_team = ("SELECT id FROM Games WHERE home_team = ? " +
+        "AND time > ? AND time < ? UNION SELECT id FROM Games " +
+        "WHERE away_team = ? AND time > ? AND time < ?")
+
+    conflicts = []
+    for index, game in enumerate(games):
+        start = game["time"] - GAME_DURATION
+        end = game["time"] + GAME_DURATION
+
+        curs.execute(select_location, [game["location"], start, end])
+        for row in curs.fetchall():
+            conflicts.append({"index": index, "conflict": "location",
+                "game_id": row[0], "other_index": None})
+
+        for field in ["home_team", "away_team"]:
+            team_id = game[field]
+            if team_id is None:
+                continue
+            curs.execute(select_team, [team_id, start, end,
+                team_id, start, end])
+            for row in curs.fetchall():
+                conflicts.append({"index": index, "conflict": field,
+                    "game_id": row[0], "other_index": None})
+
+    commit_close(conn, curs)
+
+    conflicts.extend(get_conflicts_within_batch(games))
+
+    return conflicts
+
+# Finds conflicts between the proposed games themselves. Bookings are grouped
+# by location and by team, and each group is swept in time order so only
+# neighbouring bookings less than GAME_DURATION apart are compared.
+def get_conflicts_within_batch(games: list):
+    # Maps ("location", name) or ("team", id) to a list of
+    # (time, index, field) bookings
+    bookings = {}
+    for index, game in enumerate(games):
+        bookings.setdefault(("location", game["location"]), []).append(
+            (game["time"], index, "location"))
+        for field in ["home_team", "away_team"]:
+            if game[field] is not None:
+                bookings.setdefault(("team", game[field]), []).append(
+                    (game["time"], index, field))
+
+    conflicts = []
+    for resource_bookings in bookings.values():
+        resource_bookings.sort()
+        for position, (time, index, field) in enumerate(resource_bookings):
+            for earlier in range(position - 1, -1, -1):
+                earlier_time, earlier_index, _ = resource_bookings[earlier]
+                if time - earlier_time >= GAME_DURATION:
+                    break
+                if earlier_index != index:
+                    conflicts.append({"index": index, "conflict": field,
+                        "game_id": None, "other_index": earlier_index})
+
+    return conflicts
+
+# Gets every game starting in [start, end), across all tournaments
+# Return format is a list of dictionaries with game_id, home_team, away_team,
+# time (a datetime) and location
+def get_games_between(start: datetime, end: datetime):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select = ("SELECT id, home_team, away_team, time, location FROM Games " +
+        "WHERE time >= ? AND time < ?")
+    curs.execute(select, [start, end])
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    games = []
+    for row in rows:
+        games.append({
+            "game_id": row[0],
+            "home_team": row[1],
+            "away_team": row[2],
+            "time": datetime.fromisoformat(row[3]),
+            "location": row[4]
+        })
+
+    return games
+
+# Gets the elimination bracket of a tournament
+# Return format is a list of dictionaries ordered by round and position, each
+# with game_id, round, position, home_team, away_team, next_game_id and
+# next_slot
+def get_bracket(tournament_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select = ("SELECT BracketGames.game_id, BracketGames.round, " +
+        "BracketGames.position, Games.home_team, Games.away_team, " +
+        "BracketGames.next_game_id, BracketGames.next_slot " +
+        "FROM BracketGames JOIN Games ON Games.id = BracketGames.game_id " +
+        "WHERE BracketGames.tournament_id = ? " +
+        "ORDER BY BracketGames.round, BracketGames.position")
+    curs.execute(select, [tournament_id])
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    bracket = []
+    for row in rows:
+        bracket.append({
+            "game_id": row[0],
+            "round": row[1],
+            "position": row[2],
+            "home_team": row[3],
+            "away_team": row[4],
+            "next_game_id": row[5],
+            "next_slot": row[6]
+        })
+
+    return bracket
+
+# Gets the IDs of the bracket games whose winners advance to the given game
+def get_feeder_game_ids(game_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    curs.execute("SELECT game_id FROM BracketGames WHERE next_game_id = ? " +
+        "ORDER BY position", [game_id])
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    return [row[0] for row in rows]
+
+# Gets the games of a tournament that have both teams but no score yet, in
+# columns: game_id, time, home_team and away_team, all in game time order
+def get_unplayed_game_columns(tournament_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select = ("SELECT Games.id, Games.time, Games.home_team, " +
+        "Games.away_team FROM GamesInTournaments " +
+        "JOIN Games ON Games.id = GamesInTournaments.game_id " +
+        "WHERE GamesInTournaments.tournament_id = ? " +
+        "AND Games.current_score IS NULL AND Games.home_team IS NOT NULL " +
+        "AND Games.away_team IS NOT NULL ORDER BY Games.time, Games.id")
+    curs.execute(select, [tournament_id])
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    names = ["game_id", "time", "home_team", "away_team"]
+    if rows:
+        columns = [list(column) for column in zip(*rows)]
+    else:
+        columns = [[] for name in names]
+
+    return dict(zip(names, columns))
+
+# Gets every scored game between two teams in one read, in columns rather
+# than one dictionary per game, for bulk processing such as ratings
+# Only games whose current score is newer than since_score_id are returned,
+# so callers can fetch just the results added since their last read. If
+# tournament_id is given, only that tournament's games are returned.
+# Return format is a dictionary of lists, all in game time order: game_id,
+# score_id, time, home_team, away_team, home_team_score and away_team_score
+def get_scored_game_columns(since_score_id: int = 0,
+        tournament_id: int = None):
+    conn, curs = get_read_conn_curs(DB_NAME)
+
+    select = ("SELECT Games.id, Games.current_score, Games.time, " +
+        "Games.home_team, Games.away_team, Scores.home_team_score, " +
+        "Scores.away_team_score FROM Games " +
+        "JOIN Scores ON Scores.id = Games.current_score ")
+    select_data = [since_score_id]
+    if tournament_id is not None:
+        select += ("JOIN GamesInTournaments ON " +
+            "GamesInTournaments.game_id = Games.id " +
+            "AND GamesInTournaments.tournament_id = ? ")
+        select_data = [tournament_id, since_score_id]
+    select += ("WHERE Games.current_score > ? " +
+        "AND Games.home_team IS NOT NULL AND Games.away_team IS NOT NULL " +
+        "ORDER BY Games.time, Games.id")
+    curs.execute(select, select_data)
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    names = ["game_id", "score_id", "time", "home_team", "away_team",
+        "home_team_score", "away_team_score"]
+    if rows:
+        columns = [list(column) for column in zip(*rows)]
+    else:
+        columns = [[] for name in names]
+
+    return dict(zip(names, columns))
+
 def get_game_by_id(game_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Games WHERE id = ?", [game_id])
     rows = curs.fetchall()
@@ -522,7 +1271,7 @@ def get_game_by_id(game_id: int):
     return game
 
 def get_team_by_id(team_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Teams WHERE id = ?", [team_id])
     rows = curs.fetchall()
@@ -558,7 +1307,7 @@ def get_team_by_id(team_id: int):
     return team
 
 def get_player_by_id(player_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Players WHERE id = ?", [player_id])
     rows = curs.fetchall()
@@ -580,7 +1329,7 @@ def get_player_by_id(player_id: int):
     return player
 
 def get_team_manager_id(team_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Teams WHERE id = ?", [team_id])
     rows = curs.fetchall()
@@ -595,7 +1344,7 @@ def get_team_manager_id(team_id: int):
     return team_manager_id
 
 def get_tournament_manager_id(tournament_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Tournaments WHERE id = ?", [tournament_id])
     rows = curs.fetchall()
@@ -610,7 +1359,7 @@ def get_tournament_manager_id(tournament_id: int):
     return tounament_manager_id
 
 def get_team_ids():
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Teams")
     rows = curs.fetchall()
@@ -624,7 +1373,7 @@ def get_team_ids():
     return team_ids
 
 def get_tournament_ids():
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Tournaments")
     rows = curs.fetchall()
@@ -638,7 +1387,7 @@ def get_tournament_ids():
     return tournament_ids
 
 def get_player_ids():
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Players")
     rows = curs.fetchall()
@@ -651,78 +1400,435 @@ def get_player_ids():
     commit_close(conn, curs)
     return player_ids
 
-# Returns team actual age range
-# Returns none, none if no players
-def get_team_age_range(team_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+# Gets one page of the IDs and names in a table, ordered by ID, so that
+# pickers can load entries as the user scrolls instead of all at once.
+# after_id is the last ID of the previous page, 0 for the first page, which
+# makes each page a range scan on the primary key. If query is given, only
+# names containing it are kept, through the table's search index (see
+# create_search_tables); queries shorter than three characters match the
+# start of names. conditions are extra SQL conditions on the table, with
+# their values in data.
+# Returns a list of (id, name) tuples.
+def get_name_page(table: str, search_table: str, after_id: int, limit: int,
+        query: str = None, conditions: list = None, data: list = None):
+    assert(isinstance(after_id, int)), "after_id must be an int"
+    assert(isinstance(limit, int)), "limit must be an int"
+
+    conditions = ["id > ?"] + (conditions or [])
+    data = [after_id] + (data or [])
+    if query is not None and query.strip():
+        query = query.strip()
+        if len(query) < 3:
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            data.append(get_like_prefix(query))
+        else:
+            conditions.append("id IN (SELECT rowid FROM " + search_table +
+                " WHERE " + search_table + " MATCH ?)")
+            data.append('"' + query.replace('"', '""') + '"')
 
-    curs.execute("SELECT * FROM Teams WHERE id = ?", [team_id])
+    conn, curs = get_conn_curs(DB_NAME)
+
+    curs.execute("SELECT id, name FROM " + table + " WHERE " +
+        " AND ".join(conditions) + " ORDER BY id LIMIT ?", data + [limit])
     rows = curs.fetchall()
 
-    if len(rows) < 1:
-        raise Exception("Team does not exist")
+    commit_close(conn, curs)
 
-    select_roster = "SELECT * FROM PlayersOnTeams WHERE team_id = ?"
-    select_data = [team_id]
+    return rows
+
+# Gets one page of tournaments, optionally only those managed by manager_id,
+# see get_name_page
+# Return format is a list of dictionaries with tournament_id and name
+def get_tournament_page(after_id: int = 0, limit: int = 20,
+        query: str = None, manager_id: int = None):
+    conditions = []
+    data = []
+    if manager_id is not None:
+        conditions.append("tournament_manager = ?")
+        data.append(manager_id)
+    rows = get_name_page("Tournaments", "TournamentSearch", after_id, limit,
+        query, conditions, data)
+    return [{"tournament_id": row[0], "name": row[1]} for row in rows]
+
+# Gets one page of teams, optionally only those managed by manager_id, see
+# get_name_page
+# Return format is a list of dictionaries with team_id and name
+def get_team_page(after_id: int = 0, limit: int = 20, query: str = None,
+        manager_id: int = None):
+    conditions = []
+    data = []
+    if manager_id is not None:
+        conditions.append("team_manager = ?")
+        data.append(manager_id)
+    rows = get_name_page("Teams", "TeamSearch", after_id, limit, query,
+        conditions, data)
+    return [{"team_id": row[0], "name": row[1]} for row in rows]
+
+# Gets one page of the games of a tournament, ordered by ID. after_id is the
+# last ID of the previous page, 0 for the first page. If query is given, only
+# games at a location starting with it are kept.
+# Return format is a list of dictionaries with game_id, time and location
+def get_game_page(tournament_id: int, after_id: int = 0, limit: int = 20,
+        query: str = None):
+    select_games = ("SELECT Games.id, Games.time, Games.location " +
+        "FROM GamesInTournaments " +
+        "JOIN Games ON Games.id = GamesInTournaments.game_id " +
+        "WHERE GamesInTournaments.tournament_id = ? " +
+        "AND GamesInTournaments.game_id > ? ")
+    select_data = [tournament_id, after_id]
+    if query is not None and query.strip():
+        select_games += "AND Games.location LIKE ? ESCAPE '\\' "
+        select_data.append(get_like_prefix(query.strip()))
+    select_games += "ORDER BY GamesInTournaments.game_id LIMIT ?"
+    select_data.append(limit)
+
+    conn, curs = get_conn_curs(DB_NAME)
 
-    curs.execute(select_roster, select_data)
-    roster = curs.fetchall()
+    curs.execute(select_games, select_data)
+    rows = curs.fetchall()
 
-    min_age = None
-    max_age = None
-    for roster_item in roster:
-        player_id = roster_item[1]
-        age = get_player_by_id(player_id)["age"]
-        if not max_age or age > max_age:
-            max_age = age
-        if not min_age or age < min_age:
-            min_age = age
+    commit_close(conn, curs)
+
+    return [{"game_id": row[0], "time": row[1], "location": row[2]}
+        for row in rows]
+
+# Gets the IDs of the tournaments that ended before the given time,
+# optionally only those managed by manager_id
+def get_finished_tournament_ids(before: datetime, manager_id: int = None):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select_tournaments = "SELECT id FROM Tournaments WHERE end_date < ? "
+    select_data = [str(before)]
+    if manager_id is not None:
+        select_tournaments += "AND tournament_manager = ? "
+        select_data.append(manager_id)
+    curs.execute(select_tournaments + "ORDER BY id", select_data)
+    rows = curs.fetchall()
 
     commit_close(conn, curs)
-    return min_age, max_age
 
-# Returns team genders: m, f, or mixed
-# Returns none if no players
-def get_team_gender_range(team_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    return [row[0] for row in rows]
+
+# Gets everything about a tournament that is kept when it is archived, in a
+# few set-based reads
+# Return format is a dictionary with tournament (a dictionary with
+# tournament_id, name, eligible_gender, eligible_age_min, eligible_age_max,
+# start_date, end_date, tournament_manager, location and is_reg_open),
+# registrations (a list of dictionaries with team_id and name, one per team
+# even if it was registered more than once) and games (the list from
+# get_tournament_schedule)
+def get_tournament_export(tournament_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    curs.execute("SELECT id, name, eligible_gender, eligible_age_min, " +
+        "eligible_age_max, start_date, end_date, tournament_manager, " +
+        "location, is_reg_open FROM Tournaments WHERE id = ?",
+        [tournament_id])
+    row = curs.fetchone()
+    if row is None:
+        commit_close(conn, curs)
+        raise Exception("Tournament does not exist")
 
-    curs.execute("SELECT * FROM Teams WHERE id = ?", [team_id])
+    curs.execute("SELECT Teams.id, Teams.name " +
+        "FROM TournamentRegistrations " +
+        "JOIN Teams ON Teams.id = TournamentRegistrations.team_id " +
+        "WHERE TournamentRegistrations.tournament_id = ? " +
+        "GROUP BY Teams.id " +
+        "ORDER BY MIN(TournamentRegistrations.rowid)", [tournament_id])
+    registrations = [{"team_id": team[0], "name": team[1]}
+        for team in curs.fetchall()]
+
+    commit_close(conn, curs)
+
+    columns = ["tournament_id", "name", "eligible_gender", "eligible_age_min",
+        "eligible_age_max", "start_date", "end_date", "tournament_manager",
+        "location", "is_reg_open"]
+    return {
+        "tournament": dict(zip(columns, row)),
+        "registrations": registrations,
+        "games": get_tournament_schedule(tournament_id)
+    }
+
+# Streaming JSON reads for machine-readable output (see backend/export.py).
+# Each record is encoded by SQLite's json_object as the rows are read, and
+# rows are fetched EXPORT_BATCH at a time, so a whole league is exported
+# without building Python dictionaries for it or holding it in memory.
+# Every function yields one JSON object (a string) per record. The optional
+# filter limits the records to one tournament or team.
+
+# Rows fetched at a time by the streaming reads
+EXPORT_BATCH = 500
+
+# Runs a query whose rows are single JSON objects and yields them
+def stream_json_rows(query: str, query_data: list):
+    conn, curs = get_read_conn_curs(DB_NAME)
+    try:
+        curs.execute(query, query_data)
+        while True:
+            rows = curs.fetchmany(EXPORT_BATCH)
+            if not rows:
+                break
+            for row in rows:
+                yield row[0]
+    finally:
+        commit_close(conn, curs)
+
+# Yields tournaments, with tournament_id, name, eligible_gender,
+# eligible_age_min, eligible_age_max, start_date, end_date,
+# tournament_manager (a user ID), location, is_reg_open and
+# registered_team_ids (a list of team IDs)
+def stream_tournaments_json(tournament_id: int = None):
+    query = ("SELECT json_object('tournament_id', id, 'name', name, " +
+        "'eligible_gender', eligible_gender, " +
+        "'eligible_age_min', eligible_age_min, " +
+        "'eligible_age_max', eligible_age_max, " +
+        "'start_date', start_date, 'end_date', end_date, " +
+        "'tournament_manager', tournament_manager, 'location', location, " +
+        "'is_reg_open', is_reg_open, 'registered_team_ids', " +
+        "json((SELECT json_group_array(team_id) " +
+        "FROM TournamentRegistrations " +
+        "WHERE TournamentRegistrations.tournament_id = Tournaments.id))) " +
+        "FROM Tournaments")
+    query_data = []
+    if tournament_id is not None:
+        query += " WHERE id = ?"
+        query_data.append(tournament_id)
+    query += " ORDER BY id"
+    return stream_json_rows(query, query_data)
+
+# Yields teams, with team_id, name, team_gender, team_age_min, team_age_max,
+# team_manager (a user ID) and roster_count
+def stream_teams_json(team_id: int = None):
+    query = ("SELECT json_object('team_id', id, 'name', name, " +
+        "'team_gender', team_gender, 'team_age_min', team_age_min, " +
+        "'team_age_max', team_age_max, 'team_manager', team_manager, " +
+        "'roster_count', roster_count) FROM Teams")
+    query_data = []
+    if team_id is not None:
+        query += " WHERE id = ?"
+        query_data.append(team_id)
+    query += " ORDER BY id"
+    return stream_json_rows(query, query_data)
+
+# Yields a record for every player on a team, with team_id, player_id, name,
+# gender and age
+def stream_rosters_json(team_id: int = None):
+    query = ("SELECT json_object('team_id', PlayersOnTeams.team_id, " +
+        "'player_id', Players.id, 'name', Players.name, " +
+        "'gender', Players.gender, 'age', Players.age) " +
+        "FROM PlayersOnTeams " +
+        "JOIN Players ON Players.id = PlayersOnTeams.player_id")
+    query_data = []
+    if team_id is not None:
+        query += " WHERE PlayersOnTeams.team_id = ?"
+        query_data.append(team_id)
+    query += " ORDER BY PlayersOnTeams.team_id, PlayersOnTeams.rowid"
+    return stream_json_rows(query, query_data)
+
+# Yields games, with game_id, tournament_id, time, location, home_team,
+# home_team_name, away_team, away_team_name, homescore and awayscore (the
+# current score, null if there is none), in order of time
+def stream_games_json(tournament_id: int = None):
+    query = ("SELECT json_object('game_id', Games.id, " +
+        "'tournament_id', GamesInTournaments.tournament_id, " +
+        "'time', Games.time, 'location', Games.location, " +
+        "'home_team', Games.home_team, 'home_team_name', HomeTeams.name, " +
+        "'away_team', Games.away_team, 'away_team_name', AwayTeams.name, " +
+        "'homescore', Scores.home_team_score, " +
+        "'awayscore', Scores.away_team_score) " +
+        "FROM Games " +
+        "LEFT JOIN GamesInTournaments " +
+        "ON GamesInTournaments.game_id = Games.id " +
+        "LEFT JOIN Teams AS HomeTeams ON HomeTeams.id = Games.home_team " +
+        "LEFT JOIN Teams AS AwayTeams ON AwayTeams.id = Games.away_team " +
+        "LEFT JOIN Scores ON Scores.id = Games.current_score")
+    query_data = []
+    if tournament_id is not None:
+        query += " WHERE GamesInTournaments.tournament_id = ?"
+        query_data.append(tournament_id)
+    query += " ORDER BY Games.time, Games.id"
+    return stream_json_rows(query, query_data)
+
+# Yields every score entered for a game, oldest first, with score_id,
+# game_id, homescore, awayscore and is_current (1 for the game's current
+# score, 0 for a score that was replaced)
+def stream_scores_json(tournament_id: int = None):
+    query = ("SELECT json_object('score_id', Scores.id, " +
+        "'game_id', GameScores.game_id, " +
+        "'homescore', Scores.home_team_score, " +
+        "'awayscore', Scores.away_team_score, " +
+        "'is_current', Games.current_score IS Scores.id) " +
+        "FROM GameScores " +
+        "JOIN Scores ON Scores.id = GameScores.score_id " +
+        "JOIN Games ON Games.id = GameScores.game_id")
+    query_data = []
+    if tournament_id is not None:
+        query += (" JOIN GamesInTournaments " +
+            "ON GamesInTournaments.game_id = GameScores.game_id " +
+            "WHERE GamesInTournaments.tournament_id = ?")
+        query_data.append(tournament_id)
+    query += " ORDER BY GameScores.game_id, Scores.id"
+    return stream_json_rows(query, query_data)
+
+# Projections for menu pickers and input validation. These read only the
+# columns they return, instead of loading every row or building full team
+# and tournament dictionaries.
+
+# Gets the ID and name of every tournament, or only of the tournaments
+# managed by manager_id
+# Return format is a dictionary where key is the ID of the tournament and
+# value is a dictionary with tournament_id and name
+def get_tournament_summaries(manager_id: int = None):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    if manager_id is None:
+        curs.execute("SELECT id, name FROM Tournaments ORDER BY id")
+    else:
+        curs.execute("SELECT id, name FROM Tournaments " +
+            "WHERE tournament_manager = ? ORDER BY id", [manager_id])
     rows = curs.fetchall()
 
-    if len(rows) < 1:
+    commit_close(conn, curs)
+
+    return {row[0]: {"tournament_id": row[0], "name": row[1]}
+        for row in rows}
+
+# Gets the ID and name of every team, or only of the teams managed by
+# manager_id
+# Return format is a dictionary where key is the ID of the team and value is
+# a dictionary with team_id and name
+def get_team_summaries(manager_id: int = None):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    if manager_id is None:
+        curs.execute("SELECT id, name FROM Teams ORDER BY id")
+    else:
+        curs.execute("SELECT id, name FROM Teams WHERE team_manager = ? " +
+            "ORDER BY id", [manager_id])
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    return {row[0]: {"team_id": row[0], "name": row[1]} for row in rows}
+
+# Gets the ID and name of every player on the team
+# Return format is a dictionary where key is the ID of the player and value
+# is a dictionary with player_id and name
+def get_player_summaries(team_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    curs.execute("SELECT Players.id, Players.name FROM PlayersOnTeams " +
+        "JOIN Players ON Players.id = PlayersOnTeams.player_id " +
+        "WHERE PlayersOnTeams.team_id = ? ORDER BY Players.id", [team_id])
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    return {row[0]: {"player_id": row[0], "name": row[1]} for row in rows}
+
+# Returns True if the row exists, from a query selecting at most one row
+def check_if_row_exists(query: str, data: list):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    curs.execute("SELECT EXISTS (" + query + ")", data)
+    exists = curs.fetchone()[0] == 1
+
+    commit_close(conn, curs)
+
+    return exists
+
+def check_if_tournament_exists(tournament_id: int):
+    return check_if_row_exists("SELECT 1 FROM Tournaments WHERE id = ?",
+        [tournament_id])
+
+def check_if_team_exists(team_id: int):
+    return check_if_row_exists("SELECT 1 FROM Teams WHERE id = ?",
+        [team_id])
+
+def check_if_player_exists(player_id: int):
+    return check_if_row_exists("SELECT 1 FROM Players WHERE id = ?",
+        [player_id])
+
+# Returns True if every table of the tournaments database exists, that is if
+# setup_tournament_database has run, for tools that only read the database.
+# A missing database file is not created.
+def check_if_database_set_up():
+    if not database_exists(DB_NAME):
+        return False
+
+    conn, curs = get_conn_curs(DB_NAME)
+
+    curs.execute("SELECT COUNT(*) FROM sqlite_master " +
+        "WHERE type = 'table' AND name IN (" +
+        ", ".join("?" for table in CHANGE_LOG_TABLES) + ")",
+        CHANGE_LOG_TABLES)
+    table_count = curs.fetchone()[0]
+
+    commit_close(conn, curs)
+
+    return table_count == len(CHANGE_LOG_TABLES)
+
+# Returns True if the tournament exists and is managed by user_id
+def check_if_tournament_manager(tournament_id: int, user_id: int):
+    return check_if_row_exists("SELECT 1 FROM Tournaments " +
+        "WHERE id = ? AND tournament_manager = ?", [tournament_id, user_id])
+
+# Returns True if the team exists and is managed by user_id
+def check_if_team_manager(team_id: int, user_id: int):
+    return check_if_row_exists("SELECT 1 FROM Teams " +
+        "WHERE id = ? AND team_manager = ?", [team_id, user_id])
+
+# Returns True if the player is on a team managed by user_id
+def check_if_player_manager(player_id: int, user_id: int):
+    return check_if_row_exists("SELECT 1 FROM PlayersOnTeams " +
+        "JOIN Teams ON Teams.id = PlayersOnTeams.team_id " +
+        "WHERE PlayersOnTeams.player_id = ? AND Teams.team_manager = ?",
+        [player_id, user_id])
+
+# Returns team actual age range, read from the aggregates kept on Teams
+# Returns none, none if no players
+def get_team_age_range(team_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    curs.execute("SELECT min_age, max_age FROM Teams WHERE id = ?",
+        [team_id])
+    row = curs.fetchone()
+
+    commit_close(conn, curs)
+
+    if row is None:
         raise Exception("Team does not exist")
 
-    select_roster = "SELECT * FROM PlayersOnTeams WHERE team_id = ?"
-    select_data = [team_id]
+    return row[0], row[1]
 
-    curs.execute(select_roster, select_data)
-    roster = curs.fetchall()
+# Returns team genders: m, f, or mixed, read from the aggregates kept on
+# Teams
+# Returns none if no players
+def get_team_gender_range(team_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
 
-    male = False
-    female = False
-    for roster_item in roster:
-        # print(f"getting team_id {roster_item[0]} player_id {roster_item[1]}")
-        player_id = roster_item[1]
-        gender = get_player_by_id(player_id)["gender"]
-        if gender == "m":
-            male = True
-        else:
-            female = True
+    curs.execute("SELECT male_count, female_count FROM Teams WHERE id = ?",
+        [team_id])
+    row = curs.fetchone()
 
     commit_close(conn, curs)
 
-    if male and female:
+    if row is None:
+        raise Exception("Team does not exist")
+
+    male_count, female_count = row
+    if male_count and female_count:
         return "mixed"
-    elif male:
+    elif male_count:
         return "m"
-    elif female:
+    elif female_count:
         return "f"
     else:
         return None
 
 # Get team by player id
 def get_team_by_player(player_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     select_roster = "SELECT * FROM PlayersOnTeams WHERE player_id = ?"
     select_data = [player_id]
@@ -739,8 +1845,22 @@ def get_team_by_player(player_id: int):
 
     return team_id
 
+# Gets the IDs of the teams registered in the tournament, in registration
+# order
+def get_registered_team_ids(tournament_id: int):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select_registrations = ("SELECT team_id FROM TournamentRegistrations " +
+        "WHERE tournament_id = ? ORDER BY rowid")
+    curs.execute(select_registrations, [tournament_id])
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    return [row[0] for row in rows]
+
 def check_if_registered(team_id: int, tournament_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
     select_registrations = ("SELECT * FROM TournamentRegistrations " +
         "WHERE tournament_id = ? AND team_id = ?")
     select_data = [tournament_id, team_id]
@@ -753,12 +1873,55 @@ def check_if_registered(team_id: int, tournament_id: int):
     return False
     
 
+# Gets the changes made to the tournaments database after the change with
+# sequence number since_seq, see get_changes_since in change_log.py
+def get_changes_since(since_seq: int = 0, limit: int = 1000):
+    return change_log.get_changes_since(DB_NAME, since_seq, limit)
+
+# Gets the sequence number of the latest change to the tournaments database
+def get_latest_change_seq():
+    return change_log.get_latest_change_seq(DB_NAME)
+
+# Gets the scores entered after the change with sequence number since_seq, up
+# to and including until_seq, from the change log, so that scores entered by
+# any process are found. Scores whose game was deleted since are skipped.
+# Return format is a list of dictionaries in the format of the SCORE_TOPIC
+# events (see events.py), in the order the scores were entered
+def get_score_changes(since_seq: int, until_seq: int):
+    assert(isinstance(since_seq, int)), "since_seq must be an int"
+    assert(isinstance(until_seq, int)), "until_seq must be an int"
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select = ("SELECT Games.id, GamesInTournaments.tournament_id, " +
+        "Games.home_team, HomeTeams.name, Games.away_team, AwayTeams.name, " +
+        "Scores.home_team_score, Scores.away_team_score, Scores.id " +
+        "FROM ChangeLog " +
+        "JOIN Scores ON Scores.id = json_extract(ChangeLog.data, " +
+        "'$.score_id') " +
+        "JOIN Games ON Games.id = json_extract(ChangeLog.data, '$.game_id') " +
+        "LEFT JOIN GamesInTournaments " +
+        "ON GamesInTournaments.game_id = Games.id " +
+        "LEFT JOIN Teams AS HomeTeams ON HomeTeams.id = Games.home_team " +
+        "LEFT JOIN Teams AS AwayTeams ON AwayTeams.id = Games.away_team " +
+        "WHERE ChangeLog.seq > ? AND ChangeLog.seq <= ? " +
+        "AND ChangeLog.table_name = 'GameScores' " +
+        "AND ChangeLog.operation = 'insert' " +
+        "ORDER BY ChangeLog.seq")
+    curs.execute(select, [since_seq, until_seq])
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    columns = ["game_id", "tournament_id", "home_team", "home_team_name",
+        "away_team", "away_team_name", "homescore", "awayscore", "score_id"]
+    return [dict(zip(columns, row)) for row in rows]
+
 ###############################################################################
 # UPDATE
 ###############################################################################
 def update_tournament_location(tournament_id: int,
                     location: str):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
     query = ("UPDATE Tournaments SET location = ?" + 
     "WHERE id = ?")
 
@@ -767,7 +1930,7 @@ def update_tournament_location(tournament_id: int,
     commit_close(conn, curs)
 
 def close_reg(tournament_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("UPDATE Tournaments SET is_reg_open = 0 WHERE id = {}".format(tournament_id))
 
@@ -777,37 +1940,151 @@ def close_reg(tournament_id: int):
 # DELETE
 ###############################################################################
 
-# Deletes the tournament with the given id
+# The deletes below remove an entity together with every row that depends on
+# it, in one transaction. Dependent rows are deleted set-based: the IDs are
+# collected once and passed to each DELETE as a JSON array, read back with
+# json_each, so thousands of rows are removed with a handful of statements.
+# Each delete returns a dictionary counting the rows removed per table.
+
+# Deletes the games with the given IDs and their scores, score history,
+# tournament links and bracket entries, using the cursor of the current
+# transaction. Bracket games that fed into a deleted game lose their link to
+# it. Returns the counts for games, games_in_tournaments, game_scores,
+# scores and bracket_games.
+def delete_games(curs, game_ids: list):
+    games = json.dumps(game_ids)
+    in_games = "IN (SELECT value FROM json_each(?))"
+
+    curs.execute("SELECT score_id FROM GameScores WHERE game_id " + in_games,
+        [games])
+    scores = json.dumps([row[0] for row in curs.fetchall()])
+
+    counts = {}
+    curs.execute("UPDATE BracketGames SET next_game_id = NULL, " +
+        "next_slot = NULL WHERE next_game_id " + in_games, [games])
+    curs.execute("DELETE FROM BracketGames WHERE game_id " + in_games,
+        [games])
+    counts["bracket_games"] = curs.rowcount
+    curs.execute("DELETE FROM GameScores WHERE game_id " + in_games, [games])
+    counts["game_scores"] = curs.rowcount
+    curs.execute("DELETE FROM GamesInTournaments WHERE game_id " + in_games,
+        [games])
+    counts["games_in_tournaments"] = curs.rowcount
+    curs.execute("DELETE FROM Games WHERE id " + in_games, [games])
+    counts["games"] = curs.rowcount
+    curs.execute("DELETE FROM Scores WHERE id " + in_games, [scores])
+    counts["scores"] = curs.rowcount
+
+    return counts
+
+# Deletes the tournament with the given id, with its registrations and its
+# games (see delete_games)
+# Return format is a dictionary with the number of rows removed from each
+# table: tournaments, tournament_registrations, games, games_in_tournaments,
+# game_scores, scores and bracket_games
 def delete_tournament(tournament_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    assert(isinstance(tournament_id, int)), "tournament_id must be an int"
 
-    curs.execute("DELETE FROM Tournaments WHERE id = {}".format(tournament_id))
+    with transaction():
+        conn, curs = get_conn_curs(DB_NAME)
 
-    commit_close(conn, curs)
+        curs.execute("SELECT game_id FROM GamesInTournaments " +
+            "WHERE tournament_id = ?", [tournament_id])
+        counts = delete_games(curs, [row[0] for row in curs.fetchall()])
+
+        curs.execute("DELETE FROM TournamentRegistrations " +
+            "WHERE tournament_id = ?", [tournament_id])
+        counts["tournament_registrations"] = curs.rowcount
+        curs.execute("DELETE FROM Tournaments WHERE id = ?", [tournament_id])
+        counts["tournaments"] = curs.rowcount
+
+        commit_close(conn, curs)
+
+    return counts
 
-# Deletes the player with the given id
+# Deletes the team with the given id, with its players and its tournament
+# registrations. A team that is in any game cannot be deleted, since the
+# game's scores, standings and bracket belong to the other team and the
+# tournament as well; delete the tournament first.
+# Return format is a dictionary with the number of rows removed from each
+# table: teams, players, players_on_teams and tournament_registrations
+def delete_team(team_id: int):
+    assert(isinstance(team_id, int)), "team_id must be an int"
+
+    with transaction():
+        conn, curs = get_conn_curs(DB_NAME)
+
+        curs.execute("SELECT 1 FROM Games WHERE home_team = ? " +
+            "OR away_team = ? LIMIT 1", [team_id, team_id])
+        if curs.fetchone():
+            commit_close(conn, curs)
+            raise Exception("Team has games in a tournament")
+
+        curs.execute("SELECT player_id FROM PlayersOnTeams " +
+            "WHERE team_id = ?", [team_id])
+        players = json.dumps([row[0] for row in curs.fetchall()])
+
+        counts = {}
+        curs.execute("DELETE FROM PlayersOnTeams WHERE team_id = ?",
+            [team_id])
+        counts["players_on_teams"] = curs.rowcount
+        curs.execute("DELETE FROM Players WHERE id IN " +
+            "(SELECT value FROM json_each(?))", [players])
+        counts["players"] = curs.rowcount
+        curs.execute("DELETE FROM TournamentRegistrations WHERE team_id = ?",
+            [team_id])
+        counts["tournament_registrations"] = curs.rowcount
+        curs.execute("DELETE FROM Teams WHERE id = ?", [team_id])
+        counts["teams"] = curs.rowcount
+
+        commit_close(conn, curs)
+
+    return counts
+
+# Deletes the player with the given id and its place on its team
+# Return format is a dictionary with the number of rows removed from each
+# table: players and players_on_teams
 def delete_player(player_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    assert(isinstance(player_id, int)), "player_id must be an int"
 
-    curs.execute("DELETE FROM PlayersOnTeams WHERE player_id = {}".format(player_id))
-    curs.execute("DELETE FROM Players WHERE id = {}".format(player_id))
+    with transaction():
+        conn, curs = get_conn_curs(DB_NAME)
 
-    commit_close(conn, curs)
+        curs.execute("SELECT team_id FROM PlayersOnTeams " +
+            "WHERE player_id = ?", [player_id])
+        team_ids = [row[0] for row in curs.fetchall()]
+
+        counts = {}
+        curs.execute("DELETE FROM PlayersOnTeams WHERE player_id = ?",
+            [player_id])
+        counts["players_on_teams"] = curs.rowcount
+        curs.execute("DELETE FROM Players WHERE id = ?", [player_id])
+        counts["players"] = curs.rowcount
+
+        update_team_aggregates(curs, team_ids)
+
+        commit_close(conn, curs)
+
+    return counts
 
 # Drops all tables
 def clear_tournament_database():
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
+    for table, search_table in SEARCH_TABLES:
+        curs.execute("DROP TABLE if exists " + search_table)
     curs.execute("DROP TABLE if exists TournamentRegistrations")
     curs.execute("DROP TABLE if exists PlayersOnTeams")
     curs.execute("DROP TABLE if exists GamesInTournaments")
     curs.execute("DROP TABLE if exists GameScores")
+    curs.execute("DROP TABLE if exists BracketGames")
     curs.execute("DROP TABLE if exists Locations")
     curs.execute("DROP TABLE if exists Scores")
     curs.execute("DROP TABLE if exists Players")
     curs.execute("DROP TABLE if exists Games")
     curs.execute("DROP TABLE if exists Teams")
     curs.execute("DROP TABLE if exists Tournaments")
+    curs.execute("DROP TABLE if exists ChangeLog")
 
     commit_close(conn, curs)
 
@@ -819,3 +2096,7 @@ def clear_tournament_database():
 def setup_tournament_database():
     create_basic_tables()
     create_relational_tables()
+    upgrade_tables()
+    create_indexes()
+    create_search_tables()
+    change_log.create_change_log(DB_NAME, CHANGE_LOG_TABLES)
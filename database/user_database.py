@@ -1,8 +1,13 @@
-from util.util import get_conn_curs, commit_close
+from util.util import get_conn_curs, commit_close, get_like_prefix
+from database import change_log
 import csv
 
 # Constants
-DB_FILENAME = "users.db"
+DB_NAME = "users"
+# Tables whose writes are recorded in the change log, see change_log.py
+CHANGE_LOG_TABLES = ["Users"]
+# Columns kept out of the change log, which consumers are free to read
+CHANGE_LOG_EXCLUDED_COLUMNS = {"Users": ["password"]}
 
 ###############################################################################
 # CREATE
@@ -10,23 +15,28 @@ DB_FILENAME = "users.db"
 
 # Creates the users table in the database
 def create_users_table():
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     user_create = ("CREATE TABLE if not exists Users " +
         "(id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(250), " +
         "username VARCHAR(250), password VARCHAR(250), " +
         "user_type VARCHAR(250))")
 
-    # Remove for data persistence, but good for testing
-    curs.execute("DROP TABLE if exists Users")
     curs.execute(user_create)
 
     commit_close(conn, curs)
 
-# Inserts initial set of users from file users.csv
+# Replaces the users with the initial set of users from file users.csv
 # File has columns name, username, password, and user_type
+# The old users are deleted row by row, so that the change log records a
+# delete for each of them before the new users are inserted, and the IDs
+# start from 1 again.
 def insert_intial_users():
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
+
+    # Remove for data persistence, but good for testing
+    curs.execute("DELETE FROM Users")
+    curs.execute("DELETE FROM sqlite_sequence WHERE name = 'Users'")
 
     users = []
     # https://realpython.com/python-csv/
@@ -74,7 +84,7 @@ def insert_intial_users():
 #     }
 # }
 def get_all_users():
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Users")
     rows = curs.fetchall()
@@ -90,7 +100,7 @@ def get_all_users():
     return users
 
 def get_user_by_id(user_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("SELECT * FROM Users WHERE id = ?", [user_id])
     rows = curs.fetchall()
@@ -112,6 +122,37 @@ def get_user_by_id(user_id: int):
 
     return user
 
+# Gets one page of users, ordered by ID, for pickers that load entries as
+# the user scrolls. after_id is the last ID of the previous page, 0 for the
+# first page. If query is given, only usernames starting with it are kept.
+# Return format is a list of dictionaries with user_id and username
+def get_user_page(after_id: int = 0, limit: int = 20, query: str = None):
+    conn, curs = get_conn_curs(DB_NAME)
+
+    select_users = "SELECT id, username FROM Users WHERE id > ? "
+    select_data = [after_id]
+    if query is not None and query.strip():
+        select_users += "AND username LIKE ? ESCAPE '\\' "
+        select_data.append(get_like_prefix(query.strip()))
+    select_users += "ORDER BY id LIMIT ?"
+    select_data.append(limit)
+
+    curs.execute(select_users, select_data)
+    rows = curs.fetchall()
+
+    commit_close(conn, curs)
+
+    return [{"user_id": row[0], "username": row[1]} for row in rows]
+
+# Gets the changes made to the users database after the change with
+# sequence number since_seq, see get_changes_since in change_log.py
+def get_changes_since(since_seq: int = 0, limit: int = 1000):
+    return change_log.get_changes_since(DB_NAME, since_seq, limit)
+
+# Gets the sequence number of the latest change to the users database
+def get_latest_change_seq():
+    return change_log.get_latest_change_seq(DB_NAME)
+
 ###############################################################################
 # UPDATE
 ###############################################################################
@@ -122,7 +163,7 @@ def get_user_by_id(user_id: int):
 
 # Deletes the user with the given ID from the database
 def delete_user(user_id: int):
-    conn, curs = get_conn_curs(DB_FILENAME)
+    conn, curs = get_conn_curs(DB_NAME)
 
     curs.execute("DELETE FROM Users WHERE id = {}".format(user_id))
 
@@ -134,4 +175,6 @@ def delete_user(user_id: int):
 
 def setup_user_database():
     create_users_table()
+    change_log.create_change_log(DB_NAME, CHANGE_LOG_TABLES,
+        CHANGE_LOG_EXCLUDED_COLUMNS)
     insert_intial_users()
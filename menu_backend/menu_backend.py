@@ -3,26 +3,38 @@ from database.tournament_database import (
     create_team,
     create_tournament,
     create_game,
-    get_tournaments_by_manager,
+    get_tournament_page,
     get_tournament_by_id,
-    get_teams_by_manager,
-    get_games_by_tournament,
+    get_team_page,
+    get_game_page,
     get_team_by_id,
     create_player,
-    get_players_by_team,
+    get_player_summaries,
     delete_player,
-    get_all_teams,
+    delete_team,
+    delete_tournament,
     update_tournament_location,
     close_reg,
     update_tournament_location,
-    get_all_tournaments,
     check_if_registered,
-    register_team_in_tournament)
+    register_team_in_tournament,
+    get_game_conflicts,
+    get_game_by_id,
+    transaction)
 from backend.tournaments import (
     print_all_teams,
     print_all_tournaments,
     check_team_eligibility,
-    print_tournament_games)
+    print_tournament_games,
+    print_tournament_stats,
+    print_search_results)
+
+from backend.archive import (
+    archive_finished_tournaments,
+    print_archived_tournament)
+from database.archive_database import get_archived_tournament_page
+from database.storage import read_from_replica
+from backend.live_scores import get_live_scores_path, watch_live_scores
 
 from simple_term_menu import TerminalMenu
 from datetime import datetime
@@ -42,6 +54,14 @@ SELECT_TEAM = "Select a team."
 SELECT_PLAYER = "Select a player."
 SELECT_GAME = "Select a game."
 
+# Pickers show this many entries at a time, with these options to move
+# between pages and to filter the entries
+PAGE_SIZE = 20
+NEXT_PAGE = "[n] Next page"
+PREVIOUS_PAGE = "[p] Previous page"
+FILTER = "[f] Filter"
+CLEAR_FILTER = "[c] Clear filter"
+
 AGE_INT_ERROR = "Age must be an integer."
 SCORE_INT_ERROR = "Score input must be an integer."
 DATE_ERROR = "Date must be datetime."
@@ -55,18 +75,27 @@ DATE_ERROR = "Date must be datetime."
 VIEW_ALL_TEAMS = "View all teams"
 VIEW_ALL_TOURNAMENTS = "View all tournaments"
 VIEW_TOURNAMENT_STATUS = "View tournament status (schedule and game results)"
+VIEW_TOURNAMENT_STATS = "View tournament statistics"
+SEARCH = "Search tournaments, teams and players"
+VIEW_ARCHIVED_TOURNAMENT = "View an archived tournament"
 QUIT = "[q] Quit"
 
+# Needed by fans only
+WATCH_LIVE_SCORES = "Watch live scores"
+
 # Needed by tournament managers only
 CREATE_TOURNAMENT = "Create a tournament"
 CREATE_GAME = "Create a game"
 INPUT_SCORE = "Input score for an existing game"
 UPDATE_TOURNAMENT_LOCATION = "Update tournament location"
 CLOSE_REGISTRATION = "Close registration for an existing tournament"
+DELETE_TOURNAMENT = "Delete a tournament and its games"
+ARCHIVE_TOURNAMENTS = "Archive your finished tournaments"
 
 # Needed by team managers only
 CREATE_TEAM = "Create a team"
 DELETE_PLAYER = "Delete a player from an existing team"
+DELETE_TEAM = "Delete a team, its players and its games"
 ADD_PLAYER = "Add a player to an existing team"
 REGISTER_FOR_TOURNAMENT = "Register for a tournament"
 
@@ -74,22 +103,28 @@ REGISTER_FOR_TOURNAMENT = "Register for a tournament"
 VIEW_OPTIONS = [
     VIEW_ALL_TEAMS, 
     VIEW_ALL_TOURNAMENTS,
-    VIEW_TOURNAMENT_STATUS]
+    VIEW_TOURNAMENT_STATUS,
+    VIEW_TOURNAMENT_STATS,
+    SEARCH,
+    VIEW_ARCHIVED_TOURNAMENT]
 
 TOURNAMENT_MANAGER_OPTIONS = VIEW_OPTIONS + [
     CREATE_TOURNAMENT,
     CREATE_GAME,
     INPUT_SCORE,
     UPDATE_TOURNAMENT_LOCATION,
-    CLOSE_REGISTRATION] + [QUIT]
+    CLOSE_REGISTRATION,
+    DELETE_TOURNAMENT,
+    ARCHIVE_TOURNAMENTS] + [QUIT]
 
 TEAM_MANAGER_OPTIONS = VIEW_OPTIONS + [
     CREATE_TEAM,
     ADD_PLAYER,
     DELETE_PLAYER,
+    DELETE_TEAM,
     REGISTER_FOR_TOURNAMENT] + [QUIT]
 
-OTHER_OPTIONS = VIEW_OPTIONS + [QUIT]
+OTHER_OPTIONS = VIEW_OPTIONS + [WATCH_LIVE_SCORES] + [QUIT]
 
 
 ###############################################################################
@@ -203,28 +238,66 @@ def do_delete_player_command(user_id):
     except Exception as err:
         print("There was an error:")
         print(err)
+        return
 
     print("Player deleted successfully.")
 
+def do_delete_team_command(user_id):
+    team_id = team_selection(user_id)
+    if not team_id:
+        print("You don't have any teams.")
+        return
+    confirmation = input("This also deletes the team's players. A team " +
+        "with games cannot be deleted. Enter 'confirm' to delete: ")
+    if confirmation.lower() != "confirm":
+        print("Team not deleted.")
+        return
+
+    try:
+        counts = delete_team(team_id)
+    except Exception as err:
+        print("There was an error:")
+        print(err)
+        return
+
+    print("Team deleted successfully.")
+    print_delete_counts(counts)
+
+def do_delete_tournament_command(user_id):
+    tournament_id = grab_tournament_id(user_id)
+    if not tournament_id:
+        return
+    confirmation = input("This also deletes the tournament's games, scores " +
+        "and registrations. Enter 'confirm' to delete: ")
+    if confirmation.lower() != "confirm":
+        print("Tournament not deleted.")
+        return
+
+    try:
+        counts = delete_tournament(tournament_id)
+    except Exception as err:
+        print("There was an error:")
+        print(err)
+        return
+
+    print("Tournament deleted successfully.")
+    print_delete_counts(counts)
+
 def do_input_score_command(user_id):
     tournament_id = grab_tournament_id(user_id)
+    if not tournament_id:
+        return
 
-    games = get_games_by_tournament(tournament_id)
-    if not games:
-        print("No games in tournament.")
-        return 
-    game_options_dict = {}
-    for game in games.values():
-        game_id = game["game_id"]
-        key = (f"ID: {game_id}, Time: {game['time']}, Location: " +
-            f"{game['location']}")
-        game_options_dict[key] = game_id
-    game_options = list(game_options_dict.keys())
-    terminal_menu = TerminalMenu(game_options, title=SELECT_GAME)
-    menu_entry_index = terminal_menu.show()
-    game_key = game_options[menu_entry_index]
-    print(f"You selected game: {game_key}")
-    game_id = game_options_dict[game_key]
+    game = paged_selection(
+        lambda after_id, limit, query: get_game_page(tournament_id,
+            after_id, limit, query),
+        "game_id",
+        lambda game: (f"ID: {game['game_id']}, Time: {game['time']}, " +
+            f"Location: {game['location']}"),
+        SELECT_GAME, "game", "No games in tournament.")
+    if not game:
+        return
+    game_id = game["game_id"]
 
     home_team_score = input("Enter home team score: ")
     try:
@@ -258,38 +331,42 @@ def do_register_tournament_command(user_id):
     if not tournament_id:
         return
 
-    # Check if registration is open
-    is_reg_open = get_tournament_by_id(tournament_id)["is_reg_open"]
-    if not is_reg_open:
-        print("Registration closed.")
-        return
-    
-    # Check if registered
-    registered = check_if_registered(team_id, tournament_id)
-    if registered:
-        print("Already registered.")
-        return
-        
-    # Check if all team members meet gender and age requirments
-    if not check_team_eligibility(team_id, tournament_id):
-        print("Someone on your team isn't eligible for tournament "
-              + "or your team is empty.")
-        return
+    # The checks and the registration run as one unit of work, so nothing
+    # can change between checking and registering
+    with transaction():
+        # Check if registration is open
+        is_reg_open = get_tournament_by_id(tournament_id)["is_reg_open"]
+        if not is_reg_open:
+            print("Registration closed.")
+            return
+
+        # Check if registered
+        registered = check_if_registered(team_id, tournament_id)
+        if registered:
+            print("Already registered.")
+            return
+
+        # Check if all team members meet gender and age requirments
+        if not check_team_eligibility(team_id, tournament_id):
+            print("Someone on your team isn't eligible for tournament "
+                  + "or your team is empty.")
+            return
+
+        # Check if registration was succesful.
+        # If so, break loop.
+        try:
+            register_team_in_tournament(tournament_id, team_id)
+        except Exception as err:
+            print("There was an error:")
+            print(err)
+            return
 
-    # Check if registration was succesful.
-    # If so, break loop.
-    try:
-        register_team_in_tournament(tournament_id, team_id)
-    except Exception as err:
-        print("There was an error:")
-        print(err)
-        return
-    
     print("Registration successful.")
 
 def do_create_game_command(user_id):
     tournament_id = grab_tournament_id(user_id)
-    teams = get_all_teams()
+    if not tournament_id:
+        return
     t = get_tournament_by_id(tournament_id)
     start = datetime.strptime(t['start_date'], "%Y-%m-%d %H:%M:%S")
     end = datetime.strptime(t['end_date'], "%Y-%m-%d %H:%M:%S")
@@ -297,20 +374,17 @@ def do_create_game_command(user_id):
     # end = end.datetime()
 
     # Create game
-    team_ids = []
-    team_names = []
-    for team in teams.values():
-        team_ids.append(team["team_id"])
-        team_names.append(team["name"])
-    
-    team_menu = TerminalMenu(team_names, title="Select home team: ")
-    menu_entry_index = team_menu.show()
-    home_team_id = team_ids[menu_entry_index]
-    print(f"You selected home team: {team_names[menu_entry_index]}")
-    team_menu = TerminalMenu(team_names, title="Select away team: ")
-    menu_entry_index = team_menu.show()
-    away_team_id = team_ids[menu_entry_index]
-    print(f"You selected away team: {team_names[menu_entry_index]}")
+    home_team = paged_selection(get_team_page, "team_id",
+        lambda team: team["name"], "Select home team: ", "home team",
+        "No teams.")
+    if not home_team:
+        return
+    home_team_id = home_team["team_id"]
+    away_team = paged_selection(get_team_page, "team_id",
+        lambda team: team["name"], "Select away team: ", "away team")
+    if not away_team:
+        return
+    away_team_id = away_team["team_id"]
 
     print(f"\nYour selected tournament start date: {start}")
     print(f"Your selected tournament end date: {end}\n")
@@ -324,13 +398,22 @@ def do_create_game_command(user_id):
         print("There was an error")
         print(err)
         return
-    try:
-        create_game(time, tournament_id, location, home_team_id, away_team_id)
-    except Exception as err:
-        print("There was an error")
-        print(err)
-        return
-    
+    # Checking for double bookings and creating the game are one unit of
+    # work, so a conflicting game cannot be created in between
+    with transaction():
+        conflicts = get_game_conflicts(time, location, home_team_id,
+            away_team_id)
+        if conflicts:
+            print_game_conflicts(conflicts)
+            return
+        try:
+            create_game(time, tournament_id, location, home_team_id,
+                away_team_id)
+        except Exception as err:
+            print("There was an error")
+            print(err)
+            return
+
     print("Game created successfully.")
 
 def do_create_tournament_command(user_id):
@@ -391,6 +474,9 @@ def do_create_tournament_command(user_id):
 
 def do_update_tournament_location_command(user_id):
     tournament_id = grab_tournament_id(user_id)
+    if not tournament_id:
+        return
+
     location = input("Enter updated tournament location in the format "
                      + "'city, state': ")
     try: 
@@ -405,6 +491,8 @@ def do_update_tournament_location_command(user_id):
 def do_close_registration_command(user_id):
     # Close registration
     tournament_id = grab_tournament_id(user_id)
+    if not tournament_id:
+        return
 
     try:
         close_reg(tournament_id)
@@ -417,9 +505,61 @@ def do_close_registration_command(user_id):
 
 def do_show_tournament_status_command():
     tournament_id = tournament_selection_from_all()
+    if not tournament_id:
+        return
 
     print_tournament_games(tournament_id)
 
+def do_show_tournament_stats_command():
+    tournament_id = tournament_selection_from_all()
+    if not tournament_id:
+        return
+
+    # A report, which may be a few seconds behind when a replica is running
+    with read_from_replica():
+        print_tournament_stats(tournament_id)
+
+def do_show_archived_tournament_command():
+    tournament = paged_selection(get_archived_tournament_page,
+        "tournament_id", describe_tournament, SELECT_TOURNAMENT, "tournament",
+        "No archived tournaments.")
+    if not tournament:
+        return
+
+    print_archived_tournament(tournament["tournament_id"])
+
+def do_archive_tournaments_command(user_id):
+    try:
+        tournament_ids, failed = archive_finished_tournaments(
+            manager_id=user_id)
+    except Exception as err:
+        print("There was an error")
+        print(err)
+        return
+
+    for tournament_id, err in failed.items():
+        print(f"Could not archive tournament {tournament_id}: {err}")
+    if not tournament_ids and not failed:
+        print("No finished tournaments to archive.")
+        return
+    print(f"Archived {len(tournament_ids)} tournament(s).")
+
+def do_search_command():
+    query = input("Enter part of a name: ")
+
+    print_search_results(query)
+
+def do_watch_live_scores_command():
+    path = get_live_scores_path()
+    if path is None:
+        print("Live scores are not enabled, set LIVE_SCORES_SOCKET.")
+        return
+
+    try:
+        watch_live_scores(path)
+    except OSError:
+        print("No live score feed is running.")
+
 
 ###############################################################################
 # COMMAND CONTROL FLOW FUNCTIONS
@@ -432,6 +572,12 @@ def do_view_command(command):
         print_all_tournaments()
     elif command == VIEW_TOURNAMENT_STATUS:
         do_show_tournament_status_command()
+    elif command == VIEW_TOURNAMENT_STATS:
+        do_show_tournament_stats_command()
+    elif command == SEARCH:
+        do_search_command()
+    elif command == VIEW_ARCHIVED_TOURNAMENT:
+        do_show_archived_tournament_command()
 
 def do_tournament_manager_command(command, user_id):
     if command in VIEW_OPTIONS:
@@ -446,6 +592,10 @@ def do_tournament_manager_command(command, user_id):
         do_update_tournament_location_command(user_id)
     elif command == CLOSE_REGISTRATION:
         do_close_registration_command(user_id)
+    elif command == DELETE_TOURNAMENT:
+        do_delete_tournament_command(user_id)
+    elif command == ARCHIVE_TOURNAMENTS:
+        do_archive_tournaments_command(user_id)
 
 def do_team_manager_command(command, user_id):
     if command in VIEW_OPTIONS:
@@ -456,12 +606,16 @@ def do_team_manager_command(command, user_id):
         do_add_player_command(user_id)
     elif command == DELETE_PLAYER:
         do_delete_player_command(user_id)
+    elif command == DELETE_TEAM:
+        do_delete_team_command(user_id)
     elif command == REGISTER_FOR_TOURNAMENT:
         do_register_tournament_command(user_id)
 
 def do_other_command(command):
     if command in VIEW_OPTIONS:
         do_view_command(command)
+    elif command == WATCH_LIVE_SCORES:
+        do_watch_live_scores_command()
 
 
 ###############################################################################
@@ -482,30 +636,99 @@ def create_date(start, typ):
     time = input(f"Enter {typ} {start} time in the format 'HH:MM': ")
     return f"{month}-{day}-{year} {time}"
 
+# Lets the user pick one entry from a list that is loaded PAGE_SIZE entries
+# at a time, instead of building every option up front. get_page(after_id,
+# limit, query) returns the entries after after_id, ordered by id_key and
+# filtered by query (None for no filter). describe turns an entry into its
+# option text, and noun names the entry in the confirmation message.
+# empty_message is printed if there are no entries at all, but not when the
+# user quits.
+# Returns the chosen entry, or None if there are no entries or the user quits
+def paged_selection(get_page, id_key, describe, title, noun,
+        empty_message=None):
+    query = None
+    # The after_id of every page up to the current one, to go back
+    page_starts = [0]
+    while True:
+        # One extra entry tells whether there is a next page
+        entries = get_page(page_starts[-1], PAGE_SIZE + 1, query)
+        has_next_page = len(entries) > PAGE_SIZE
+        entries = entries[:PAGE_SIZE]
+        if not entries and query is None:
+            if empty_message is not None:
+                print(empty_message)
+            return None
+
+        options = [describe(entry) for entry in entries]
+        controls = []
+        if has_next_page:
+            controls.append(NEXT_PAGE)
+        if len(page_starts) > 1:
+            controls.append(PREVIOUS_PAGE)
+        controls.append(FILTER)
+        if query is not None:
+            controls.append(CLEAR_FILTER)
+
+        menu_title = title
+        if query is not None:
+            menu_title = f"{title} (filter: {query})"
+        terminal_menu = TerminalMenu(options + controls, title=menu_title)
+        menu_entry_index = terminal_menu.show()
+        if menu_entry_index is None:
+            return None
+        if menu_entry_index < len(entries):
+            print(f"You selected {noun}: {options[menu_entry_index]}")
+            return entries[menu_entry_index]
+
+        control = controls[menu_entry_index - len(entries)]
+        if control == NEXT_PAGE:
+            page_starts.append(entries[-1][id_key])
+        elif control == PREVIOUS_PAGE:
+            page_starts.pop()
+        else:
+            query = None
+            if control == FILTER:
+                query = input("Enter text to filter by: ").strip() or None
+            page_starts = [0]
+
+def describe_tournament(tournament):
+    return f"ID: {tournament['tournament_id']}, Name: {tournament['name']}"
+
+def describe_team(team):
+    return f"ID: {team['team_id']}, Name: {team['name']}"
+
 def grab_tournament_id(user_id):
-    tournaments = get_tournaments_by_manager(user_id)
-    # Create a dictionary where the keys are the string options that a user
-    # will select on the menu, and the values are the corresponding tournament
-    # IDs. Example: { "ID: 1, Name: Test Name": 1 }
-    tournament_options_dict = {}
-    for tournament in tournaments.values():
-        tournament_id = tournament["tournament_id"]
-        key = f"ID: {tournament_id}, Name: {tournament['name']}"
-        tournament_options_dict[key] = tournament_id
-    # Options to display are in the format "[ID] Name" created above
-    tournament_options = list(tournament_options_dict.keys())
-    terminal_menu = TerminalMenu(tournament_options, title=SELECT_TOURNAMENT)
-    menu_entry_index = terminal_menu.show()
-    # This is the string the user selected, which is the key for options_dict
-    tournament_key = tournament_options[menu_entry_index]
-    print(f"You selected tournament: {tournament_key}")
-    # Use the key to get the tournament ID
-    tournament_id = tournament_options_dict[tournament_key]
-    return tournament_id
+    tournament = paged_selection(
+        lambda after_id, limit, query: get_tournament_page(after_id, limit,
+            query, user_id),
+        "tournament_id", describe_tournament, SELECT_TOURNAMENT, "tournament",
+        "You don't have any tournaments.")
+    if not tournament:
+        return
+    return tournament["tournament_id"]
+
+def print_game_conflicts(conflicts):
+    print("The game conflicts with existing games:")
+    for conflict in conflicts:
+        game = get_game_by_id(conflict["game_id"])
+        if conflict["conflict"] == "location":
+            reason = "location already booked"
+        else:
+            reason = "team already playing"
+        print(f"ID: {game['game_id']}, Time: {game['time']}, Location: " +
+            f"{game['location']} ({reason})")
+
+# Prints the number of rows a delete removed from each table, counts is the
+# dictionary returned by delete_tournament or delete_team
+def print_delete_counts(counts):
+    print("Removed:")
+    for table, count in counts.items():
+        if count:
+            print(f"{table.replace('_', ' ').capitalize()}: {count}")
 
 def player_selection(team_id):
     # Add team player
-    players = get_players_by_team(team_id)
+    players = get_player_summaries(team_id)
     if not players:
         return
     # Create a dictionary where the keys are the string options that a user
@@ -528,50 +751,18 @@ def player_selection(team_id):
     return player_id
 
 def team_selection(user_id):
-    # Add team player
-    teams = get_teams_by_manager(user_id)
-    if not teams:
+    team = paged_selection(
+        lambda after_id, limit, query: get_team_page(after_id, limit, query,
+            user_id),
+        "team_id", describe_team, SELECT_TEAM, "team")
+    if not team:
         return
-    # Create a dictionary where the keys are the string options that a user
-    # will select on the menu, and the values are the corresponding teams
-    # IDs. Example: { "ID: 1, Name: Test Name": 1 }
-    team_options_dict = {}
-    for team in teams.values():
-        team_id = team["team_id"]
-        key = f"ID: {team_id}, Name: {team['name']}"
-        team_options_dict[key] = team_id
-    # Options to display are in the format "[ID] Name" created above
-    team_options = list(team_options_dict.keys())
-    terminal_menu = TerminalMenu(team_options, title=SELECT_TEAM)
-    menu_entry_index = terminal_menu.show()
-    # This is the string the user selected, which is the key for options_dict
-    team_key = team_options[menu_entry_index]
-    print(f"You selected team: {team_key}")
-    # Use the key to get the tournament ID
-    team_id = team_options_dict[team_key]
-    return team_id
+    return team["team_id"]
 
 def tournament_selection_from_all():
-    tournaments = get_all_tournaments()
-    if not tournaments:
-        print("No tournaments.")
+    tournament = paged_selection(get_tournament_page, "tournament_id",
+        describe_tournament, SELECT_TOURNAMENT, "tournament",
+        "No tournaments.")
+    if not tournament:
         return
-    # Create a dictionary where the keys are the string options that a user
-    # will select on the menu, and the values are the corresponding tournament
-    # IDs. Example: { "ID: 1, Name: Test Name": 1 }
-    tournament_options_dict = {}
-    for tournament in tournaments.values():
-        tournament_id = tournament["tournament_id"]
-        key = f"ID: {tournament_id}, Name: {tournament['name']}"
-        tournament_options_dict[key] = tournament_id
-    # Options to display are in the format "[ID] Name" created above
-    tournament_options = list(tournament_options_dict.keys())
-    terminal_menu = TerminalMenu(tournament_options, title=SELECT_TOURNAMENT)
-    menu_entry_index = terminal_menu.show()
-    # This is the string the user selected, which is the key for options_dict
-    tournament_key = tournament_options[menu_entry_index]
-    print(f"You selected tournament: {tournament_key}")
-    # Use the key to get the tournament ID
-    tournament_id = tournament_options_dict[tournament_key]
-    return tournament_id
-
+    return tournament["tournament_id"]
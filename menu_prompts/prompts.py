@@ -1,4 +1,13 @@
 # Constants
+LEAGUE_MENU = '''
+Enter your league ID, or leave blank for the default league:
+
+> '''
+CREATE_LEAGUE_MENU = '''
+League {} does not exist. Enter 'y' to create it, or anything else to enter
+another league ID:
+
+> '''
 LOG_IN_MENU = '''
 Please log in to start. Enter your username:
     
@@ -1,5 +1,5 @@
-from database.user_database import get_all_users
-from backend.users import log_in
+from database.user_database import get_user_page
+from backend.users import log_in, league_menu
 from menu_backend.menu_backend import (
     MENU_TITLE,
     QUIT,
@@ -8,29 +8,37 @@ from menu_backend.menu_backend import (
     OTHER_OPTIONS,
     do_tournament_manager_command,
     do_team_manager_command,
-    do_other_command
+    do_other_command,
+    paged_selection
 )
 from simple_term_menu import TerminalMenu
 from database.tournament_database import setup_tournament_database
 from database.user_database import setup_user_database
+from database.archive_database import setup_archive_database
+from database.storage import configure_storage_from_env
+from backend.read_model import get_read_model
+from database.replica import configure_replica_from_env
+from backend.live_scores import (
+    get_live_scores_path,
+    start_live_score_server_thread)
+import menu_prompts.prompts as prompt
+import sys
 
+# Returns the user ID and type of the user that logged in, or None for both
+# if the user left the picker (or there are no users)
 def log_in_menu():
-    # Get all possible users, keys are the usernames
-    user_dict = get_all_users()
-    # Terminal menu options will be existing usernames
-    options = list(user_dict.keys())
     is_logged_in = False
-    # Create terminal menu with usernames as options
-    terminal_menu = TerminalMenu(options, 
-                                 title="Please select an existing user:")
     # Allows for retry if login fails
     while not is_logged_in:
-        # Show terminal menu and save input index
-        menu_entry_index = terminal_menu.show()
-        username = options[menu_entry_index]
-        # The menu will disappear from the screen, so we use prints to persist
-        # important information
-        print(f"You selected username: {username}")
+        # Terminal menu options are existing usernames, loaded a page at a
+        # time. The menu will disappear from the screen, so the selection is
+        # printed to persist it.
+        user = paged_selection(get_user_page, "user_id",
+            lambda user: user["username"],
+            "Please select an existing user:", "username")
+        if not user:
+            return None, None
+        username = user["username"]
         # Prompt for normal text input password
         password = input("Enter password: ")
         try:
@@ -72,11 +80,27 @@ def other_menu():
         do_other_command(command)
 
 if __name__ == "__main__":
+    configure_storage_from_env()
+    # Each league has its own databases, so it is chosen before logging in
+    league_menu(prompt.LEAGUE_MENU, prompt.CREATE_LEAGUE_MENU)
     setup_user_database()
     setup_tournament_database()
+    setup_archive_database()
+    # Loads the rows of the read-only views into memory once
+    get_read_model()
+    configure_replica_from_env()
     user_id, user_type = log_in_menu()
+    if user_id is None:
+        sys.exit()
     print(f"You are logged in as a {user_type}.")
     if user_type == "TournamentManager":
+        # The first tournament manager session of the league serves its live
+        # feed, which has the scores entered by every session
+        if get_live_scores_path() is not None:
+            try:
+                start_live_score_server_thread(get_live_scores_path())
+            except OSError as err:
+                print(f"Live scores not served: {err}")
         tournament_manager_menu(user_id)
     elif user_type == "TeamManager":
         team_manager_menu(user_id)
@@ -1,12 +1,17 @@
 from database.user_database import setup_user_database
+from database.archive_database import setup_archive_database
+from database.storage import configure_storage_from_env
 from database.tournament_database import (
     setup_tournament_database, create_tournament,
     register_team_in_tournament, create_team, create_player,
-    get_team_manager_id, get_team_ids, get_team_by_id, get_tournament_ids,
-    delete_player, get_player_ids, get_team_by_player, get_tournament_by_name,
-    create_game, get_tournament_by_id, get_tournament_manager_id, close_reg,
+    check_if_team_manager, check_if_team_exists, get_team_by_id,
+    check_if_tournament_exists, delete_player, check_if_player_exists,
+    check_if_player_manager, get_tournament_by_name, create_game,
+    get_tournament_by_id, check_if_tournament_manager, close_reg,
     create_game_score, get_score_by_game)
-from backend.users import log_in
+from backend.users import log_in, league_menu
+from backend.read_model import get_read_model
+from database.replica import configure_replica_from_env
 from backend.tournaments import (
     print_all_teams, print_all_tournaments, print_manager_tournaments,
     print_tournament_games, check_team_eligibility)
@@ -201,13 +206,12 @@ def control_loop():
                                     continue
                                 
                                 # Check if tournament_id is valid
-                                tournament_ids = get_tournament_ids()
-                                if not tournament_id in tournament_ids:
+                                if not check_if_tournament_exists(tournament_id):
                                     command = input(prompt.TOURNAMENT_ID_ERROR_MESSAGE)
                                     continue
                                 
                                 # Check if tournament belongs to manager
-                                if not get_tournament_manager_id(tournament_id) == user_id:
+                                if not check_if_tournament_manager(tournament_id, user_id):
                                     command = input(prompt.NOT_AUTHORIZED_ERROR_MESSAGE)
                                     continue
 
@@ -233,8 +237,7 @@ def control_loop():
                                     continue
                                 
                                 # Check if tournament_id is valid
-                                tournament_ids = get_tournament_ids()
-                                if not tournament_id in tournament_ids:
+                                if not check_if_tournament_exists(tournament_id):
                                     command = input(prompt.TOURNAMENT_ID_ERROR_MESSAGE)
                                     continue
 
@@ -311,14 +314,12 @@ def control_loop():
                                     continue
 
                                 # Check if player id is valid
-                                player_ids = get_player_ids()
-                                if not player_id in player_ids:
+                                if not check_if_player_exists(player_id):
                                     command = input(prompt.DELETE_PLAYER_ID_ERROR_MESSAGE)
                                     continue
                                 
                                 # Check if player is on a team managed by user
-                                player_team_id = get_team_by_player(player_id)
-                                if not get_team_manager_id(player_team_id) == user_id:
+                                if not check_if_player_manager(player_id, user_id):
                                     command = input(prompt.NOT_AUTHORIZED_ERROR_MESSAGE)
                                     continue
                                   
@@ -345,13 +346,12 @@ def control_loop():
                                     continue
                                 
                                 # Check if team number is valid
-                                team_ids = get_team_ids()
-                                if not team_id in team_ids:
+                                if not check_if_team_exists(team_id):
                                     command = input(prompt.TEAM_ID_ERROR_MESSAGE)
                                     continue
                                 
                                 # Check if team belongs to manager
-                                if not get_team_manager_id(team_id) == user_id:
+                                if not check_if_team_manager(team_id, user_id):
                                     command = input(prompt.NOT_AUTHORIZED_ERROR_MESSAGE)
                                     continue
 
@@ -416,13 +416,12 @@ def control_loop():
                                     continue
                                 
                                 # Check if team number is valid
-                                team_ids = get_team_ids()
-                                if not team_id in team_ids:
+                                if not check_if_team_exists(team_id):
                                     command = input(prompt.TEAM_ID_ERROR_MESSAGE)
                                     continue
                                 
                                 # Check if team belongs to manager
-                                if not get_team_manager_id(team_id) == user_id:
+                                if not check_if_team_manager(team_id, user_id):
                                     command = input(prompt.NOT_AUTHORIZED_ERROR_MESSAGE)
                                     continue
 
@@ -438,8 +437,7 @@ def control_loop():
                                     continue
                                 
                                 # Check if tournament_id is valid
-                                tournament_ids = get_tournament_ids()
-                                if not tournament_id in tournament_ids:
+                                if not check_if_tournament_exists(tournament_id):
                                     command = input(prompt.TOURNAMENT_ID_ERROR_MESSAGE)
                                     continue
 
@@ -484,6 +482,13 @@ def control_loop():
     print("\nGoodbye")
 
 if __name__ == "__main__":
+    configure_storage_from_env()
+    # Each league has its own databases, so it is chosen before logging in
+    league_menu(prompt.LEAGUE_MENU, prompt.CREATE_LEAGUE_MENU)
     setup_user_database()
     setup_tournament_database()
+    setup_archive_database()
+    # Loads the rows of the read-only views into memory once
+    get_read_model()
+    configure_replica_from_env()
     control_loop()
@@ -0,0 +1,124 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_game,
+    create_game_score,
+    register_team_in_tournament,
+    delete_tournament,
+    delete_team,
+    get_tournament_ids,
+    get_tournament_export)
+from database.archive_database import (
+    setup_archive_database,
+    archive_tournament_export,
+    get_archived_tournaments,
+    get_archived_tournament_by_id,
+    get_archived_tournament_page)
+from database.user_database import setup_user_database
+from backend.archive import archive_finished_tournaments, archive_tournament
+from datetime import datetime, timedelta
+from unittest import mock
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestArchive(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        setup_archive_database()
+        # Tournament 1 is over by the archive time, tournament 2 is not
+        create_tournament("Spring Cup", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        create_tournament("Summer Cup", "m", 18, 24, START,
+            START + timedelta(days=90), 1, "Test Location")
+        for number in range(1, 3):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+            register_team_in_tournament(1, number)
+        create_game(START, 1, "Field 1", 1, 2)
+        create_game_score(1, 1, 0)
+        create_game_score(1, 3, 2)
+        create_game(START + timedelta(days=1), 1, "Field 1", 2, 1)
+        create_game(START, 2, "Field 2", 1, 2)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_archive_finished(self):
+        started = datetime.now()
+        self.assertEqual(archive_finished_tournaments(
+            START + timedelta(days=30)), ([1], {}))
+        self.assertEqual(get_tournament_ids(), [2])
+
+        # Team names are kept even after the team is gone
+        delete_tournament(2)
+        delete_team(1)
+        tournament = get_archived_tournament_by_id(1)
+        self.assertEqual(tournament["name"], "Spring Cup")
+        archived_at = datetime.fromisoformat(tournament["archived_at"])
+        self.assertTrue(started <= archived_at <= datetime.now())
+        self.assertEqual(tournament["registered_teams"],
+            [{"team_id": 1, "name": "Test Name 1"},
+            {"team_id": 2, "name": "Test Name 2"}])
+        self.assertEqual([(game["game_id"], game["home_team_name"],
+            game["homescore"], game["awayscore"])
+            for game in tournament["games"]],
+            [(1, "Test Name 1", 3, 2), (2, "Test Name 2", None, None)])
+
+        self.assertEqual([tournament["tournament_id"] for tournament in
+            get_archived_tournaments(1)], [1])
+        self.assertEqual(get_archived_tournaments(2), [])
+        self.assertEqual(get_archived_tournament_page(query="spr"),
+            [{"tournament_id": 1, "name": "Spring Cup"}])
+
+    def test_duplicate_registration(self):
+        register_team_in_tournament(1, 1)
+        self.assertEqual(archive_finished_tournaments(
+            START + timedelta(days=30)), ([1], {}))
+        self.assertEqual(get_archived_tournament_by_id(1)
+            ["registered_teams"], [{"team_id": 1, "name": "Test Name 1"},
+            {"team_id": 2, "name": "Test Name 2"}])
+
+    def test_failed_tournament_skipped(self):
+        create_tournament("Autumn Cup", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        error = Exception("Export failed")
+        export = get_tournament_export
+
+        def get_export(tournament_id):
+            if tournament_id == 1:
+                raise error
+            return export(tournament_id)
+
+        with mock.patch("backend.archive.get_tournament_export",
+                side_effect=get_export):
+            self.assertEqual(archive_finished_tournaments(
+                START + timedelta(days=30)), ([3], {1: error}))
+        self.assertEqual(get_tournament_ids(), [1, 2])
+        self.assertEqual([tournament["tournament_id"] for tournament in
+            get_archived_tournaments()], [3])
+
+    def test_archive_again_replaces(self):
+        # A run interrupted after the copy leaves tournament 2 in both places
+        first_time = START + timedelta(days=1)
+        archive_tournament_export(get_tournament_export(2), first_time)
+        self.assertEqual(len(get_archived_tournament_by_id(2)["games"]), 1)
+
+        create_game(START + timedelta(days=2), 2, "Field 2", 2, 1)
+        create_game_score(3, 4, 0)
+        second_time = START + timedelta(days=2)
+        archive_tournament(2, second_time)
+
+        tournament = get_archived_tournament_by_id(2)
+        self.assertEqual(tournament["archived_at"], str(second_time))
+        self.assertEqual([(game["game_id"], game["homescore"])
+            for game in tournament["games"]], [(3, 4), (4, None)])
+        self.assertEqual(len(tournament["registered_teams"]), 0)
+        self.assertEqual([tournament["tournament_id"] for tournament in
+            get_archived_tournaments()], [2])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_game_score,
+    get_bracket,
+    get_tournament_schedule,
+    get_feeder_game_ids)
+from database.user_database import setup_user_database
+from backend.brackets import seed_positions, generate_bracket
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestBrackets(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        for number in range(1, 9):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_seed_positions(self):
+        self.assertEqual(seed_positions(8), [1, 8, 4, 5, 2, 7, 3, 6])
+
+    def test_full_bracket_advances(self):
+        generate_bracket(1, list(range(1, 9)), START, "Field 1")
+        bracket = get_bracket(1)
+        self.assertEqual([game["round"] for game in bracket],
+            [1, 1, 1, 1, 2, 2, 3])
+        first_round = bracket[:4]
+        self.assertEqual([(game["home_team"], game["away_team"])
+            for game in first_round], [(1, 8), (4, 5), (2, 7), (3, 6)])
+
+        # Away team 5 beats 4, home team 1 beats 8
+        create_game_score(first_round[1]["game_id"], 0, 2)
+        create_game_score(first_round[0]["game_id"], 3, 1)
+        semi_final = get_bracket(1)[4]
+        self.assertEqual((semi_final["home_team"], semi_final["away_team"]),
+            (1, 5))
+        self.assertEqual(get_feeder_game_ids(semi_final["game_id"]),
+            [first_round[0]["game_id"], first_round[1]["game_id"]])
+
+        # A correction replaces the advanced team
+        create_game_score(first_round[1]["game_id"], 3, 2)
+        self.assertEqual(get_bracket(1)[4]["away_team"], 4)
+
+    def test_byes(self):
+        generate_bracket(1, [1, 2, 3, 4, 5, 6], START, "Field 1")
+        bracket = get_bracket(1)
+        first_round = [game for game in bracket if game["round"] == 1]
+        self.assertEqual([(game["home_team"], game["away_team"])
+            for game in first_round], [(4, 5), (3, 6)])
+        second_round = [game for game in bracket if game["round"] == 2]
+        self.assertEqual([(game["home_team"], game["away_team"])
+            for game in second_round], [(1, None), (2, None)])
+
+        create_game_score(first_round[1]["game_id"], 1, 0)
+        second_round = [game for game in get_bracket(1) if game["round"] == 2]
+        self.assertEqual(second_round[1]["away_team"], 3)
+
+    def test_tie_does_not_advance(self):
+        generate_bracket(1, [1, 2, 3, 4], START, "Field 1")
+        bracket = get_bracket(1)
+        create_game_score(bracket[0]["game_id"], 1, 1)
+        self.assertIsNone(get_bracket(1)[2]["home_team"])
+
+    def test_correction_to_tie_clears_slot(self):
+        generate_bracket(1, [1, 2, 3, 4], START, "Field 1")
+        bracket = get_bracket(1)
+        create_game_score(bracket[0]["game_id"], 2, 1)
+        self.assertEqual(get_bracket(1)[2]["home_team"], 1)
+        create_game_score(bracket[0]["game_id"], 1, 1)
+        self.assertIsNone(get_bracket(1)[2]["home_team"])
+
+    def test_correction_after_next_round_rejected(self):
+        generate_bracket(1, [1, 2, 3, 4], START, "Field 1")
+        bracket = get_bracket(1)
+        create_game_score(bracket[0]["game_id"], 2, 1)
+        create_game_score(bracket[1]["game_id"], 2, 1)
+        create_game_score(bracket[2]["game_id"], 1, 0)
+        with self.assertRaises(Exception):
+            create_game_score(bracket[0]["game_id"], 0, 3)
+        self.assertEqual(get_bracket(1)[2]["home_team"], 1)
+        first_game = [game for game in get_tournament_schedule(1)
+            if game["game_id"] == bracket[0]["game_id"]][0]
+        self.assertEqual(first_game["homescore"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    transaction,
+    create_team,
+    create_player,
+    create_game,
+    create_game_score,
+    create_tournament,
+    delete_player,
+    get_changes_since,
+    get_latest_change_seq)
+from database import user_database
+from database.user_database import (
+    setup_user_database,
+    delete_user,
+    get_all_users)
+from database import change_log
+from backend import read_model
+from util.util import get_conn_curs, commit_close
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestChangeLog(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_writes_are_logged_in_order(self):
+        self.assertEqual(get_latest_change_seq(), 0)
+        create_team("Test Name 1", "m", 19, 20, 2)
+        create_player("Player 1", "m", 19, 1)
+        changes = get_changes_since()
+        self.assertEqual([(change["table"], change["operation"])
+            for change in changes], [("Teams", "insert"),
+            ("Players", "insert"), ("PlayersOnTeams", "insert"),
+            ("Teams", "update")])
+        self.assertEqual([change["seq"] for change in changes], [1, 2, 3, 4])
+        self.assertEqual(changes[0]["data"]["name"], "Test Name 1")
+        self.assertEqual(changes[3]["data"]["roster_count"], 1)
+        self.assertEqual(get_latest_change_seq(), 4)
+
+    def test_read_since(self):
+        create_team("Test Name 1", "m", 19, 20, 2)
+        seq = get_latest_change_seq()
+        create_player("Player 1", "m", 19, 1)
+        delete_player(1)
+        changes = get_changes_since(seq)
+        self.assertEqual(changes[0]["seq"], seq + 1)
+        deletes = [change for change in changes
+            if change["operation"] == "delete"]
+        self.assertEqual([change["table"] for change in deletes],
+            ["PlayersOnTeams", "Players"])
+        self.assertEqual(deletes[1]["data"]["name"], "Player 1")
+        self.assertEqual(len(get_changes_since(seq, 2)), 2)
+        self.assertEqual(get_changes_since(get_latest_change_seq()), [])
+
+    def test_rolled_back_writes_are_not_logged(self):
+        create_team("Test Name 1", "m", 19, 20, 2)
+        seq = get_latest_change_seq()
+        with self.assertRaises(ValueError):
+            with transaction():
+                create_player("Player 1", "m", 19, 1)
+                raise ValueError()
+        self.assertEqual(get_changes_since(seq), [])
+        self.assertEqual(get_latest_change_seq(), seq)
+
+    def test_scores_are_logged(self):
+        create_tournament("Test Name 1", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        create_team("Test Name 1", "m", 19, 20, 2)
+        create_team("Test Name 2", "m", 19, 20, 2)
+        create_game(START, 1, "Field 1", 1, 2)
+        seq = get_latest_change_seq()
+        create_game_score(1, 3, 1)
+        changes = get_changes_since(seq)
+        self.assertIn(("Scores", "insert"), [(change["table"],
+            change["operation"]) for change in changes])
+        game_update = changes[-1]
+        self.assertEqual((game_update["table"], game_update["row_id"]),
+            ("Games", 1))
+
+    def test_user_changes(self):
+        seq = user_database.get_latest_change_seq()
+        self.assertGreater(seq, 0)
+        delete_user(1)
+        changes = user_database.get_changes_since(seq)
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0]["operation"], "delete")
+        self.assertEqual(changes[0]["data"]["username"], "tm123")
+
+    def test_passwords_not_logged(self):
+        changes = user_database.get_changes_since()
+        self.assertEqual(len(changes), 5)
+        for change in changes:
+            self.assertNotIn("password", change["data"])
+        self.assertEqual(changes[0]["data"]["username"], "tm123")
+
+        # Passwords logged before they were excluded are removed
+        conn, curs = get_conn_curs(user_database.DB_NAME)
+        curs.execute("INSERT INTO ChangeLog (table_name, operation, " +
+            "row_id, data) VALUES ('Users', 'update', 1, " +
+            "'{\"id\":1,\"password\":\"secret\"}')")
+        commit_close(conn, curs)
+        setup_user_database()
+        self.assertNotIn("secret", str(user_database.get_changes_since()))
+
+    def test_user_reset_logged(self):
+        read_model.get_read_model()
+        seq = user_database.get_latest_change_seq()
+        setup_user_database()
+        changes = user_database.get_changes_since(seq)
+        self.assertEqual([(change["operation"], change["row_id"])
+            for change in changes],
+            [("delete", row_id) for row_id in range(1, 6)] +
+            [("insert", row_id) for row_id in range(1, 6)])
+
+        # Replaying the whole log gives the users without their passwords
+        rows = {}
+        for change in user_database.get_changes_since():
+            if change["operation"] == "delete":
+                del rows[change["row_id"]]
+            else:
+                rows[change["row_id"]] = change["data"]
+        table_rows = change_log.get_table_rows(user_database.DB_NAME,
+            "Users")
+        for row in table_rows.values():
+            del row["password"]
+        self.assertEqual(rows, table_rows)
+
+        # The read model still has whole users
+        self.assertEqual(read_model.get_read_model().get_user(1)["password"],
+            get_all_users()["tm123"]["password"])
+
+
+if __name__ == "__main__":
+    unittest.main()
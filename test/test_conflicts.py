@@ -0,0 +1,69 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_game,
+    get_game_conflicts,
+    get_batch_game_conflicts)
+from database.user_database import setup_user_database
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 12, 0)
+
+class TestGameConflicts(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name", "m", 18, 24, START,
+            START + timedelta(days = 2), 1, "Test Location")
+        for number in range(1, 5):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+        # Game 1: teams 1 and 2 on Field 1 at noon
+        create_game(START, 1, "Field 1", 1, 2)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_location_conflict(self):
+        conflicts = get_game_conflicts(START + timedelta(hours=1),
+            "Field 1", 3, 4)
+        self.assertEqual(conflicts, [{"index": 0, "conflict": "location",
+            "game_id": 1, "other_index": None}])
+
+    def test_team_conflict(self):
+        conflicts = get_game_conflicts(START - timedelta(minutes=30),
+            "Field 2", 3, 1)
+        self.assertEqual(conflicts, [{"index": 0, "conflict": "away_team",
+            "game_id": 1, "other_index": None}])
+
+    def test_back_to_back_is_not_a_conflict(self):
+        self.assertEqual(get_game_conflicts(START + timedelta(hours=2),
+            "Field 1", 1, 2), [])
+        self.assertEqual(get_game_conflicts(START - timedelta(hours=2),
+            "Field 1", 2, 1), [])
+
+    def test_batch(self):
+        games = [
+            # Clashes with game 1 on location and with both teams
+            {"time": START, "location": "Field 1", "home_team": 2,
+                "away_team": 1},
+            # Clashes with the next proposed game on Field 2
+            {"time": START + timedelta(hours=3), "location": "Field 2",
+                "home_team": 3, "away_team": None},
+            {"time": START + timedelta(hours=4), "location": "Field 2",
+                "home_team": 4, "away_team": None}]
+        conflicts = get_batch_game_conflicts(games)
+        existing = [(c["index"], c["conflict"]) for c in conflicts
+            if c["game_id"] == 1]
+        self.assertEqual(sorted(existing), [(0, "away_team"),
+            (0, "home_team"), (0, "location")])
+        within = [(c["index"], c["conflict"], c["other_index"])
+            for c in conflicts if c["game_id"] is None]
+        self.assertEqual(within, [(2, "location", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
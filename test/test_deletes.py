@@ -0,0 +1,122 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    DB_NAME,
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_player,
+    create_game,
+    create_games,
+    create_game_score,
+    register_team_in_tournament,
+    delete_tournament,
+    delete_team,
+    delete_player,
+    get_bracket)
+from database.user_database import setup_user_database
+from backend.brackets import generate_bracket
+from util.util import get_conn_curs, commit_close
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+TABLES = ["Tournaments", "Teams", "Players", "Games", "Scores",
+    "TournamentRegistrations", "PlayersOnTeams", "GamesInTournaments",
+    "GameScores", "BracketGames"]
+
+class TestDeletes(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        for number in range(1, 3):
+            create_tournament(f"Test Name {number}", "m", 18, 24, START,
+                START + timedelta(days=7), 1, "Test Location")
+        for number in range(1, 5):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+            create_player(f"Player {number}", "m", 19, number)
+            register_team_in_tournament(1, number)
+        register_team_in_tournament(2, 1)
+
+        # Tournament 1 has a scored and corrected game, tournament 2 one game
+        create_game(START, 1, "Field 1", 1, 2)
+        create_game_score(1, 1, 0)
+        create_game_score(1, 2, 0)
+        create_game(START, 2, "Field 2", 3, 4)
+        create_game_score(2, 0, 0)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def count_rows(self):
+        conn, curs = get_conn_curs(DB_NAME)
+        counts = {}
+        for table in TABLES:
+            curs.execute("SELECT COUNT(*) FROM " + table)
+            counts[table] = curs.fetchone()[0]
+        commit_close(conn, curs)
+        return counts
+
+    def test_delete_tournament(self):
+        counts = delete_tournament(1)
+        self.assertEqual(counts, {"bracket_games": 0, "game_scores": 2,
+            "games_in_tournaments": 1, "games": 1, "scores": 2,
+            "tournament_registrations": 4, "tournaments": 1})
+        self.assertEqual(self.count_rows(), {"Tournaments": 1, "Teams": 4,
+            "Players": 4, "Games": 1, "Scores": 1,
+            "TournamentRegistrations": 1, "PlayersOnTeams": 4,
+            "GamesInTournaments": 1, "GameScores": 1, "BracketGames": 0})
+
+    def test_delete_team(self):
+        create_team("Test Name 5", "m", 19, 20, 2)
+        create_player("Player 5", "m", 19, 5)
+        register_team_in_tournament(1, 5)
+        self.assertEqual(delete_team(5), {"players_on_teams": 1,
+            "players": 1, "tournament_registrations": 1, "teams": 1})
+        self.assertEqual(self.count_rows(), {"Tournaments": 2, "Teams": 4,
+            "Players": 4, "Games": 2, "Scores": 3,
+            "TournamentRegistrations": 5, "PlayersOnTeams": 4,
+            "GamesInTournaments": 2, "GameScores": 3, "BracketGames": 0})
+
+    def test_delete_team_with_games(self):
+        rows = self.count_rows()
+        with self.assertRaises(Exception):
+            delete_team(1)
+        self.assertEqual(self.count_rows(), rows)
+
+        # Once its tournaments are gone the team can be deleted
+        delete_tournament(1)
+        delete_tournament(2)
+        self.assertEqual(delete_team(1)["teams"], 1)
+
+    def test_delete_team_in_bracket(self):
+        generate_bracket(2, [1, 2, 3, 4], START + timedelta(days=1),
+            "Field 1")
+        # Team 1 wins its first round game and advances to the final, the
+        # final being created first
+        create_game_score(4, 2, 0)
+        bracket = get_bracket(2)
+        with self.assertRaises(Exception):
+            delete_team(4)
+        self.assertEqual(get_bracket(2), bracket)
+        self.assertEqual(len(bracket), 3)
+
+    def test_delete_player(self):
+        self.assertEqual(delete_player(4),
+            {"players_on_teams": 1, "players": 1})
+        self.assertEqual(delete_player(4),
+            {"players_on_teams": 0, "players": 0})
+
+    def test_delete_many_games(self):
+        games = [{"time": START + timedelta(hours=number),
+            "location": f"Field {number}", "home_team": 1, "away_team": 2}
+            for number in range(3000)]
+        create_games(1, games)
+        counts = delete_tournament(1)
+        self.assertEqual(counts["games"], 3001)
+        self.assertEqual(self.count_rows()["Games"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
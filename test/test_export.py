@@ -0,0 +1,159 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_player,
+    create_game,
+    create_game_score,
+    register_team_in_tournament,
+    get_tournament_schedule,
+    get_latest_change_seq,
+    stream_games_json,
+    stream_rosters_json)
+from database import user_database
+from database.user_database import (
+    setup_user_database,
+    delete_user,
+    get_all_users)
+from backend.export import export_view, export_league, main
+from datetime import datetime, timedelta
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestExport(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        for number in range(1, 3):
+            create_tournament(f"Test Name {number}", "m", 18, 24, START,
+                START + timedelta(days=7), 1, "Test Location")
+        for number in range(1, 4):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+            create_player(f"Player {number}", "m", 19, number)
+            register_team_in_tournament(1, number)
+        create_player("Player \"4\"", "m", 20, 1)
+        create_game(START + timedelta(hours=3), 1, "Field 1", 1, 2)
+        create_game(START, 1, "Field 2", 2, 3)
+        create_game(START, 2, "Field 1", 1, 3)
+        create_game_score(1, 2, 1)
+        create_game_score(1, 3, 1)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def export(self, view, output_format="ndjson", **filters):
+        out = io.StringIO()
+        export_view(view, out, output_format, **filters)
+        return out.getvalue()
+
+    def test_games_match_schedule(self):
+        games = [json.loads(line) for line in
+            self.export("games", tournament_id=1).splitlines()]
+        for game in games:
+            self.assertEqual(game.pop("tournament_id"), 1)
+        self.assertEqual(games, get_tournament_schedule(1))
+        self.assertEqual(len(self.export("games").splitlines()), 3)
+
+    def test_json_array(self):
+        tournaments = json.loads(self.export("tournaments", "json"))
+        self.assertEqual([tournament["tournament_id"]
+            for tournament in tournaments], [1, 2])
+        self.assertEqual(tournaments[0]["registered_team_ids"], [1, 2, 3])
+        self.assertEqual(tournaments[1]["registered_team_ids"], [])
+        self.assertEqual(json.loads(self.export("teams", "json",
+            tournament_id=1, team_id=2))[0]["name"], "Test Name 2")
+        self.assertEqual(json.loads(self.export("scores", "json",
+            tournament_id=2)), [])
+
+    def test_rosters_and_scores(self):
+        roster = [json.loads(record) for record in stream_rosters_json(1)]
+        self.assertEqual([player["name"] for player in roster],
+            ["Player 1", "Player \"4\""])
+        scores = [json.loads(line) for line in
+            self.export("scores").splitlines()]
+        self.assertEqual([(score["homescore"], score["is_current"])
+            for score in scores], [(2, 0), (3, 1)])
+
+    def test_league(self):
+        out = io.StringIO()
+        export_league(out)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line["type"] for line in lines].count("roster"), 4)
+        self.assertEqual(lines[0], {"type": "tournament",
+            "data": json.loads(self.export("tournaments").splitlines()[0])})
+
+        out = io.StringIO()
+        export_league(out, "json")
+        league = json.loads(out.getvalue())
+        self.assertEqual(list(league),
+            ["tournaments", "teams", "rosters", "games", "scores"])
+        self.assertEqual(len(league["games"]), 3)
+
+    def test_stream_closed_early(self):
+        games = stream_games_json()
+        next(games)
+        games.close()
+        create_team("Test Name 4", "m", 19, 20, 2)
+        self.assertEqual(len(self.export("teams").splitlines()), 4)
+
+
+class TestExportCommand(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.working_directory = os.getcwd()
+        configure_storage("sqlite", directory=self.directory.name)
+
+    def tearDown(self):
+        os.chdir(self.working_directory)
+        configure_storage("sqlite")
+        self.directory.cleanup()
+
+    def run_export(self, args):
+        os.chdir(self.directory.name)
+        output = io.StringIO()
+        errors = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                with contextlib.redirect_stderr(errors):
+                    main(args)
+        finally:
+            os.chdir(self.working_directory)
+        return output.getvalue()
+
+    def test_does_not_write(self):
+        setup_user_database()
+        setup_tournament_database()
+        create_team("Test Name 1", "m", 19, 20, 2)
+        # A user removed while the app runs stays removed
+        delete_user(5)
+        seqs = (get_latest_change_seq(),
+            user_database.get_latest_change_seq())
+
+        output = self.run_export(["teams"])
+        self.assertEqual(json.loads(output)["name"], "Test Name 1")
+
+        configure_storage("sqlite", directory=self.directory.name)
+        self.assertEqual((get_latest_change_seq(),
+            user_database.get_latest_change_seq()), seqs)
+        self.assertNotIn("mantoo", get_all_users())
+
+    def test_not_set_up(self):
+        with self.assertRaises(SystemExit):
+            self.run_export(["teams"])
+        self.assertEqual(os.listdir(self.directory.name), [])
+        with self.assertRaises(SystemExit):
+            self.run_export(["teams", "--league", "unknown"])
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name,
+            "tenants", "unknown")))
+
+
+if __name__ == "__main__":
+    unittest.main()
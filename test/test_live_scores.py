@@ -0,0 +1,217 @@
+from database.storage import configure_storage, set_tenant
+from database.tournament_database import (
+    setup_tournament_database,
+    transaction,
+    create_tournament,
+    create_team,
+    create_game,
+    create_game_score)
+from database.user_database import setup_user_database
+from database.events import (
+    SCORE_TOPIC,
+    subscribe,
+    unsubscribe,
+    subscribe_async)
+from backend.live_scores import (
+    LiveScoreServer,
+    read_live_scores,
+    get_live_scores_path)
+from datetime import datetime, timedelta
+from unittest import mock
+import asyncio
+import contextlib
+import io
+import os
+import socket
+import sys
+import tempfile
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestLiveScores(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name 1", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        create_team("Test Name 1", "m", 19, 20, 2)
+        create_team("Test Name 2", "m", 19, 20, 2)
+        create_game(START, 1, "Field 1", 1, 2)
+        create_game(START + timedelta(hours=3), 1, "Field 1", 2, 1)
+        self.events = []
+        self.subscription = subscribe(SCORE_TOPIC, self.events.append)
+
+    def tearDown(self):
+        unsubscribe(self.subscription)
+        set_tenant(None)
+        configure_storage("sqlite")
+
+    def test_score_is_published(self):
+        create_game_score(1, 3, 1)
+        self.assertEqual(self.events, [{"game_id": 1, "tournament_id": 1,
+            "home_team": 1, "home_team_name": "Test Name 1",
+            "away_team": 2, "away_team_name": "Test Name 2",
+            "homescore": 3, "awayscore": 1, "score_id": 1}])
+
+    def test_published_after_outer_commit(self):
+        with transaction():
+            create_game_score(1, 3, 1)
+            create_game_score(2, 0, 0)
+            self.assertEqual(self.events, [])
+        self.assertEqual([event["game_id"] for event in self.events], [1, 2])
+
+    def test_rolled_back_score_is_not_published(self):
+        with transaction():
+            create_game_score(1, 3, 1)
+            try:
+                with transaction():
+                    create_game_score(2, 0, 0)
+                    raise ValueError()
+            except ValueError:
+                pass
+        self.assertEqual([event["game_id"] for event in self.events], [1])
+
+        with self.assertRaises(ValueError):
+            with transaction():
+                create_game_score(2, 0, 0)
+                raise ValueError()
+        self.assertEqual(len(self.events), 1)
+
+    def test_other_tenants_are_not_told(self):
+        set_tenant("other")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name 1", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        create_team("Test Name 1", "m", 19, 20, 2)
+        create_team("Test Name 2", "m", 19, 20, 2)
+        create_game(START, 1, "Field 1", 1, 2)
+        create_game_score(1, 1, 1)
+        self.assertEqual(self.events, [])
+
+    def test_failing_subscriber_does_not_fail_write(self):
+        def fail(event):
+            raise ValueError()
+
+        failing = subscribe(SCORE_TOPIC, fail)
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                create_game_score(1, 3, 1)
+        finally:
+            unsubscribe(failing)
+        self.assertEqual(len(self.events), 1)
+
+    def test_async_subscription(self):
+        async def consume():
+            subscription = subscribe_async(SCORE_TOPIC, maxsize=1)
+            create_game_score(1, 3, 1)
+            create_game_score(2, 0, 0)
+            event = await asyncio.wait_for(subscription.get(), 1)
+            subscription.close()
+            return event, subscription.dropped
+
+        event, dropped = asyncio.run(consume())
+        self.assertEqual(event["game_id"], 2)
+        self.assertEqual(dropped, 1)
+
+    def test_socket_clients(self):
+        async def serve(path):
+            server = LiveScoreServer(path, interval=0.01)
+            await server.start()
+            feeds = [read_live_scores(path) for number in range(3)]
+            reads = [asyncio.create_task(feed.__anext__())
+                for feed in feeds]
+            while len(server.writers) < 3:
+                await asyncio.sleep(0.01)
+            create_game_score(1, 3, 1)
+            events = await asyncio.wait_for(asyncio.gather(*reads), 1)
+            for feed in feeds:
+                await feed.aclose()
+            await server.close()
+            return events
+
+        with tempfile.TemporaryDirectory() as directory:
+            events = asyncio.run(serve(os.path.join(directory, "scores")))
+        self.assertEqual([event["homescore"] for event in events], [3, 3, 3])
+        self.assertEqual(events[0], {"game_id": 1, "tournament_id": 1,
+            "home_team": 1, "home_team_name": "Test Name 1",
+            "away_team": 2, "away_team_name": "Test Name 2",
+            "homescore": 3, "awayscore": 1, "score_id": 1})
+
+    def test_path_per_league(self):
+        with mock.patch.dict(os.environ, {"LIVE_SCORES_SOCKET": "scores"}):
+            self.assertEqual(get_live_scores_path(), "scores")
+            set_tenant("league-a")
+            self.assertEqual(get_live_scores_path(),
+                os.path.join("tenants", "league-a", "scores"))
+        with mock.patch.dict(os.environ, {"LIVE_SCORES_SOCKET": ""}):
+            self.assertIsNone(get_live_scores_path())
+
+    def test_stale_socket_is_replaced(self):
+        async def serve(path):
+            server = LiveScoreServer(path)
+            await server.start()
+            await server.close()
+            return os.path.exists(path)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "scores")
+            # A socket file nobody listens on, as after a crash
+            stale = socket.socket(socket.AF_UNIX)
+            stale.bind(path)
+            stale.close()
+            self.assertFalse(asyncio.run(serve(path)))
+
+
+# Scores entered by another process, which the server only learns about from
+# the change log
+WRITE_SCORE = """
+from database.storage import configure_storage
+from database.tournament_database import create_game_score
+configure_storage("sqlite", directory={directory!r})
+create_game_score(2, 4, 2)
+"""
+
+class TestLiveScoresFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        configure_storage("sqlite", directory=self.directory.name)
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name 1", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        create_team("Test Name 1", "m", 19, 20, 2)
+        create_team("Test Name 2", "m", 19, 20, 2)
+        create_game(START, 1, "Field 1", 1, 2)
+        create_game(START + timedelta(hours=3), 1, "Field 1", 2, 1)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+        self.directory.cleanup()
+
+    def test_scores_from_other_processes(self):
+        async def serve(path):
+            server = LiveScoreServer(path, interval=0.01)
+            await server.start()
+            feed = read_live_scores(path)
+            read = asyncio.create_task(feed.__anext__())
+            while not server.writers:
+                await asyncio.sleep(0.01)
+            writer = await asyncio.create_subprocess_exec(sys.executable,
+                "-c", WRITE_SCORE.format(directory=self.directory.name))
+            self.assertEqual(await writer.wait(), 0)
+            event = await asyncio.wait_for(read, 5)
+            await feed.aclose()
+            await server.close()
+            return event
+
+        event = asyncio.run(serve(os.path.join(self.directory.name,
+            "scores")))
+        self.assertEqual((event["game_id"], event["homescore"],
+            event["home_team_name"]), (2, 4, "Test Name 2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_player,
+    get_tournament_summaries,
+    get_team_summaries,
+    get_player_summaries,
+    check_if_tournament_exists,
+    check_if_team_exists,
+    check_if_player_exists,
+    check_if_tournament_manager,
+    check_if_team_manager,
+    check_if_player_manager,
+    create_game,
+    get_tournament_page,
+    get_team_page,
+    get_game_page)
+from database.user_database import setup_user_database, get_user_page
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestProjections(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Cup 1", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        create_tournament("Cup 2", "m", 18, 24, START,
+            START + timedelta(days=7), 4, "Test Location")
+        create_team("Team 1", "m", 19, 20, 2)
+        create_team("Team 2", "m", 19, 20, 4)
+        create_player("Player 1", "m", 19, 1)
+        create_player("Player 2", "m", 20, 2)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_summaries(self):
+        self.assertEqual(get_tournament_summaries(), {
+            1: {"tournament_id": 1, "name": "Cup 1"},
+            2: {"tournament_id": 2, "name": "Cup 2"}})
+        self.assertEqual(get_tournament_summaries(4),
+            {2: {"tournament_id": 2, "name": "Cup 2"}})
+        self.assertEqual(get_team_summaries(2),
+            {1: {"team_id": 1, "name": "Team 1"}})
+        self.assertEqual(len(get_team_summaries()), 2)
+        self.assertEqual(get_player_summaries(2),
+            {2: {"player_id": 2, "name": "Player 2"}})
+        self.assertEqual(get_team_summaries(3), {})
+
+    def test_exists(self):
+        self.assertTrue(check_if_tournament_exists(2))
+        self.assertFalse(check_if_tournament_exists(3))
+        self.assertTrue(check_if_team_exists(1))
+        self.assertFalse(check_if_team_exists(3))
+        self.assertTrue(check_if_player_exists(2))
+        self.assertFalse(check_if_player_exists(3))
+
+    def test_ownership(self):
+        self.assertTrue(check_if_tournament_manager(1, 1))
+        self.assertFalse(check_if_tournament_manager(2, 1))
+        self.assertFalse(check_if_tournament_manager(3, 1))
+        self.assertTrue(check_if_team_manager(2, 4))
+        self.assertFalse(check_if_team_manager(2, 2))
+        self.assertTrue(check_if_player_manager(1, 2))
+        self.assertFalse(check_if_player_manager(1, 4))
+        self.assertFalse(check_if_player_manager(3, 2))
+
+
+class TestPages(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Spring Cup", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        for number in range(1, 8):
+            create_team(f"Team {number}", "m", 19, 20, 2 if number < 5 else 4)
+        create_team("Eagles_1", "m", 19, 20, 4)
+        for number in range(1, 4):
+            create_game(START + timedelta(hours=number), 1,
+                f"Field {number}", 1, 2)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_keyset_pages(self):
+        first_page = get_team_page(limit=3)
+        self.assertEqual([team["team_id"] for team in first_page], [1, 2, 3])
+        second_page = get_team_page(first_page[-1]["team_id"], 3)
+        self.assertEqual([team["team_id"] for team in second_page],
+            [4, 5, 6])
+        self.assertEqual(get_team_page(8, 3), [])
+
+    def test_filtered_pages(self):
+        self.assertEqual(get_team_page(limit=10, manager_id=4),
+            [{"team_id": 5, "name": "Team 5"},
+            {"team_id": 6, "name": "Team 6"},
+            {"team_id": 7, "name": "Team 7"},
+            {"team_id": 8, "name": "Eagles_1"}])
+        self.assertEqual([team["team_id"] for team in
+            get_team_page(5, 10, "team", 4)], [6, 7])
+        # Short filters match the start of names, wildcards match literally
+        self.assertEqual([team["team_id"] for team in
+            get_team_page(query="_1")], [])
+        self.assertEqual([team["team_id"] for team in
+            get_team_page(query="ea")], [8])
+        self.assertEqual(get_tournament_page(query="cup"),
+            [{"tournament_id": 1, "name": "Spring Cup"}])
+        self.assertEqual(get_tournament_page(manager_id=2), [])
+
+    def test_game_and_user_pages(self):
+        games = get_game_page(1, 1, 10)
+        self.assertEqual([game["game_id"] for game in games], [2, 3])
+        self.assertEqual(games[0]["location"], "Field 2")
+        self.assertEqual([game["game_id"] for game in
+            get_game_page(1, query="field 3")], [3])
+        users = get_user_page(limit=2)
+        self.assertEqual(users[0], {"user_id": 1, "username": "tm123"})
+        self.assertEqual(get_user_page(query="original"),
+            [{"user_id": 2, "username": "originalcoach"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
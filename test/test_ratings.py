@@ -0,0 +1,89 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_game,
+    create_game_score)
+from database.user_database import setup_user_database
+from backend.ratings import (
+    RatingEngine,
+    rate_games,
+    get_outcomes,
+    INITIAL_RATING,
+    K_FACTOR)
+from datetime import datetime, timedelta
+import numpy as np
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+# Rates games one at a time, for comparison with the batched version
+def rate_sequentially(ratings, home, away, outcomes):
+    for home_index, away_index, outcome in zip(home, away, outcomes):
+        expected = 1.0 / (1.0 + 10.0 ** ((ratings[away_index] -
+            ratings[home_index]) / 400.0))
+        ratings[home_index] += K_FACTOR * (outcome - expected)
+        ratings[away_index] -= K_FACTOR * (outcome - expected)
+
+class TestRateGames(unittest.TestCase):
+    def test_matches_sequential(self):
+        generator = np.random.default_rng(0)
+        home = generator.integers(0, 10, 2000)
+        away = (home + generator.integers(1, 10, 2000)) % 10
+        outcomes = get_outcomes(generator.integers(0, 4, 2000),
+            generator.integers(0, 4, 2000))
+
+        ratings = np.full(10, INITIAL_RATING)
+        rate_games(ratings, home, away, outcomes)
+        expected = [INITIAL_RATING] * 10
+        rate_sequentially(expected, home, away, outcomes)
+        self.assertTrue(np.allclose(ratings, expected))
+
+class TestRatingEngine(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        for number in range(1, 4):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+        # Games 1 to 3
+        create_game(START, 1, "Field 1", 1, 2)
+        create_game(START + timedelta(days=1), 1, "Field 1", 2, 3)
+        create_game(START + timedelta(days=2), 1, "Field 1", 3, 1)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_incremental_matches_recompute(self):
+        create_game_score(1, 2, 0)
+        engine = RatingEngine()
+        create_game_score(2, 1, 1)
+        create_game_score(3, 0, 3)
+        engine.update()
+        self.assertEqual(engine.get_ratings(), RatingEngine().get_ratings())
+        self.assertEqual(engine.rank_teams([3, 2, 1]), [1, 2, 3])
+
+    def test_correction_recomputes(self):
+        create_game_score(1, 2, 0)
+        engine = RatingEngine()
+        self.assertGreater(engine.get_rating(1), engine.get_rating(2))
+        create_game_score(1, 0, 2)
+        engine.update()
+        self.assertLess(engine.get_rating(1), engine.get_rating(2))
+        self.assertEqual(engine.get_rating(3), INITIAL_RATING)
+
+    def test_scores_entered_out_of_order(self):
+        create_game_score(3, 0, 3)
+        engine = RatingEngine()
+        # Games 1 and 2 were played before game 3 but scored after it
+        create_game_score(2, 1, 1)
+        create_game_score(1, 2, 0)
+        engine.update()
+        self.assertEqual(engine.get_ratings(), RatingEngine().get_ratings())
+
+
+if __name__ == "__main__":
+    unittest.main()
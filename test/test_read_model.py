@@ -0,0 +1,142 @@
+from database.storage import configure_storage
+from database import tournament_database
+from database.tournament_database import (
+    setup_tournament_database,
+    clear_tournament_database,
+    create_tournament,
+    create_team,
+    create_player,
+    create_game,
+    create_game_score,
+    register_team_in_tournament,
+    update_tournament_location,
+    close_reg,
+    delete_player,
+    delete_team,
+    delete_tournament)
+from database.user_database import setup_user_database
+from backend import read_model
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestReadModel(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name 1", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        for number in range(1, 4):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+            create_player(f"Player {number}", "m", 19, number)
+            register_team_in_tournament(1, number)
+        create_player("Player 4", "m", 20, 1)
+        create_game(START + timedelta(hours=3), 1, "Field 1", 1, 2)
+        create_game(START, 1, "Field 2", 2, 3)
+        create_game_score(1, 2, 1)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def assertMatchesDatabase(self):
+        self.assertEqual(read_model.get_all_teams(),
+            tournament_database.get_all_teams())
+        self.assertEqual(read_model.get_all_tournaments(),
+            tournament_database.get_all_tournaments())
+        self.assertEqual(read_model.get_tournament_schedule(1),
+            tournament_database.get_tournament_schedule(1))
+
+    def test_built_from_database(self):
+        self.assertMatchesDatabase()
+        self.assertEqual([game["game_id"] for game in
+            read_model.get_tournament_schedule(1)], [2, 1])
+        self.assertEqual(read_model.get_tournament_schedule(2), [])
+
+    def test_follows_writes(self):
+        read_model.get_read_model()
+        create_game_score(1, 2, 2)
+        create_game_score(2, 0, 1)
+        update_tournament_location(1, "New Location")
+        close_reg(1)
+        create_team("Test Name 4", "m", 19, 20, 4)
+        create_player("Player 5", "m", 19, 4)
+        self.assertMatchesDatabase()
+        self.assertEqual(read_model.get_tournament_schedule(1)[1]
+            ["homescore"], 2)
+
+    def test_follows_deletes(self):
+        read_model.get_read_model()
+        delete_player(4)
+        delete_tournament(1)
+        delete_team(3)
+        self.assertMatchesDatabase()
+        self.assertEqual(len(read_model.get_all_teams()), 2)
+        self.assertEqual(read_model.get_tournament_schedule(1), [])
+
+    def test_rolled_back_writes_not_applied(self):
+        read_model.get_read_model()
+        with self.assertRaises(ValueError):
+            with tournament_database.transaction():
+                create_team("Test Name 4", "m", 19, 20, 2)
+                self.assertEqual(len(read_model.get_all_teams()), 4)
+                raise ValueError()
+        # Takes the sequence numbers the rolled back write had used
+        create_team("Test Name 5", "m", 19, 20, 2)
+        self.assertMatchesDatabase()
+
+    def test_rolled_back_team_not_served(self):
+        delete_tournament(1)
+        for team_id in range(1, 4):
+            delete_team(team_id)
+        read_model.get_read_model()
+        with self.assertRaises(ValueError):
+            with tournament_database.transaction():
+                create_team("Ghost", "m", 19, 20, 2)
+                read_model.get_all_teams()
+                raise ValueError()
+        create_team("Real", "m", 19, 20, 2)
+        self.assertEqual([team["name"] for team in
+            read_model.get_all_teams().values()], ["Real"])
+        self.assertMatchesDatabase()
+
+    def test_not_read_inside_transaction(self):
+        model = read_model.get_read_model()
+        with tournament_database.transaction():
+            create_team("Test Name 4", "m", 19, 20, 2)
+            with self.assertRaises(AssertionError):
+                model.refresh()
+        # A model is not built inside a transaction either
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        with tournament_database.transaction():
+            create_team("Test Name 1", "m", 19, 20, 2)
+            with self.assertRaises(AssertionError):
+                read_model.get_read_model()
+
+    def test_built_once(self):
+        model = read_model.get_read_model()
+        create_player("Player 5", "m", 19, 2)
+        read_model.get_all_teams()
+        self.assertIs(read_model.get_read_model(), model)
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        self.assertIsNot(read_model.get_read_model(), model)
+        self.assertEqual(read_model.get_all_teams(), {})
+
+    def test_rebuilt_after_clear(self):
+        delete_tournament(1)
+        read_model.get_read_model()
+        clear_tournament_database()
+        setup_tournament_database()
+        self.assertEqual(read_model.get_all_teams(), {})
+        self.assertEqual(read_model.get_all_tournaments(), {})
+        create_team("Test Name 5", "m", 19, 20, 2)
+        self.assertMatchesDatabase()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    transaction,
+    create_tournament,
+    create_team,
+    create_player,
+    register_team_in_tournament)
+from database.user_database import setup_user_database
+from backend.tournaments import (
+    print_all_teams,
+    get_all_teams_text,
+    get_all_tournaments_text)
+from backend.render_cache import get_cached_output, get_data_version
+from datetime import datetime, timedelta
+import contextlib
+import io
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name 1", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        create_team("Test Name 1", "m", 19, 20, 2)
+        create_player("Player 1", "m", 19, 1)
+        register_team_in_tournament(1, 1)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_reused_until_write(self):
+        text = get_all_teams_text()
+        self.assertIn("Team Name: Test Name 1", text)
+        self.assertIs(get_all_teams_text(), text)
+
+        version = get_data_version()
+        create_player("Player 2", "f", 20, 1)
+        self.assertGreater(get_data_version(), version)
+        new_text = get_all_teams_text()
+        self.assertIsNot(new_text, text)
+        self.assertIn("Player 2", new_text)
+
+    def test_print_all_teams(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            print_all_teams()
+            print_all_teams()
+        text = get_all_teams_text()
+        self.assertEqual(output.getvalue(), text + text)
+        self.assertTrue(text.startswith("*** VIEWING TEAMS ***\n"))
+
+    def test_tournaments_text(self):
+        text = get_all_tournaments_text()
+        self.assertIn("Test Location", text)
+        self.assertIs(get_all_tournaments_text(), text)
+
+    def test_uncommitted_writes_not_cached_for_later(self):
+        text = get_all_teams_text()
+        with self.assertRaises(ValueError):
+            with transaction():
+                create_team("Test Name 2", "m", 19, 20, 2)
+                self.assertIn("Test Name 2", get_all_teams_text())
+                raise ValueError()
+        self.assertIs(get_all_teams_text(), text)
+        # A different write now has the version the rolled back one had
+        create_team("Test Name 3", "m", 19, 20, 2)
+        self.assertIn("Test Name 3", get_all_teams_text())
+
+    def test_other_engine_not_served(self):
+        calls = []
+        render = lambda: calls.append(1) or len(calls)
+        self.assertEqual(get_cached_output("test", render), 1)
+        self.assertEqual(get_cached_output("test", render), 1)
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        self.assertEqual(get_cached_output("test", render), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
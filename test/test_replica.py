@@ -0,0 +1,188 @@
+from database.storage import (
+    configure_storage,
+    set_read_route,
+    connect,
+    read_from_replica)
+from database.tournament_database import (
+    DB_NAME,
+    setup_tournament_database,
+    transaction,
+    create_tournament,
+    create_team,
+    create_player,
+    create_game,
+    create_game_score,
+    register_team_in_tournament,
+    delete_team,
+    get_team_by_id,
+    get_team_ids,
+    get_tournament_by_name,
+    get_tournament_page,
+    get_scored_game_columns,
+    get_tournament_schedule,
+    search_teams)
+from database.user_database import setup_user_database
+from database.replica import (
+    get_replica_name,
+    sync_replica,
+    start_replica,
+    stop_replica)
+from backend.swiss import create_swiss_round
+from util.util import get_conn_curs, commit_close
+from datetime import datetime, timedelta
+import os
+import tempfile
+import time
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+TABLES = ["Tournaments", "Teams", "Players", "Games", "Scores",
+    "TournamentRegistrations", "PlayersOnTeams", "GamesInTournaments",
+    "GameScores", "BracketGames", "ChangeLog"]
+
+class TestReplica(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name 1", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        for number in range(1, 4):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+            create_player(f"Player {number}", "m", 19, number)
+        create_game(START, 1, "Field 1", 1, 2)
+
+    def tearDown(self):
+        set_read_route(DB_NAME)
+        configure_storage("sqlite")
+
+    def dump(self, db_name):
+        conn, curs = get_conn_curs(db_name)
+        tables = {}
+        for table in TABLES:
+            curs.execute("SELECT rowid, * FROM " + table + " ORDER BY rowid")
+            tables[table] = curs.fetchall()
+        commit_close(conn, curs)
+        return tables
+
+    def test_copy_then_ship_changes(self):
+        self.assertIsNone(sync_replica(DB_NAME))
+        self.assertEqual(self.dump(get_replica_name(DB_NAME)),
+            self.dump(DB_NAME))
+
+        create_game_score(1, 2, 1)
+        create_player("Player 4", "m", 20, 1)
+        delete_team(3)
+        self.assertGreater(sync_replica(DB_NAME), 0)
+        self.assertEqual(self.dump(get_replica_name(DB_NAME)),
+            self.dump(DB_NAME))
+        self.assertEqual(sync_replica(DB_NAME), 0)
+
+    def test_replica_search_follows(self):
+        sync_replica(DB_NAME)
+        create_team("Eagles", "m", 19, 20, 2)
+        sync_replica(DB_NAME)
+        set_read_route(DB_NAME, get_replica_name(DB_NAME))
+        conn = connect(get_replica_name(DB_NAME))
+        rows = conn.execute("SELECT rowid FROM TeamSearch " +
+            "WHERE TeamSearch MATCH 'agle'").fetchall()
+        conn.close()
+        self.assertEqual(rows, [(4,)])
+
+    def test_reports_routed_to_replica(self):
+        sync_replica(DB_NAME)
+        set_read_route(DB_NAME, get_replica_name(DB_NAME))
+        create_game_score(1, 2, 1)
+        # The write went to the primary, the replica has not caught up yet
+        with read_from_replica():
+            self.assertEqual(get_scored_game_columns()["game_id"], [])
+            with transaction():
+                self.assertEqual(get_scored_game_columns()["game_id"], [1])
+        self.assertEqual(get_scored_game_columns()["game_id"], [1])
+        sync_replica(DB_NAME)
+        with read_from_replica():
+            self.assertEqual(get_scored_game_columns()["game_id"], [1])
+
+    def test_reads_own_writes_while_routed(self):
+        sync_replica(DB_NAME)
+        set_read_route(DB_NAME, get_replica_name(DB_NAME))
+        create_tournament("Cup", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        self.assertEqual(get_tournament_by_name("Cup"), 2)
+        self.assertEqual([tournament["name"] for tournament in
+            get_tournament_page()], ["Test Name 1", "Cup"])
+        create_team("Test Name 4", "m", 19, 20, 2)
+        create_player("Player 4", "m", 19, 4)
+        self.assertEqual(get_team_ids(), [1, 2, 3, 4])
+        self.assertEqual(get_team_by_id(4)["roster"][0]["name"], "Player 4")
+        # Even inside read_from_replica, the other reads use the primary
+        with read_from_replica():
+            self.assertEqual(get_team_ids(), [1, 2, 3, 4])
+
+    def test_recopied_when_changes_do_not_apply(self):
+        sync_replica(DB_NAME)
+        conn = connect(get_replica_name(DB_NAME))
+        conn.execute("DROP TABLE PlayersOnTeams")
+        conn.commit()
+        create_player("Player 4", "m", 20, 1)
+        self.assertIsNone(sync_replica(DB_NAME))
+        self.assertEqual(self.dump(get_replica_name(DB_NAME)),
+            self.dump(DB_NAME))
+
+    def test_swiss_round_reads_primary(self):
+        create_team("Test Name 4", "m", 19, 20, 2)
+        for number in range(1, 5):
+            register_team_in_tournament(1, number)
+        sync_replica(DB_NAME)
+        set_read_route(DB_NAME, get_replica_name(DB_NAME))
+        # The replica has neither this game nor the scores
+        create_game(START + timedelta(hours=3), 1, "Field 2", 1, 3)
+        create_game_score(1, 2, 1)
+        create_game_score(2, 2, 1)
+        game_ids, bye = create_swiss_round(1, START + timedelta(days=1),
+            ["Field 1"])
+        set_read_route(DB_NAME)
+        pairs = [frozenset((game["home_team"], game["away_team"]))
+            for game in get_tournament_schedule(1)
+            if game["game_id"] in game_ids]
+        self.assertEqual(pairs, [frozenset((1, 4)), frozenset((2, 3))])
+
+
+class TestReplicaFiles(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        configure_storage("sqlite", directory=self.directory.name)
+        setup_user_database()
+        setup_tournament_database()
+
+    def tearDown(self):
+        set_read_route(DB_NAME)
+        configure_storage("sqlite")
+        self.directory.cleanup()
+
+    def test_shipper_keeps_replica_in_sync(self):
+        create_team("Test Name 1", "m", 19, 20, 2)
+        shipper = start_replica(DB_NAME, interval=0.05)
+        try:
+            self.assertTrue(os.path.exists(os.path.join(self.directory.name,
+                "tournaments_replica.db")))
+            self.assertEqual(search_teams("Test")[0]["team_id"], 1)
+            create_team("Test Name 2", "m", 19, 20, 2)
+            self.assertEqual(get_team_ids(), [1, 2])
+            create_tournament("Test Name 1", "m", 18, 24, START,
+                START + timedelta(days=7), 1, "Test Location")
+            create_game(START, 1, "Field 1", 1, 2)
+            create_game_score(1, 2, 1)
+            deadline = time.time() + 5
+            with read_from_replica():
+                while (not get_scored_game_columns()["game_id"] and
+                        time.time() < deadline):
+                    time.sleep(0.05)
+                self.assertEqual(get_scored_game_columns()["game_id"], [1])
+        finally:
+            stop_replica(shipper)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_game,
+    get_tournament_schedule,
+    get_batch_game_conflicts,
+    GAME_DURATION)
+from database.user_database import setup_user_database
+from backend.scheduler import (
+    round_robin_pairings,
+    assign_slots,
+    schedule_tournament_games)
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        # Tournament 1 runs for one day
+        create_tournament("Test Name", "m", 18, 24, START,
+            START + timedelta(hours=12), 1, "Test Location")
+        for number in range(1, 7):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_round_robin(self):
+        rounds = round_robin_pairings([1, 2, 3, 4, 5])
+        self.assertEqual(len(rounds), 5)
+        matchups = [frozenset(pairing) for pairings in rounds
+            for pairing in pairings]
+        self.assertEqual(len(matchups), 10)
+        self.assertEqual(len(set(matchups)), 10)
+
+    def test_schedule_without_conflicts(self):
+        pairings = [pairing for pairings in round_robin_pairings(range(1, 7))
+            for pairing in pairings]
+        game_ids, unplaced = schedule_tournament_games(1, pairings,
+            ["Field 1", "Field 2", "Field 3"])
+        self.assertEqual(unplaced, [])
+        self.assertEqual(len(game_ids), 15)
+
+        schedule = get_tournament_schedule(1)
+        self.assertEqual(len(schedule), 15)
+        games = [{"time": datetime.fromisoformat(game["time"]),
+            "location": game["location"], "home_team": game["home_team"],
+            "away_team": game["away_team"]} for game in schedule]
+        conflicts = get_batch_game_conflicts(games)
+        # Every game only conflicts with itself in the database
+        self.assertTrue(all(conflict["game_id"] == game_ids[conflict["index"]]
+            for conflict in conflicts if conflict["game_id"] is not None))
+        self.assertEqual([c for c in conflicts if c["game_id"] is None], [])
+
+    def test_rest_blackout_and_capacity(self):
+        blackouts = {1: [(START, START + timedelta(hours=4))]}
+        games, unplaced = assign_slots([(1, 2), (1, 3), (4, 5)], START,
+            START + timedelta(hours=12), ["Field 1"],
+            rest_time=timedelta(hours=2), blackouts=blackouts,
+            capacity={"Field 1": 2})
+        self.assertEqual(unplaced, [])
+        times = {(game["home_team"], game["away_team"]): game["time"]
+            for game in games}
+        self.assertEqual(times[(1, 2)], START + 2 * GAME_DURATION)
+        self.assertEqual(times[(1, 3)], START + 4 * GAME_DURATION)
+        # Field 1 hosts two games at once
+        self.assertEqual(times[(4, 5)], START)
+
+    def test_existing_games_and_unplaceable(self):
+        create_game(START, 1, "Field 1", 1, 2)
+        games, unplaced = assign_slots([(3, 4), (5, 6)], START,
+            START + 2 * GAME_DURATION, ["Field 1"])
+        self.assertEqual(games[0]["time"], START + GAME_DURATION)
+        self.assertEqual(unplaced, [(5, 6)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_game,
+    create_game_score,
+    get_score_by_game,
+    get_scores_by_tournament,
+    get_score_history_by_game,
+    get_tournament_schedule)
+from database.user_database import setup_user_database
+from util.util import get_conn_curs, commit_close
+from datetime import datetime, timedelta
+import unittest
+
+class TestCurrentScore(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name", "m", 18, 24, datetime.now(),
+            datetime.now() + timedelta(days = 2), 1, "Test Location")
+        create_team("Test Name 1", "m", 19, 20, 2)
+        create_team("Test Name 2", "m", 19, 20, 4)
+        # Games with IDs 1 and 2 in tournament 1
+        create_game(datetime.now(), 1, "Test Location", 1, 2)
+        create_game(datetime.now(), 1, "Test Location", 2, 1)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_no_score(self):
+        self.assertIsNone(get_score_by_game(1))
+        self.assertEqual(get_scores_by_tournament(1), {})
+
+    def test_correction_replaces_current(self):
+        create_game_score(1, 4, 3)
+        create_game_score(1, 4, 2)
+        create_game_score(2, 0, 0)
+        self.assertEqual(get_score_by_game(1),
+            {"homescore": 4, "awayscore": 2})
+        self.assertEqual(get_scores_by_tournament(1), {
+            1: {"homescore": 4, "awayscore": 2},
+            2: {"homescore": 0, "awayscore": 0}})
+
+    def test_history(self):
+        create_game_score(1, 4, 3)
+        create_game_score(1, 4, 2)
+        history = get_score_history_by_game(1)
+        self.assertEqual([(s["homescore"], s["awayscore"]) for s in history],
+            [(4, 3), (4, 2)])
+
+    def test_upgrade_backfills_current_score(self):
+        # Simulates a database created before Games had current_score
+        configure_storage("memory")
+        conn, curs = get_conn_curs("tournaments")
+        curs.execute("CREATE TABLE Games (id INTEGER PRIMARY KEY " +
+            "AUTOINCREMENT, home_team INT, away_team INT, time DATETIME, " +
+            "location VARCHAR(50))")
+        curs.execute("CREATE TABLE Scores (id INTEGER PRIMARY KEY " +
+            "AUTOINCREMENT, home_team_score INT, away_team_score INT)")
+        curs.execute("CREATE TABLE GameScores (game_id INT, score_id INT)")
+        curs.execute("INSERT INTO Games (location) VALUES ('Test Location')")
+        curs.execute("INSERT INTO Scores VALUES (1, 4, 3), (2, 1, 1)")
+        curs.execute("INSERT INTO GameScores VALUES (1, 1), (1, 2)")
+        commit_close(conn, curs)
+
+        setup_tournament_database()
+        self.assertEqual(get_score_by_game(1),
+            {"homescore": 1, "awayscore": 1})
+
+class TestTournamentSchedule(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name", "m", 18, 24, datetime.now(),
+            datetime.now() + timedelta(days = 2), 1, "Test Location")
+        create_team("Test Name 1", "m", 19, 20, 2)
+        create_team("Test Name 2", "m", 19, 20, 4)
+        # Game 1 is later than game 2, game 2 has no away team yet
+        create_game(datetime.now() + timedelta(hours=3), 1, "Field 1", 1, 2)
+        create_game(datetime.now() + timedelta(hours=1), 1, "Field 2", 2)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_schedule(self):
+        create_game_score(1, 4, 3)
+        schedule = get_tournament_schedule(1)
+        self.assertEqual([game["game_id"] for game in schedule], [2, 1])
+        self.assertEqual(schedule[0]["home_team_name"], "Test Name 2")
+        self.assertIsNone(schedule[0]["away_team_name"])
+        self.assertIsNone(schedule[0]["homescore"])
+        self.assertEqual(schedule[1]["location"], "Field 1")
+        self.assertEqual(schedule[1]["away_team_name"], "Test Name 2")
+        self.assertEqual(schedule[1]["homescore"], 4)
+        self.assertEqual(schedule[1]["awayscore"], 3)
+
+    def test_empty_tournament(self):
+        self.assertEqual(get_tournament_schedule(2), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
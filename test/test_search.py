@@ -0,0 +1,93 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    DB_NAME,
+    setup_tournament_database,
+    create_search_tables,
+    create_tournament,
+    create_team,
+    create_player,
+    delete_player,
+    delete_tournament,
+    get_tournament_by_name,
+    search_tournaments,
+    search_teams,
+    search_players)
+from database.user_database import setup_user_database
+from util.util import get_conn_curs, commit_close
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestSearch(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        for name in ["Chicago Eagles", "Eagle Rock United", "Boston Hawks",
+                "Beagles FC"]:
+            create_team(name, "m", 19, 20, 2)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_substring_ranked_by_prefix(self):
+        names = [team["name"] for team in search_teams("eagle")]
+        self.assertEqual(names[0], "Eagle Rock United")
+        self.assertEqual(sorted(names), ["Beagles FC", "Chicago Eagles",
+            "Eagle Rock United"])
+
+    def test_fuzzy(self):
+        # Shares the trigrams "eag" and "gle" with the Eagles teams
+        names = [team["name"] for team in search_teams("Eaglse")]
+        self.assertIn("Chicago Eagles", names)
+        self.assertNotIn("Boston Hawks", names)
+
+    def test_short_query_is_prefix(self):
+        self.assertEqual(search_teams("bo"),
+            [{"team_id": 3, "name": "Boston Hawks"}])
+        self.assertEqual(search_teams("%"), [])
+        self.assertEqual(search_teams(""), [])
+
+    def test_limit(self):
+        self.assertEqual(len(search_teams("eagle", limit=2)), 2)
+
+    def test_kept_in_sync(self):
+        create_tournament("Spring Cup", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        create_player("Alice Smith", "f", 20, 1)
+        self.assertEqual(search_tournaments("spring"),
+            [{"tournament_id": 1, "name": "Spring Cup"}])
+        self.assertEqual(search_players("smith"),
+            [{"player_id": 1, "name": "Alice Smith"}])
+
+        conn, curs = get_conn_curs(DB_NAME)
+        curs.execute("UPDATE Teams SET name = 'Boston Owls' WHERE id = 3")
+        commit_close(conn, curs)
+        self.assertEqual(search_teams("hawks"), [])
+        self.assertEqual(search_teams("owls"),
+            [{"team_id": 3, "name": "Boston Owls"}])
+
+        delete_player(1)
+        delete_tournament(1)
+        self.assertEqual(search_players("smith"), [])
+        self.assertEqual(search_tournaments("spring"), [])
+
+    def test_index_built_for_existing_database(self):
+        conn, curs = get_conn_curs(DB_NAME)
+        curs.execute("DROP TABLE TeamSearch")
+        commit_close(conn, curs)
+
+        create_search_tables()
+        self.assertEqual(search_teams("hawks"),
+            [{"team_id": 3, "name": "Boston Hawks"}])
+
+    def test_tournament_by_name(self):
+        create_tournament("Coach's Cup", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        self.assertEqual(get_tournament_by_name("Coach's Cup"), 1)
+        self.assertFalse(get_tournament_by_name("Coach"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_game,
+    create_game_score,
+    register_team_in_tournament)
+from database.user_database import setup_user_database
+from backend.simulator import simulate_tournament
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestSimulator(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        for number in range(1, 5):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+            register_team_in_tournament(1, number)
+        # Team 1 has won three games, only one game is left and team 1 is
+        # not playing in it
+        create_game(START, 1, "Field 1", 1, 2)
+        create_game(START + timedelta(hours=2), 1, "Field 1", 1, 3)
+        create_game(START + timedelta(hours=4), 1, "Field 1", 1, 4)
+        create_game(START + timedelta(hours=6), 1, "Field 1", 3, 4)
+        create_game_score(1, 1, 0)
+        create_game_score(2, 2, 0)
+        create_game_score(3, 3, 0)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_probabilities(self):
+        odds = simulate_tournament(1, 2000, workers=1, seed=1)
+        self.assertEqual(sorted(odds), [1, 2, 3, 4])
+        self.assertEqual(odds[1][0], 1.0)
+        for probabilities in odds.values():
+            self.assertAlmostEqual(sum(probabilities), 1.0)
+        for position in range(4):
+            self.assertAlmostEqual(sum(odds[team_id][position]
+                for team_id in odds), 1.0)
+        # Team 2 has no games left: the winner of 3 against 4 finishes
+        # second and team 2 third on goal difference, while a draw leaves
+        # team 2 last
+        self.assertEqual(odds[2][1], 0.0)
+        self.assertAlmostEqual(odds[2][3], 0.25, delta=0.05)
+        self.assertAlmostEqual(odds[2][2] + odds[2][3], 1.0)
+
+    def test_reproducible_with_process_pool(self):
+        first = simulate_tournament(1, 1000, workers=2, seed=7)
+        second = simulate_tournament(1, 1000, workers=2, seed=7)
+        self.assertEqual(first, second)
+        self.assertEqual(first[1][0], 1.0)
+
+    def test_no_simulations(self):
+        with self.assertRaises(AssertionError):
+            simulate_tournament(1, 0, workers=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
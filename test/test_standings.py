@@ -0,0 +1,83 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_game,
+    create_game_score,
+    register_team_in_tournament)
+from database.user_database import setup_user_database
+from backend.standings import get_standings
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestStandings(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        for number in range(1, 6):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+            register_team_in_tournament(1, number)
+        self.game_count = 0
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def play(self, home_team, away_team, home_team_score, away_team_score):
+        self.game_count += 1
+        create_game(START + timedelta(hours=self.game_count), 1, "Field 1",
+            home_team, away_team)
+        create_game_score(self.game_count, home_team_score, away_team_score)
+
+    def test_head_to_head_before_goal_difference(self):
+        # Teams 1, 2 and 3 beat each other in a circle and all beat team 4
+        self.play(1, 2, 1, 0)
+        self.play(2, 3, 1, 0)
+        self.play(3, 1, 3, 0)
+        self.play(1, 4, 4, 0)
+        self.play(2, 4, 1, 0)
+        self.play(3, 4, 1, 0)
+
+        standings = get_standings(1)
+        # Head-to-head goal difference: team 3 +2, team 2 0, team 1 -2, even
+        # though team 1 has the better overall goal difference than team 2.
+        # Teams 4 and 5 never met, so goal difference puts team 5 first.
+        self.assertEqual([row["team_id"] for row in standings],
+            [3, 2, 1, 5, 4])
+        self.assertEqual(standings[2], {"position": 3, "team_id": 1,
+            "played": 3, "won": 2, "drawn": 0, "lost": 1, "goals_for": 5,
+            "goals_against": 3, "goal_difference": 2, "points": 6})
+        self.assertEqual(standings[3]["played"], 0)
+
+    def test_mini_league_reapplied(self):
+        # All four teams end on 4 points, so the mini-league is all their
+        # games: team 3 has goal difference +1, teams 1 and 2 have 0 and the
+        # same goals scored, and team 4 has -1. The mini-league of teams 1
+        # and 2 alone is their own game, which team 2 won.
+        self.play(1, 2, 0, 1)
+        self.play(3, 4, 2, 0)
+        self.play(1, 3, 1, 0)
+        self.play(2, 4, 0, 1)
+        self.play(1, 4, 1, 1)
+        self.play(2, 3, 1, 1)
+
+        standings = get_standings(1, ["points", "head_to_head"])
+        self.assertEqual([row["points"] for row in standings[:4]],
+            [4, 4, 4, 4])
+        self.assertEqual([row["team_id"] for row in standings],
+            [3, 2, 1, 4, 5])
+
+    def test_ties_ordered_by_team_id(self):
+        self.play(4, 2, 1, 1)
+        standings = get_standings(1)
+        self.assertEqual([row["team_id"] for row in standings],
+            [2, 4, 1, 3, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
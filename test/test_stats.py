@@ -0,0 +1,72 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_game,
+    create_game_score)
+from database.user_database import setup_user_database
+from backend.stats import get_team_stats, get_tournament_stats
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestStats(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        for number in range(1, 4):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+        self.game_count = 0
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def play(self, home_team, away_team, home_team_score, away_team_score):
+        self.game_count += 1
+        create_game(START + timedelta(hours=self.game_count), 1, "Field 1",
+            home_team, away_team)
+        create_game_score(self.game_count, home_team_score, away_team_score)
+
+    def test_no_games(self):
+        self.assertEqual(get_team_stats(1), {})
+        self.assertEqual(get_tournament_stats(1)["games_played"], 0)
+        self.assertIsNone(get_tournament_stats(1)["goals_per_game"])
+
+    def test_team_stats(self):
+        self.play(1, 2, 2, 0)
+        self.play(3, 1, 0, 1)
+        self.play(1, 3, 1, 1)
+        self.play(2, 1, 3, 0)
+        self.play(1, 2, 4, 1)
+
+        stats = get_team_stats(1)
+        team = stats[1]
+        self.assertEqual((team["played"], team["won"], team["drawn"],
+            team["lost"]), (5, 3, 1, 1))
+        self.assertEqual((team["goals_for"], team["goals_against"]), (8, 5))
+        self.assertEqual(team["goals_for_average"], 1.6)
+        self.assertEqual(team["home"], {"played": 3, "won": 2, "drawn": 1,
+            "lost": 0, "goals_for": 7, "goals_against": 2})
+        self.assertEqual(team["away"], {"played": 2, "won": 1, "drawn": 0,
+            "lost": 1, "goals_for": 1, "goals_against": 3})
+        self.assertEqual(team["current_streak"], "W1")
+        self.assertEqual(team["longest_win_streak"], 2)
+        self.assertEqual(stats[3]["current_streak"], "D1")
+        self.assertEqual(stats[2]["longest_win_streak"], 1)
+
+    def test_tournament_stats(self):
+        self.play(1, 2, 2, 0)
+        self.play(3, 1, 0, 1)
+        self.play(1, 3, 1, 1)
+        self.assertEqual(get_tournament_stats(1), {"games_played": 3,
+            "goals": 5, "goals_per_game": 5 / 3, "home_wins": 1,
+            "away_wins": 1, "draws": 1, "home_win_rate": 1 / 3})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,169 @@
+from database.storage import (
+    configure_storage,
+    get_engine,
+    connect,
+    set_tenant,
+    get_tenant,
+    register_tenant,
+    tenant_exists,
+    database_exists,
+    MemoryEngine,
+    SQLiteFileEngine)
+from database.tournament_database import (
+    setup_tournament_database,
+    create_team,
+    create_player,
+    get_team_by_id,
+    get_team_ids)
+from database.user_database import setup_user_database, get_user_by_id
+from backend.users import select_league
+import os
+import tempfile
+import unittest
+
+class TestMemoryEngine(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_engine_selected(self):
+        self.assertIsInstance(get_engine(), MemoryEngine)
+
+    def test_data_persists_between_calls(self):
+        create_team("Test Name 1", "m", 19, 20, 2)
+        create_player("Test Player", "m", 19, 1)
+        team = get_team_by_id(1)
+        self.assertEqual(team["name"], "Test Name 1")
+        self.assertEqual(team["roster"][0]["name"], "Test Player")
+        self.assertEqual(team["team_manager"]["user_id"], 2)
+
+    def test_reconfigure_starts_empty(self):
+        create_team("Test Name 1", "m", 19, 20, 2)
+        configure_storage("memory")
+        setup_tournament_database()
+        self.assertRaises(Exception, get_team_by_id, 1)
+
+    def test_unknown_engine(self):
+        self.assertRaises(Exception, configure_storage, "not an engine")
+
+class TestSQLiteFileEngine(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        configure_storage("sqlite", directory=self.directory.name)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+        self.directory.cleanup()
+
+    def test_files_in_directory(self):
+        self.assertIsInstance(get_engine(), SQLiteFileEngine)
+        self.assertFalse(database_exists("tournaments"))
+        setup_user_database()
+        setup_tournament_database()
+        self.assertTrue(database_exists("tournaments"))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory.name, "users.db")))
+        self.assertTrue(os.path.exists(
+            os.path.join(self.directory.name, "tournaments.db")))
+        self.assertEqual(get_user_by_id(1)["username"], "tm123")
+
+    def test_connections_pooled(self):
+        conn = connect("tournaments")
+        conn.close()
+        self.assertIs(connect("tournaments"), conn)
+
+    def test_pool_rolls_back_unfinished_work(self):
+        setup_tournament_database()
+        conn = connect("tournaments")
+        conn.execute("INSERT INTO Teams (name) VALUES ('Test Name')")
+        conn.close()
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(get_team_ids(), [])
+
+class TestTenants(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        configure_storage("sqlite", directory=self.directory.name)
+
+    def tearDown(self):
+        set_tenant(None)
+        configure_storage("sqlite")
+        self.directory.cleanup()
+
+    def setup_league(self, tenant_id, team_names):
+        set_tenant(tenant_id)
+        setup_user_database()
+        setup_tournament_database()
+        for name in team_names:
+            create_team(name, "m", 19, 20, 2)
+
+    def test_leagues_are_separate(self):
+        self.setup_league("league-a", ["Test Name 1", "Test Name 2"])
+        self.setup_league("league_b", ["Test Name 3"])
+        self.assertEqual(get_tenant(), "league_b")
+        self.assertEqual(get_team_ids(), [1])
+        self.assertEqual(get_team_by_id(1)["name"], "Test Name 3")
+
+        set_tenant("league-a")
+        self.assertEqual(get_team_ids(), [1, 2])
+        self.assertTrue(os.path.exists(os.path.join(self.directory.name,
+            "tenants", "league-a", "tournaments.db")))
+
+        # The default databases are not touched
+        set_tenant(None)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.directory.name, "tournaments.db")))
+
+    def test_registered_directory(self):
+        with tempfile.TemporaryDirectory() as other_disk:
+            register_tenant("big", directory=other_disk)
+            self.setup_league("big", ["Test Name 1"])
+            self.assertTrue(os.path.exists(
+                os.path.join(other_disk, "tournaments.db")))
+            set_tenant(None)
+            configure_storage("sqlite", directory=self.directory.name)
+
+    def test_memory_leagues(self):
+        configure_storage("memory")
+        self.setup_league("league-a", ["Test Name 1"])
+        self.setup_league("league-b", [])
+        self.assertEqual(get_team_ids(), [])
+        self.assertIsInstance(get_engine(), MemoryEngine)
+
+    def test_invalid_tenant(self):
+        self.assertRaises(AssertionError, set_tenant, "../other")
+
+    def test_unknown_league_not_created(self):
+        with self.assertRaises(AssertionError):
+            select_league("leauge-a")
+        self.assertIsNone(get_tenant())
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name,
+            "tenants", "leauge-a")))
+
+        select_league("league-a", create=True)
+        self.assertEqual(get_tenant(), "league-a")
+        set_tenant(None)
+        # A new process finds the league by its directory
+        configure_storage("sqlite", directory=self.directory.name)
+        self.assertTrue(tenant_exists("league-a"))
+        select_league(" league-a ")
+        self.assertEqual(get_tenant(), "league-a")
+        select_league("")
+        self.assertIsNone(get_tenant())
+
+    def test_memory_registered_directory(self):
+        configure_storage("memory")
+        self.assertFalse(tenant_exists("big"))
+        register_tenant("big", directory=self.directory.name)
+        self.assertTrue(tenant_exists("big"))
+        select_league("big")
+        self.setup_league("big", ["Test Name 1"])
+        self.assertEqual(get_team_ids(), [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
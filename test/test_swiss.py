@@ -0,0 +1,108 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_tournament,
+    create_team,
+    create_game_score,
+    register_team_in_tournament,
+    get_tournament_schedule)
+from database.user_database import setup_user_database
+from backend.swiss import pair_round, create_swiss_round
+from datetime import datetime, timedelta
+import unittest
+
+START = datetime(2023, 4, 1, 8, 0)
+
+class TestPairRound(unittest.TestCase):
+    def test_pairs_neighbours(self):
+        pairs, bye = pair_round([4, 3, 2, 1], set(), {})
+        self.assertEqual(pairs, [(4, 3), (2, 1)])
+        self.assertIsNone(bye)
+
+    def test_avoids_rematch(self):
+        played = {frozenset((1, 2))}
+        pairs, bye = pair_round([1, 2, 3, 4], played, {})
+        self.assertEqual(pairs, [(1, 3), (2, 4)])
+
+    def test_swaps_stuck_teams_into_pairs(self):
+        # Teams 3 and 4 already met, and greedy pairing leaves them last
+        played = {frozenset((3, 4))}
+        pairs, bye = pair_round([1, 2, 3, 4], played, {})
+        self.assertEqual(len(pairs), 2)
+        for pair in pairs:
+            self.assertNotIn(frozenset(pair), played)
+        self.assertEqual(sorted(team for pair in pairs for team in pair),
+            [1, 2, 3, 4])
+
+    def test_rematch_when_unavoidable(self):
+        played = {frozenset((1, 2))}
+        pairs, bye = pair_round([1, 2], played, {})
+        self.assertEqual(pairs, [(1, 2)])
+
+    def test_bye_goes_to_lowest_team_without_one(self):
+        # Team 5 had a bye already, so has played fewer games
+        games_played = {1: 2, 2: 2, 3: 2, 4: 2, 5: 1}
+        pairs, bye = pair_round([1, 2, 3, 4, 5], set(), games_played)
+        self.assertEqual(bye, 4)
+        self.assertEqual(pairs, [(1, 2), (3, 5)])
+
+    def test_many_rounds_without_rematches(self):
+        teams = list(range(1, 65))
+        played = set()
+        for round_number in range(6):
+            pairs, bye = pair_round(teams, played, {})
+            self.assertEqual(len(pairs), 32)
+            for pair in pairs:
+                self.assertNotIn(frozenset(pair), played)
+                played.add(frozenset(pair))
+            # Shuffle the ranking a little between rounds
+            teams = [team for pair in pairs for team in reversed(pair)]
+
+
+class TestCreateSwissRound(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_tournament("Test Name", "m", 18, 24, START,
+            START + timedelta(days=7), 1, "Test Location")
+        for number in range(1, 7):
+            create_team(f"Test Name {number}", "m", 19, 20, 2)
+            register_team_in_tournament(1, number)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_rounds(self):
+        game_ids, bye = create_swiss_round(1, START, ["Field 1", "Field 2"])
+        self.assertEqual(game_ids, [1, 2, 3])
+        self.assertIsNone(bye)
+        schedule = get_tournament_schedule(1)
+        self.assertEqual([(game["home_team"], game["away_team"])
+            for game in schedule], [(1, 2), (3, 4), (5, 6)])
+        self.assertEqual([game["location"] for game in schedule],
+            ["Field 1", "Field 2", "Field 1"])
+        self.assertEqual(schedule[2]["time"], str(START + timedelta(hours=2)))
+
+        # Winners 2 and 6 meet, as do losers 4 and 5, while winner 3 is
+        # left over and meets loser 1
+        create_game_score(1, 0, 1)
+        create_game_score(2, 1, 0)
+        create_game_score(3, 0, 2)
+
+        game_ids, bye = create_swiss_round(1, START + timedelta(days=1),
+            ["Field 1"])
+        self.assertEqual(game_ids, [4, 5, 6])
+        pairs = {frozenset((game["home_team"], game["away_team"]))
+            for game in get_tournament_schedule(1)[3:]}
+        self.assertEqual(pairs, {frozenset((2, 6)), frozenset((3, 1)),
+            frozenset((4, 5))})
+
+    def test_no_locations(self):
+        with self.assertRaises(ValueError):
+            create_swiss_round(1, START, [])
+        self.assertEqual(get_tournament_schedule(1), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    create_team,
+    create_player,
+    delete_player,
+    get_team_age_range,
+    get_team_gender_range)
+from database.user_database import setup_user_database
+from util.util import get_conn_curs, commit_close
+import unittest
+
+class TestTeamAggregates(unittest.TestCase):
+    def setUp(self):
+        configure_storage("memory")
+        setup_user_database()
+        setup_tournament_database()
+        create_team("Test Name 1", "co-ed", 10, 30, 2)
+        create_team("Test Name 2", "co-ed", 10, 30, 2)
+
+    def tearDown(self):
+        configure_storage("sqlite")
+
+    def test_empty_team(self):
+        self.assertEqual(get_team_age_range(1), (None, None))
+        self.assertIsNone(get_team_gender_range(1))
+        self.assertRaises(Exception, get_team_age_range, 3)
+        self.assertRaises(Exception, get_team_gender_range, 3)
+
+    def test_create_player(self):
+        create_player("Player 1", "f", 20, 1)
+        self.assertEqual(get_team_age_range(1), (20, 20))
+        self.assertEqual(get_team_gender_range(1), "f")
+        create_player("Player 2", "m", 15, 1)
+        create_player("Player 3", "m", 25, 1)
+        self.assertEqual(get_team_age_range(1), (15, 25))
+        self.assertEqual(get_team_gender_range(1), "mixed")
+        self.assertEqual(get_team_age_range(2), (None, None))
+
+    def test_delete_player(self):
+        create_player("Player 1", "f", 20, 1)
+        create_player("Player 2", "m", 15, 1)
+        create_player("Player 3", "m", 25, 1)
+        delete_player(2)
+        self.assertEqual(get_team_age_range(1), (20, 25))
+        delete_player(1)
+        self.assertEqual(get_team_gender_range(1), "m")
+        delete_player(3)
+        self.assertEqual(get_team_age_range(1), (None, None))
+        self.assertIsNone(get_team_gender_range(1))
+
+    def test_upgrade_backfills_aggregates(self):
+        # Simulates a database created before Teams had the aggregates
+        configure_storage("memory")
+        conn, curs = get_conn_curs("tournaments")
+        curs.execute("CREATE TABLE Teams (id INTEGER PRIMARY KEY " +
+            "AUTOINCREMENT, name VARCHAR(250), team_gender VARCHAR(5), " +
+            "team_age_min INT, team_age_max INT, team_manager INT)")
+        curs.execute("CREATE TABLE Players (id INTEGER PRIMARY KEY " +
+            "AUTOINCREMENT, name VARCHAR(250), gender VARCHAR(5), age INT)")
+        curs.execute("CREATE TABLE PlayersOnTeams (team_id INT, " +
+            "player_id INT)")
+        curs.execute("INSERT INTO Teams (name) VALUES ('Test Name 1'), " +
+            "('Test Name 2')")
+        curs.execute("INSERT INTO Players (name, gender, age) VALUES " +
+            "('Player 1', 'm', 18), ('Player 2', 'f', 22)")
+        curs.execute("INSERT INTO PlayersOnTeams VALUES (1, 1), (1, 2)")
+        commit_close(conn, curs)
+
+        setup_tournament_database()
+        self.assertEqual(get_team_age_range(1), (18, 22))
+        self.assertEqual(get_team_gender_range(1), "mixed")
+        self.assertEqual(get_team_age_range(2), (None, None))
+        create_player("Player 3", "m", 30, 2)
+        self.assertEqual(get_team_age_range(2), (30, 30))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+from database.storage import configure_storage
+from database.tournament_database import (
+    setup_tournament_database,
+    transaction,
+    create_team,
+    create_player,
+    create_game_score,
+    get_team_ids,
+    get_players_by_team)
+from database.user_database import setup_user_database
+from util.util import get_conn_curs, commit_close
+from sqlite3 import IntegrityError
+import os
+import sqlite3
+import tempfile
+import unittest
+
+class TestTransaction(unittest.TestCase):
+    def setUp(self):
+        # Uses files so that uncommitted data is not visible to a second
+        # connection
+        self.directory = tempfile.TemporaryDirectory()
+        configure_storage("sqlite", directory=self.directory.name)
+        setup_user_database()
+        setup_tournament_database()
+
+    def tearDown(self):
+        configure_storage("sqlite")
+        self.directory.cleanup()
+
+    def test_commits_once(self):
+        with transaction():
+            create_team("Test Name 1", "m", 19, 20, 2)
+            for number in range(15):
+                create_player(f"Player {number}", "m", 19, 1)
+            # Nothing is visible outside the transaction until it ends
+            outside = sqlite3.connect(
+                os.path.join(self.directory.name, "tournaments.db"))
+            count = outside.execute("SELECT COUNT(*) FROM Players").fetchone()
+            outside.close()
+            self.assertEqual(count[0], 0)
+        self.assertEqual(len(get_players_by_team(1)), 15)
+
+    def test_rolls_back_on_error(self):
+        def create_team_and_fail():
+            with transaction():
+                create_team("Test Name 1", "m", 19, 20, 2)
+                create_player("Test Player", "m", 19, 1)
+                raise ValueError("failure halfway")
+
+        self.assertRaises(ValueError, create_team_and_fail)
+        self.assertEqual(get_team_ids(), [])
+
+    def test_nested_savepoint(self):
+        with transaction():
+            create_team("Test Name 1", "m", 19, 20, 2)
+            try:
+                with transaction():
+                    create_team("Test Name 2", "m", 19, 20, 2)
+                    raise ValueError("inner failure")
+            except ValueError:
+                pass
+            create_team("Test Name 3", "m", 19, 20, 2)
+
+        conn, curs = get_conn_curs("tournaments")
+        curs.execute("SELECT name FROM Teams ORDER BY id")
+        names = [row[0] for row in curs.fetchall()]
+        commit_close(conn, curs)
+        self.assertEqual(names, ["Test Name 1", "Test Name 3"])
+
+    def test_failed_write_leaves_no_partial_state(self):
+        self.assertRaises(IntegrityError, create_game_score, 7, 4, 3)
+        conn, curs = get_conn_curs("tournaments")
+        curs.execute("SELECT COUNT(*) FROM Scores")
+        count = curs.fetchone()[0]
+        commit_close(conn, curs)
+        self.assertEqual(count, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
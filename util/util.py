@@ -1,15 +1,32 @@
-import sqlite3
+from database.storage import connect, connect_for_read
 
 # Utility functions for the connection and cursor
-def get_conn_curs(db_filename):
-    # Connects to the database, file is named above
-    conn = sqlite3.connect(db_filename)
+def get_conn_curs(db_name):
+    # Connects to the database through the active storage engine, db_name is
+    # the logical name of the database ("tournaments" or "users"). Inside a
+    # transaction this is the transaction's shared connection.
+    conn = connect(db_name)
     curs = conn.cursor()
     # Turns foreign keys on, so that they are contrained
     curs.execute("PRAGMA foreign_keys=on;")
     return conn, curs
 
+# Same as get_conn_curs, for read-only report functions whose reads may be
+# served by a read replica of db_name inside read_from_replica (see
+# database/storage.py)
+def get_read_conn_curs(db_name):
+    conn = connect_for_read(db_name)
+    curs = conn.cursor()
+    curs.execute("PRAGMA foreign_keys=on;")
+    return conn, curs
+
 def commit_close(conn, curs):
     conn.commit()
     curs.close()
-    conn.close()
\ No newline at end of file
+    conn.close()
+
+# Turns text into a LIKE pattern matching values that start with it, with
+# the LIKE wildcards in text escaped, for use with ESCAPE '\'.
+def get_like_prefix(text):
+    return (text.replace("\\", "\\\\").replace("%", "\\%")
+        .replace("_", "\\_") + "%")